@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Vectorised daily/monthly aggregation over the hourly boiler readings.
+
+Works on the column dicts from timeseries_store (a `time` array plus one
+array per boiler metric) and computes, for all three boilers at once:
+daily totals, NG/steam, water/steam and electric/steam ratios, mean % output,
+rolling 7/30-day means and monthly totals. The result is published as
+public/boiler_rollup.json so the browser never aggregates raw hourly data.
+
+Computed daily totals are cross-checked against the sheet's own sum rows
+(530, 556, ...) and disagreements are listed under `mismatches`.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from excel_extract import BOILER_KEYS, FIRST_HOUR
+
+ADDITIVE_METRICS = ('steam', 'ng', 'water')
+ROLLING_WINDOWS = (7, 30)
+ROLLING_METRICS = ('steam', 'ng', 'ngSteam')
+
+# Sum rows are checked with this tolerance (relative, absolute)
+CHECK_RTOL = 0.005
+CHECK_ATOL = 0.01
+
+
+def report_days(times):
+    """Report day of each hourly timestamp (0800hrs to 0700hrs next day)."""
+    return (times - np.timedelta64(FIRST_HOUR, 'h')).astype('datetime64[D]')
+
+
+def group_sum(index, values, groups):
+    """NaN-ignoring per-group sums and counts via bincount."""
+    present = ~np.isnan(values)
+    sums = np.bincount(index, weights=np.where(present, values, 0.0), minlength=groups)
+    counts = np.bincount(index, weights=present.astype(np.float64), minlength=groups)
+    return sums, counts
+
+
+def safe_divide(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = numerator / denominator
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
+def rolling_mean(values, window):
+    """Trailing NaN-ignoring mean over `window` entries (days)."""
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    upper = np.arange(1, len(values) + 1)
+    lower = np.maximum(upper - window, 0)
+    return safe_divide(sums[upper] - sums[lower], (counts[upper] - counts[lower]).astype(np.float64))
+
+
+def daily_rollup(hourly):
+    """
+    Aggregate hourly columns into per-day arrays for every boiler.
+    Returns (days, {boiler: {metric: array}}) with one entry per calendar day
+    between the first and last report day, so rolling windows are in days.
+    """
+    times = hourly['time']
+    if len(times) == 0:
+        return np.array([], dtype='datetime64[D]'), {boiler: {} for boiler in BOILER_KEYS}
+
+    day_of_row = report_days(times)
+    first, last = day_of_row.min(), day_of_row.max()
+    days = np.arange(first, last + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+    index = (day_of_row - first).astype(np.int64)
+    groups = len(days)
+
+    result = {}
+    for boiler in BOILER_KEYS:
+        steam = hourly[f"{boiler}_steam"]
+        totals = {}
+        for metric in ADDITIVE_METRICS:
+            sums, counts = group_sum(index, hourly[f"{boiler}_{metric}"], groups)
+            totals[metric] = np.where(counts > 0, sums, np.nan)
+        _, hours = group_sum(index, steam, groups)
+
+        # Electric/steam is only available as an hourly ratio: weight it by steam
+        weighted, _ = group_sum(index, hourly[f"{boiler}_electricSteam"] * steam, groups)
+        steam_for_electric, _ = group_sum(
+            index, np.where(np.isnan(hourly[f"{boiler}_electricSteam"]), np.nan, steam), groups
+        )
+        output_sums, output_counts = group_sum(index, hourly[f"{boiler}_output"], groups)
+
+        boiler_days = {
+            **totals,
+            'ngSteam': safe_divide(totals['ng'], totals['steam']),
+            'waterSteam': safe_divide(totals['water'], totals['steam']),
+            'electricSteam': safe_divide(weighted, steam_for_electric),
+            'output': safe_divide(output_sums, output_counts),
+            'hours': hours,
+        }
+        for window in ROLLING_WINDOWS:
+            for metric in ROLLING_METRICS:
+                boiler_days[f"{metric}{window}d"] = rolling_mean(boiler_days[metric], window)
+        result[boiler] = boiler_days
+
+    return days, result
+
+
+def monthly_rollup(days, daily):
+    """Monthly totals and ratios from the daily arrays."""
+    months = days.astype('datetime64[M]')
+    unique_months, index = np.unique(months, return_inverse=True)
+    groups = len(unique_months)
+
+    result = {str(month): {} for month in unique_months}
+    for boiler in BOILER_KEYS:
+        if not daily[boiler]:
+            continue
+        totals = {}
+        for metric in ADDITIVE_METRICS + ('hours',):
+            sums, counts = group_sum(index, daily[boiler][metric], groups)
+            totals[metric] = np.where(counts > 0, sums, np.nan)
+        totals['ngSteam'] = safe_divide(totals['ng'], totals['steam'])
+        totals['waterSteam'] = safe_divide(totals['water'], totals['steam'])
+        for position, month in enumerate(unique_months):
+            result[str(month)][boiler] = {metric: _json_number(values[position]) for metric, values in totals.items()}
+    return result
+
+
+def cross_check(days, daily, daily_sum):
+    """Compare computed daily totals with the sheet's sum rows."""
+    mismatches = []
+    if len(days) == 0 or len(daily_sum['time']) == 0:
+        return mismatches
+
+    sum_days = daily_sum['time'].astype('datetime64[D]')
+    positions = (sum_days - days[0]).astype(np.int64)
+    in_range = (positions >= 0) & (positions < len(days))
+
+    for boiler in BOILER_KEYS:
+        for metric in ADDITIVE_METRICS:
+            sheet = daily_sum[f"{boiler}_{metric}"][in_range]
+            computed = daily[boiler][metric][positions[in_range]]
+            comparable = ~np.isnan(sheet) & ~np.isnan(computed)
+            bad = comparable & ~np.isclose(computed, sheet, rtol=CHECK_RTOL, atol=CHECK_ATOL)
+            for position in np.flatnonzero(bad):
+                mismatches.append({
+                    'date': str(sum_days[in_range][position]),
+                    'boiler': boiler,
+                    'metric': metric,
+                    'computed': _json_number(computed[position]),
+                    'sheet': _json_number(sheet[position]),
+                    'difference': _json_number(computed[position] - sheet[position]),
+                })
+    return mismatches
+
+
+def _json_number(value, digits=4):
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def _json_array(values, digits=4):
+    return [_json_number(value, digits) for value in values]
+
+
+def build_rollup(hourly, daily_sum, version=None):
+    """Full rollup document for public/boiler_rollup.json."""
+    days, daily = daily_rollup(hourly)
+    return {
+        'generatedAt': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'version': version,
+        'days': [str(day) for day in days],
+        'daily': {
+            boiler: {metric: _json_array(values) for metric, values in metrics.items()}
+            for boiler, metrics in daily.items()
+        },
+        'monthly': monthly_rollup(days, daily),
+        'mismatches': cross_check(days, daily, daily_sum),
+    }
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Streaming alert rules over the hourly boiler readings.
+
+Every sync feeds the store's hourly rows newer than the last one seen (the
+cursor) through the engine, one row at a time, and publishes the result as
+public/boiler_alerts.json, so dashboards only render alerts instead of
+re-deriving them from the readings.
+
+Rules, per boiler:
+
+- threshold: a metric outside its configured min/max (steam above the
+  boiler's capacity, negative readings, NG/steam too high, ...)
+- drift: hourly NG/steam differs from its rolling baseline (an exponential
+  moving average over `baselineHours`) by more than `tolerance` for
+  `holdHours` consecutive hours
+- stuck: a non-zero reading repeated unchanged for `hours` hours, which
+  usually means a frozen meter or a copied-down formula
+
+and for the sheet as a whole:
+
+- gap: hours missing from the 0800-0700 sequence between two readings
+  (blank rows; an idle hour with every boiler at zero is still a reading)
+
+Threshold, drift and stuck alerts stay open while the condition holds and
+are closed (with an `end`) when it clears; gaps are closed events. Closed
+alerts are published for `retentionHours` after their end. The engine
+state (cursor, baselines, repeat counters, open alerts) is kept in the sync
+state under 'alerts', so each run only processes new rows.
+
+Rules default to DEFAULT_RULES; ALERT_RULES_FILE (JSON, same shape) overrides
+them section by section.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from excel_extract import BOILER_KEYS, FIRST_HOUR, METRICS, hour_label
+from timeseries_store import HOURLY, TIME_COLUMN, column_name, list_months, load_range
+
+ALERT_RULES_FILE = Path(os.getenv('ALERT_RULES_FILE', 'data/alert_rules.json'))
+
+# Without a cursor (first run, lost state) replay this much history to warm up the baselines
+WARMUP_HOURS = 168
+
+SEVERITY_ORDER = {'critical': 0, 'warning': 1, 'info': 2}
+
+DEFAULT_RULES = {
+    'thresholds': {
+        # A number applies to every boiler, a dict maps boiler -> limit
+        'steam': {'min': 0, 'max': {'b1': 18, 'b2': 18, 'b3': 16}, 'severity': 'critical'},
+        'ng': {'min': 0, 'severity': 'critical'},
+        'water': {'min': 0, 'severity': 'critical'},
+        'output': {'max': 105, 'severity': 'warning'},
+        'ngSteam': {'max': 125, 'severity': 'warning'},
+    },
+    'drift': {
+        'metric': 'ngSteam',
+        'baselineHours': 168,
+        'minSamples': 24,
+        'tolerance': 0.15,
+        'holdHours': 3,
+        'minSteam': 1.0,  # ignore hours a boiler is barely firing
+        'severity': 'warning',
+    },
+    'stuck': {'metrics': ['steam', 'ng', 'water'], 'hours': 6, 'severity': 'warning'},
+    'gaps': {'severity': 'warning'},
+    'retentionHours': 72,
+}
+
+UNITS = {'steam': 'MT', 'ng': 'SM³', 'water': 'MT', 'output': '%', 'ngSteam': 'SM³/MT'}
+LABELS = {
+    'steam': 'Steam', 'ng': 'Natural gas', 'ratio': 'Ratio', 'output': 'Output',
+    'water': 'Water', 'waterSteam': 'Water/steam', 'electricSteam': 'Electric/steam',
+    'ngSteam': 'NG/steam',
+}
+
+
+def load_rules(path=ALERT_RULES_FILE):
+    rules = json.loads(json.dumps(DEFAULT_RULES))
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    except OSError:
+        return rules
+    except ValueError as e:
+        print(f"⚠️ Ignoring {path}, not valid JSON ({e}) - using the default alert rules")
+        return rules
+    if not isinstance(overrides, dict):
+        print(f"⚠️ Ignoring {path}, expected a JSON object - using the default alert rules")
+        return rules
+    for section, value in overrides.items():
+        if isinstance(value, dict) and isinstance(rules.get(section), dict):
+            rules[section].update(value)
+        else:
+            rules[section] = value
+    return rules
+
+
+def _limit(value, boiler):
+    return value.get(boiler) if isinstance(value, dict) else value
+
+
+def _number(value):
+    return None if value is None or value != value else round(float(value), 4)
+
+
+def _to_time(text):
+    return datetime.fromisoformat(text)
+
+
+class AlertEngine:
+    """Feed hourly rows in time order with feed(); read the outcome with document()."""
+
+    def __init__(self, rules=None, state=None):
+        self.rules = rules or DEFAULT_RULES
+        self.state = state or {'cursor': None, 'boilers': {}, 'open': {}, 'closed': []}
+        self.opened = 0
+
+    @property
+    def cursor(self):
+        return self.state['cursor']
+
+    # -- alert lifecycle --
+
+    def _set(self, key, active, moment, **alert):
+        """Open, refresh or close the alert `key` depending on `active`."""
+        open_alerts = self.state['open']
+        if active:
+            current = open_alerts.get(key)
+            if current is None:
+                open_alerts[key] = {'id': f"{key}:{moment}", 'start': alert.pop('start', moment),
+                                    'last': moment, 'end': None, **alert}
+                self.opened += 1
+            else:
+                current.update(alert, last=moment)
+        elif key in open_alerts:
+            alert = open_alerts.pop(key)
+            alert['end'] = moment
+            self.state['closed'].append(alert)
+
+    def _event(self, moment, **alert):
+        self.state['closed'].append({'id': f"{alert['rule']}:{moment}", 'last': moment, 'end': moment, **alert})
+        self.opened += 1
+
+    # -- rules --
+
+    def _thresholds(self, moment, boiler, values):
+        for metric, rule in self.rules['thresholds'].items():
+            value = values.get(metric)
+            if value is None:
+                continue  # a blank cell neither raises nor clears
+            low, high = _limit(rule.get('min'), boiler), _limit(rule.get('max'), boiler)
+            if low is not None and value < low:
+                limit, side = low, 'below'
+            elif high is not None and value > high:
+                limit, side = high, 'above'
+            else:
+                limit, side = None, None
+            self._set(
+                f"threshold:{boiler}:{metric}", side is not None, moment,
+                rule='threshold', severity=rule.get('severity', 'warning'), boiler=boiler, metric=metric,
+                value=_number(value), threshold=limit,
+                message=f"{LABELS.get(metric, metric)} {_number(value)} {UNITS.get(metric, '')} "
+                        f"{side} limit {limit}".replace('  ', ' '),
+            )
+
+    def _drift(self, moment, boiler, values, boiler_state):
+        rule = self.rules['drift']
+        value = values.get(rule['metric'])
+        if value is None or (values.get('steam') or 0) < rule['minSteam']:
+            return
+        baseline = boiler_state.setdefault('baseline', {'mean': None, 'samples': 0, 'run': 0})
+        mean = baseline['mean']
+        drifting = (
+            mean is not None and baseline['samples'] >= rule['minSamples']
+            and abs(value - mean) > rule['tolerance'] * abs(mean)
+        )
+        baseline['run'] = baseline['run'] + 1 if drifting else 0
+        if mean is not None:
+            change = (value - mean) / mean * 100 if mean else 0.0
+            self._set(
+                f"drift:{boiler}:{rule['metric']}", baseline['run'] >= rule['holdHours'], moment,
+                rule='drift', severity=rule['severity'], boiler=boiler, metric=rule['metric'],
+                value=_number(value), baseline=_number(mean),
+                message=f"{LABELS.get(rule['metric'])} {value:.1f} is {change:+.0f}% off its "
+                        f"{rule['baselineHours'] // 24}-day baseline {mean:.1f}",
+            )
+
+        alpha = 2 / (rule['baselineHours'] + 1)
+        baseline['mean'] = value if mean is None else mean + alpha * (value - mean)
+        baseline['samples'] += 1
+
+    def _stuck(self, moment, boiler, values, boiler_state):
+        rule = self.rules['stuck']
+        runs = boiler_state.setdefault('stuck', {})
+        for metric in rule['metrics']:
+            value = values.get(metric)
+            run = runs.get(metric)
+            if value is not None and value != 0 and run and run['value'] == value:
+                run['count'] += 1
+            else:
+                run = runs[metric] = {'value': value, 'count': 1, 'since': moment}
+            self._set(
+                f"stuck:{boiler}:{metric}", run['count'] >= rule['hours'], moment,
+                rule='stuck', severity=rule['severity'], boiler=boiler, metric=metric,
+                value=_number(value), start=run['since'],
+                message=f"{LABELS.get(metric, metric)} stuck at {_number(value)} {UNITS.get(metric, '')} "
+                        f"for {run['count']} hours".replace('  ', ' '),
+            )
+
+    def _gap(self, moment):
+        previous = self.cursor
+        if previous is None:
+            return
+        missing = int((_to_time(moment) - _to_time(previous)).total_seconds() // 3600) - 1
+        if missing <= 0:
+            return
+        first = _to_time(previous) + timedelta(hours=1)
+        last = _to_time(moment) - timedelta(hours=1)
+        # hour_label expects the offset from the 0800 start of the report day
+        first_label = hour_label((first.hour - FIRST_HOUR) % 24)
+        last_label = hour_label((last.hour - FIRST_HOUR) % 24)
+        span = first_label if missing == 1 else f"{first_label}-{last_label}"
+        self._event(
+            moment, rule='gap', severity=self.rules['gaps']['severity'], boiler=None, metric=None,
+            value=missing, start=first.isoformat(timespec='minutes'),
+            message=f"{missing} hourly reading(s) missing ({span}, {first.date().isoformat()})",
+        )
+
+    def feed(self, moment, row):
+        """Process one hourly row: `moment` ISO minute string, row {boiler: {metric: value}}."""
+        if self.cursor is not None and moment <= self.cursor:
+            return
+        self._gap(moment)
+        for boiler in BOILER_KEYS:
+            values = {metric: value for metric, value in row.get(boiler, {}).items() if value is not None}
+            steam, ng = values.get('steam'), values.get('ng')
+            if steam and ng is not None and steam > 0:
+                values['ngSteam'] = ng / steam
+            boiler_state = self.state['boilers'].setdefault(boiler, {})
+            self._thresholds(moment, boiler, values)
+            self._drift(moment, boiler, values, boiler_state)
+            self._stuck(moment, boiler, values, boiler_state)
+        self.state['cursor'] = moment
+
+    def feed_columns(self, columns):
+        """Feed every row of a store column dict (see timeseries_store.load_range)."""
+        times = columns[TIME_COLUMN]
+        series = {(boiler, metric): columns[column_name(boiler, metric)]
+                  for boiler in BOILER_KEYS for metric in METRICS
+                  if column_name(boiler, metric) in columns}
+        for position, moment in enumerate(times):
+            row = {}
+            for (boiler, metric), values in series.items():
+                value = float(values[position])
+                row.setdefault(boiler, {})[metric] = None if np.isnan(value) else value
+            self.feed(str(moment), row)
+
+    def document(self, retention_hours=None):
+        """Compact public/boiler_alerts.json document; also prunes expired closed alerts."""
+        retention = retention_hours if retention_hours is not None else self.rules['retentionHours']
+        cutoff = None
+        if self.cursor:
+            cutoff = (_to_time(self.cursor) - timedelta(hours=retention)).isoformat(timespec='minutes')
+        self.state['closed'] = [alert for alert in self.state['closed'] if cutoff is None or alert['end'] >= cutoff]
+
+        alerts = list(self.state['open'].values()) + self.state['closed']
+        alerts.sort(key=lambda alert: alert['start'], reverse=True)
+        alerts.sort(key=lambda alert: (alert['end'] is not None, SEVERITY_ORDER.get(alert['severity'], 9)))
+        active = [alert for alert in alerts if alert['end'] is None]
+        return {
+            'generatedAt': datetime.now().isoformat(timespec='seconds'),
+            'through': self.cursor,
+            'active': len(active),
+            'critical': sum(alert['severity'] == 'critical' for alert in active),
+            'warning': sum(alert['severity'] == 'warning' for alert in active),
+            'alerts': [{key: value for key, value in alert.items() if value is not None} for alert in alerts],
+        }
+
+
+def update_alerts(state, rules=None, store_dir=None):
+    """
+    Run the engine over store rows newer than the cursor in `state['alerts']`
+    and return (document, new alert count). Updates `state` in place.
+    """
+    kwargs = {'store_dir': store_dir} if store_dir else {}
+    engine = AlertEngine(rules or load_rules(), state.get('alerts'))
+    if not list_months(**kwargs):
+        return engine.document(), 0
+
+    if engine.cursor:
+        columns = load_range(start=engine.cursor, kind=HOURLY, **kwargs)
+    else:
+        columns = load_range(kind=HOURLY, **kwargs)
+        times = columns[TIME_COLUMN]
+        if len(times):
+            keep = times > times[-1] - np.timedelta64(WARMUP_HOURS, 'h')
+            columns = {name: array[keep] for name, array in columns.items()}
+
+    engine.feed_columns(columns)
+    state['alerts'] = engine.state
+    return engine.document(), engine.opened
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Backfill the columnar store from every monthly report workbook.
+
+Workbooks come from a local directory (--local) or from the OneDrive
+Year/Month folder tree (--onedrive-folder, via Graph children listings).
+Downloads run in a small thread pool; parsing runs in a ProcessPoolExecutor
+with one workbook per worker; the parent merges each month into the store
+and rebuilds the rollup once at the end.
+
+    python .github/scripts/backfill.py --local "D:/Production latest/2026"
+    python .github/scripts/backfill.py --onedrive-folder "Production latest" --year 2026
+"""
+
+import argparse
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from download_utils import DownloadError
+from excel_extract import ExtractError, extract_workbook, month_key
+from folder_index import report_month
+from graph_client import GraphClient
+from sync_state import item_fingerprint, item_unchanged, load_state, save_state
+from timeseries_store import STORE_DIR, extract_to_columns, write_partition
+from token_cache import TokenCache, TokenError
+from workbook_validator import validate_workbook
+
+TENANT_ID = os.getenv('AZURE_TENANT_ID')
+CLIENT_ID = os.getenv('AZURE_CLIENT_ID')
+REFRESH_TOKEN = os.getenv('AZURE_REFRESH_TOKEN')
+
+BACKFILL_DIR = Path(os.getenv('BACKFILL_DIR', 'data/backfill'))
+DOWNLOAD_WORKERS = 4
+MAX_FOLDER_DEPTH = 3
+CHILD_SELECT = 'id,name,folder,file,size,eTag,cTag,lastModifiedDateTime'
+
+
+def find_local_workbooks(root, year=None):
+    """Report workbooks under a local directory, as (month, path) pairs."""
+    found = []
+    for path in Path(root).rglob('*.xlsx'):
+        month = report_month(path.name)
+        if month and not path.name.startswith('~$') and (year is None or month.startswith(str(year))):
+            found.append((month, path))
+    return sorted(found)
+
+
+def list_children(client, item_path=None, item_id=None):
+    """All children of a drive folder, following @odata.nextLink paging."""
+    if item_id:
+        url = f"me/drive/items/{item_id}/children"
+    else:
+        url = f"me/drive/root:/{item_path}:/children" if item_path else "me/drive/root/children"
+    params = {'$select': CHILD_SELECT, '$top': 200}
+
+    children = []
+    while url:
+        response = client.get(url, params=params)
+        response.raise_for_status()
+        page = response.json()
+        children.extend(page.get('value', []))
+        url = page.get('@odata.nextLink')
+        params = None  # nextLink already carries the query
+    return children
+
+
+def find_onedrive_workbooks(client, folder, year=None):
+    """Walk the Year/Month folder tree and return (month, driveItem) pairs."""
+    found = []
+    pending = [(None, 0)]
+    while pending:
+        item_id, depth = pending.pop()
+        for child in list_children(client, item_path=folder, item_id=item_id):
+            if 'folder' in child and depth < MAX_FOLDER_DEPTH:
+                # Skip other years early: year folders are named "2025", "2026", ...
+                if year and depth == 0 and child['name'].isdigit() and child['name'] != str(year):
+                    continue
+                pending.append((child['id'], depth + 1))
+            elif 'file' in child:
+                month = report_month(child['name'])
+                if month and (year is None or month.startswith(str(year))):
+                    found.append((month, child))
+    return sorted(found, key=lambda pair: pair[0])
+
+
+def download_workbooks(client, items, state):
+    """Download changed workbooks with bounded concurrency. Returns (month, path) pairs."""
+    previous = state.setdefault('backfill', {})
+    results = []
+
+    def fetch(month, item):
+        dest = BACKFILL_DIR / f"{month}.xlsx"
+        if item_unchanged(previous.get(item['id']), item, dest):
+            return month, dest, None, False
+        result = client.download_item(item['id'], dest, validate=validate_workbook)
+        return month, dest, {**item_fingerprint(item), 'name': item['name'], 'sha256': result.sha256}, True
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+        futures = {pool.submit(fetch, month, item): item for month, item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                month, dest, record, downloaded = future.result()
+            except (DownloadError, OSError) as e:
+                print(f"  ⚠️ {item['name']}: download failed ({e})")
+                continue
+            if record:
+                previous[item['id']] = record
+            print(f"  {'📥' if downloaded else '⏭️ '} {item['name']}")
+            results.append((month, dest))
+
+    save_state(state)
+    return sorted(results)
+
+
+def parse_workbook(path):
+    """Worker: extract one workbook into store columns (runs in a child process)."""
+    try:
+        extract = extract_workbook(path)
+    except (ExtractError, OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        return str(path), None, None, None, str(e)
+    hourly, daily_sum = extract_to_columns(extract)
+    return str(path), month_key(extract), hourly, daily_sum, None
+
+
+def parse_into_store(workbooks, store_dir=STORE_DIR, workers=None):
+    """Parse workbooks in a process pool and merge each month into the store."""
+    written = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(parse_workbook, path): (month, path) for month, path in workbooks}
+        for future in as_completed(futures):
+            expected_month, path = futures[future]
+            source, month, hourly, daily_sum, error = future.result()
+            if error:
+                print(f"  ⚠️ {Path(source).name}: {error}")
+                continue
+            month = month or expected_month
+            if month != expected_month:
+                print(f"  ⚠️ {Path(source).name}: sheet dates say {month}, file name says {expected_month}")
+            meta = write_partition(month, hourly, daily_sum, store_dir=store_dir, source=Path(source).name)
+            print(f"  ✅ {month}: {meta['rows']} hourly rows, {meta['days']} days")
+            written.append(month)
+    return sorted(written)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill the boiler store from monthly report workbooks')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--local', help='Directory containing monthly report workbooks')
+    source.add_argument('--onedrive-folder', help='OneDrive folder holding the Year/Month tree')
+    parser.add_argument('--year', type=int, help='Only backfill this year')
+    parser.add_argument('--workers', type=int, help='Parser processes (default: CPU count)')
+    parser.add_argument('--no-rollup', action='store_true', help='Skip rebuilding public/boiler_rollup.json')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🗂️  Historical backfill")
+    print("=" * 60)
+    started = time.perf_counter()
+
+    if args.local:
+        workbooks = find_local_workbooks(args.local, args.year)
+        print(f"🔍 Found {len(workbooks)} workbooks under {args.local}")
+    else:
+        if not (TENANT_ID and CLIENT_ID):
+            print("❌ AZURE_TENANT_ID and AZURE_CLIENT_ID are required for --onedrive-folder")
+            sys.exit(1)
+        try:
+            client = GraphClient(TokenCache(TENANT_ID, CLIENT_ID, REFRESH_TOKEN).get_access_token())
+        except TokenError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        items = find_onedrive_workbooks(client, args.onedrive_folder, args.year)
+        print(f"🔍 Found {len(items)} workbooks in OneDrive/{args.onedrive_folder}")
+        workbooks = download_workbooks(client, items, load_state())
+
+    if not workbooks:
+        print("⚠️ Nothing to backfill")
+        sys.exit(1)
+
+    print(f"\n⚙️  Parsing {len(workbooks)} workbooks...")
+    months = parse_into_store(workbooks, workers=args.workers)
+
+    if months and not args.no_rollup:
+        from publish_boiler_data import publish_rollup
+        rollup = publish_rollup()
+        print(f"\n📈 Rollup rebuilt: {len(rollup['days'])} days, {len(rollup['mismatches'])} sum-row mismatches")
+
+    print(f"\n🎉 Backfilled {len(months)} months in {time.perf_counter() - started:.1f}s")
+    print(f"⏰ Timestamp: {datetime.now().isoformat()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the sync path: download, validation, extraction and
+aggregation, on synthetic report workbooks served from a local mock server.
+
+Workbooks follow the real layout (excel_extract.py): NGSTEAM RATIO and
+WATER_STEAM RATIO sheets with one 24-hour block + sum row per day every 26
+rows from row 12, next to a summary sheet and per-boiler data sheets that
+the sync path has to skip. Values come from a seeded generator and are
+cached under --fixtures, so every run measures identical files.
+
+Each scenario is a number of monthly workbooks with a number of days filled
+in (default: 1, 15 and 31 days of one month, and a year of full months).
+Stages run in a fresh spawned process each, so the reported peak RSS
+belongs to that stage alone:
+
+    download_graph   item lookup + /content (302 to the file) via GraphClient
+    download_share   share-link URL via stream_download
+    validate         workbook_validator.validate_workbook
+    extract          full extract_workbook
+    extract_resume   incremental extract with all but the last day cached
+    aggregate        write_month into a scratch store + build_rollup over it
+
+Per stage: median and p95 latency per workbook, throughput in MB/s (and
+rows/s where rows are read), and peak RSS above the process's high-water
+mark after imports and setup.
+After one warm-up pass each stage repeats --repeat times.
+
+    python .github/scripts/benchmark_sync.py --output bench.json
+    python .github/scripts/benchmark_sync.py --compare bench.json
+
+--compare prints the change against an earlier --output file.
+"""
+
+import argparse
+import calendar
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from openpyxl import Workbook
+
+from excel_extract import (
+    BLOCK_STRIDE,
+    FIRST_DATA_ROW,
+    HOURS_PER_DAY,
+    STEAM_SHEET_COLUMNS,
+    WATER_SHEET_COLUMNS,
+    hour_label,
+)
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+FIXTURE_DIR = Path(os.getenv('BENCHMARK_FIXTURE_DIR', Path(tempfile.gettempdir()) / 'boiler-bench'))
+DEFAULT_SCENARIOS = ('1x1', '1x15', '1x31', '12x31')
+STAGES = ('download_graph', 'download_share', 'validate', 'extract', 'extract_resume', 'aggregate')
+BENCH_YEAR = 2025
+SEED = 20250101
+
+XLSX_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+BOILER_CAPACITY = (18, 18, 16)
+# Sheets the real workbook carries besides the two the sync path reads
+SUMMARY_SHEET = 'SUMMARY'
+DATA_SHEETS = ('DATA B1', 'DATA B2', 'DATA B3')
+
+
+# --- Synthetic workbooks ---------------------------------------------------
+
+def _padded(cells, width):
+    row = [None] * width
+    for column, value in cells.items():
+        row[column - 1] = value
+    return row
+
+
+def generate_workbook(path, year, month, days, seed=SEED):
+    """Write a report workbook for `month` with `days` complete day blocks."""
+    rng = random.Random(f"{seed}-{year}-{month}-{days}")
+    wb = Workbook(write_only=True)
+    wb.create_sheet(SUMMARY_SHEET).append([f"REPORT DAILY BULAN {year} - {month:02d}"])
+    steam_ws = wb.create_sheet('NGSTEAM RATIO')
+    water_ws = wb.create_sheet('WATER_STEAM RATIO')
+    data_sheets = [wb.create_sheet(name) for name in DATA_SHEETS]
+
+    steam_width = max(max(columns) for columns in STEAM_SHEET_COLUMNS.values())
+    water_width = max(max(columns) for columns in WATER_SHEET_COLUMNS.values())
+    for ws, title in ((steam_ws, 'NG / STEAM RATIO'), (water_ws, 'WATER / STEAM RATIO')):
+        ws.append([title])
+        for _ in range(2, FIRST_DATA_ROW):
+            ws.append([])
+
+    load = [rng.uniform(0.4, 0.8) for _ in BOILER_CAPACITY]
+    for day in range(1, days + 1):
+        day_date = date(year, month, day)
+        totals_steam, totals_water = {}, {}
+        for hour in range(HOURS_PER_DAY):
+            steam_cells = {2: hour_label(hour)}
+            water_cells = {2: hour_label(hour)}
+            if hour == 0:
+                steam_cells[1] = water_cells[1] = datetime.combine(day_date, datetime.min.time())
+            for boiler, capacity in enumerate(BOILER_CAPACITY):
+                load[boiler] = min(0.95, max(0.2, load[boiler] + rng.gauss(0, 0.03)))
+                steam = round(capacity * load[boiler], 2)
+                ng = round(steam * rng.uniform(72, 78), 1)
+                values = {
+                    STEAM_SHEET_COLUMNS['steam'][boiler]: steam,
+                    STEAM_SHEET_COLUMNS['ng'][boiler]: ng,
+                    STEAM_SHEET_COLUMNS['ratio'][boiler]: round(ng / steam, 3),
+                    STEAM_SHEET_COLUMNS['output'][boiler]: round(steam / capacity * 100, 1),
+                }
+                water = round(steam * rng.uniform(1.02, 1.08), 2)
+                water_values = {
+                    WATER_SHEET_COLUMNS['water'][boiler]: water,
+                    WATER_SHEET_COLUMNS['waterSteam'][boiler]: round(water / steam, 3),
+                    WATER_SHEET_COLUMNS['electricSteam'][boiler]: round(rng.uniform(0.4, 0.6), 3),
+                }
+                for column, value in values.items():
+                    totals_steam[column] = totals_steam.get(column, 0) + value
+                for column, value in water_values.items():
+                    totals_water[column] = totals_water.get(column, 0) + value
+                steam_cells.update(values)
+                water_cells.update(water_values)
+                data_sheets[boiler].append([day_date.isoformat(), hour_label(hour), steam, ng, water])
+            steam_ws.append(_padded(steam_cells, steam_width))
+            water_ws.append(_padded(water_cells, water_width))
+
+        steam_ws.append(_padded({column: round(total, 3) for column, total in totals_steam.items()}, steam_width))
+        water_ws.append(_padded({column: round(total, 3) for column, total in totals_water.items()}, water_width))
+        for _ in range(BLOCK_STRIDE - HOURS_PER_DAY - 1):
+            steam_ws.append([])
+            water_ws.append([])
+
+    wb.save(path)
+
+
+def parse_scenario(text):
+    """'12x31' -> (12 months, 31 days)."""
+    months, _, days = text.partition('x')
+    months, days = int(months), int(days or 31)
+    if not 1 <= months <= 12 or not 1 <= days <= 31:
+        raise argparse.ArgumentTypeError(f"scenario {text!r}: months 1-12, days 1-31")
+    return months, days
+
+
+def scenario_workbooks(months, days, fixture_dir=FIXTURE_DIR, seed=SEED):
+    """Generate (or reuse) the workbooks of a scenario. Returns their paths."""
+    fixture_dir = Path(fixture_dir)
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for month in range(1, months + 1):
+        filled = min(days, calendar.monthrange(BENCH_YEAR, month)[1])
+        path = fixture_dir / f"REPORT DAILY BULAN {BENCH_YEAR} - {month:02d} d{filled} s{seed}.xlsx"
+        if not path.exists():
+            tmp_path = path.with_name(path.name + '.tmp')
+            generate_workbook(tmp_path, BENCH_YEAR, month, filled, seed)
+            os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+# --- Mock Graph / share-link server ---------------------------------------
+
+def make_handler(files, latency):
+    """
+    Routes:
+      GET /v1.0/me/drive/root:/<name>      driveItem JSON
+      GET /v1.0/me/drive/items/<id>/content  302 to /files/<name>, like Graph
+      GET /share/<name>?download=1          the file (share link)
+      GET /files/<name>                     the file
+    """
+    by_id = {f"ITEM{index}": path for index, path in enumerate(files.values())}
+    ids = {path.name: item_id for item_id, path in by_id.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms per request
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_file(self, path):
+            stat = path.stat()
+            self.send_response(200)
+            self.send_header('Content-Type', XLSX_TYPE)
+            self.send_header('Content-Length', str(stat.st_size))
+            self.send_header('Last-Modified', self.date_time_string(stat.st_mtime))
+            self.end_headers()
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile)
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            route = unquote(urlparse(self.path).path)
+            if route.startswith('/v1.0/me/drive/root:/'):
+                path = files.get(route.split(':/', 1)[1])
+                if path is None:
+                    return self.send_json(404, {'error': {'code': 'itemNotFound'}})
+                stat = path.stat()
+                return self.send_json(200, {
+                    'id': ids[path.name],
+                    'name': path.name,
+                    'size': stat.st_size,
+                    'eTag': f'"{ids[path.name]},{int(stat.st_mtime)}"',
+                    'cTag': f'"c:{ids[path.name]},{int(stat.st_mtime)}"',
+                    'lastModifiedDateTime': datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+                                                    .strftime('%Y-%m-%dT%H:%M:%SZ'),
+                })
+            if route.startswith('/v1.0/me/drive/items/') and route.endswith('/content'):
+                path = by_id.get(route.split('/')[5])
+                if path is None:
+                    return self.send_json(404, {'error': {'code': 'itemNotFound'}})
+                self.send_response(302)
+                self.send_header('Location', f"/files/{path.name}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return None
+            for prefix in ('/share/', '/files/'):
+                if route.startswith(prefix) and route[len(prefix):] in files:
+                    return self.send_file(files[route[len(prefix):]])
+            return self.send_json(404, {'error': {'code': 'notFound'}})
+
+    return Handler
+
+
+def start_server(paths, latency=0.0):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler({path.name: path for path in paths}, latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+# --- Stages (each runs in its own spawned process) --------------------------
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _no_validation(path, content_type):
+    pass
+
+
+def _hour_rows(extract):
+    return sum(len(day['hours']) for day in extract['days'])
+
+
+def _trim_last_day(extract):
+    """The extract as it looked one day earlier, for the incremental path."""
+    days = [dict(day) for day in extract['days'][:-1]]
+    if days:
+        days[-1]['complete'] = True
+    return {**extract, 'days': days}
+
+
+def run_stage(stage, paths, base_url, work_dir, repeat):
+    """Time `stage` over every workbook. Returns samples and peak RSS for this process."""
+    from download_utils import stream_download
+    from excel_extract import extract_workbook
+    from graph_client import GraphClient, RetryingSession
+    from timeseries_store import DAILY_SUM, HOURLY, load_range, store_version, write_month
+    from aggregate import build_rollup
+    from workbook_validator import validate_workbook
+
+    work_dir = Path(work_dir)
+    paths = [Path(path) for path in paths]
+    session = RetryingSession(max_retries=0)
+    client = GraphClient('benchmark-token', session=session, base_url=f"{base_url}/v1.0")
+
+    # Later stages reuse the extract stage's output; extracting here would inflate their RSS
+    extracts_file = work_dir / 'extracts.json'
+    extracts = None
+    if stage in ('extract_resume', 'aggregate'):
+        if extracts_file.exists():
+            with open(extracts_file, 'r', encoding='utf-8') as f:
+                extracts = json.load(f)
+        else:
+            extracts = [extract_workbook(path) for path in paths]  # untimed setup
+    baseline = peak_rss_mb()
+
+    def one_pass(index, path):
+        """Returns (bytes, rows) handled for one workbook."""
+        dest = work_dir / f"{stage}-{index}.xlsx"
+        if stage == 'download_graph':
+            item = client.item_by_path(path.name).json()
+            result = client.download_item(item['id'], dest, validate=_no_validation)
+            return result.size, 0
+        if stage == 'download_share':
+            result = stream_download(f"{base_url}/share/{path.name}?download=1", dest,
+                                     session=session, validate=_no_validation)
+            return result.size, 0
+        if stage == 'validate':
+            validate_workbook(path)
+            return path.stat().st_size, 0
+        if stage == 'extract':
+            return path.stat().st_size, _hour_rows(extract_workbook(path))
+        if stage == 'extract_resume':
+            extract = extract_workbook(path, previous=_trim_last_day(extracts[index]))
+            return path.stat().st_size, sum(len(day['hours']) for day in extract['days'][-1:])
+        raise ValueError(stage)
+
+    def aggregate_pass():
+        store_dir = work_dir / 'store'
+        shutil.rmtree(store_dir, ignore_errors=True)
+        for path, extract in zip(paths, extracts):
+            write_month(extract, store_dir=store_dir, source=path.name)
+        hourly = load_range(kind=HOURLY, store_dir=store_dir)
+        daily_sum = load_range(kind=DAILY_SUM, store_dir=store_dir)
+        build_rollup(hourly, daily_sum, version=store_version(store_dir))
+        return sum(path.stat().st_size for path in paths), sum(_hour_rows(extract) for extract in extracts)
+
+    samples = []
+    for iteration in range(repeat + 1):  # first pass warms caches and is discarded
+        if stage == 'aggregate':
+            begin = time.perf_counter()
+            size, rows = aggregate_pass()
+            elapsed = time.perf_counter() - begin
+            if iteration:
+                # One sample for the whole scenario, reported per workbook
+                samples.append((elapsed / len(paths), size / len(paths), rows / len(paths)))
+            continue
+        for index, path in enumerate(paths):
+            begin = time.perf_counter()
+            size, rows = one_pass(index, path)
+            elapsed = time.perf_counter() - begin
+            if iteration:
+                samples.append((elapsed, size, rows))
+
+    peak = peak_rss_mb()
+    if stage == 'extract':
+        with open(extracts_file, 'w', encoding='utf-8') as f:
+            json.dump([extract_workbook(path) for path in paths], f)
+    return {'samples': samples, 'rssBaselineMb': baseline, 'rssPeakMb': peak}
+
+
+def summarize(samples):
+    latencies = sorted(sample[0] for sample in samples)
+    total_time = sum(latencies)
+    total_bytes = sum(sample[1] for sample in samples)
+    total_rows = sum(sample[2] for sample in samples)
+    p95 = latencies[min(len(latencies) - 1, max(0, round(0.95 * len(latencies)) - 1))]
+    return {
+        'samples': len(latencies),
+        'medianMs': round(statistics.median(latencies) * 1000, 2),
+        'p95Ms': round(p95 * 1000, 2),
+        'mbPerSec': round(total_bytes / total_time / 1e6, 2) if total_time else None,
+        'rowsPerSec': round(total_rows / total_time) if total_time and total_rows else None,
+    }
+
+
+def benchmark(scenarios, stages=STAGES, repeat=5, latency=0.0, fixture_dir=FIXTURE_DIR):
+    """Run every stage of every scenario. Returns the results document."""
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for months, days in scenarios:
+        paths = scenario_workbooks(months, days, fixture_dir)
+        size = sum(path.stat().st_size for path in paths)
+        print(f"▶ {months} month(s) x {days} day(s): {len(paths)} workbook(s), {size / 1e6:.2f} MB")
+        server, base_url = start_server(paths, latency)
+        try:
+            with tempfile.TemporaryDirectory(prefix='boiler-bench-') as work_dir:
+                for stage in stages:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        run = pool.submit(run_stage, stage, [str(path) for path in paths],
+                                          base_url, work_dir, repeat).result()
+                    stats = summarize(run['samples'])
+                    if run['rssPeakMb'] is not None:
+                        stats['peakRssMb'] = round(run['rssPeakMb'] - run['rssBaselineMb'], 1)
+                    results.append({'scenario': f"{months}x{days}", 'stage': stage, **stats})
+                    print(f"  {stage:<15} median {stats['medianMs']:>8.2f} ms  p95 {stats['p95Ms']:>8.2f} ms  "
+                          f"{stats['mbPerSec'] or 0:>7.2f} MB/s"
+                          + (f"  {stats['rowsPerSec']:>8} rows/s" if stats['rowsPerSec'] else '')
+                          + (f"  +{stats['peakRssMb']} MB RSS" if 'peakRssMb' in stats else ''))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    return {
+        'createdAt': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'latencyMs': round(latency * 1000),
+        'seed': SEED,
+        'results': results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    """Print median latency / throughput / RSS change per stage against an earlier run."""
+    before = {(row['scenario'], row['stage']): row for row in previous['results']}
+    print(f"\nΔ vs {previous.get('commit') or previous.get('createdAt')} (negative latency = faster)")
+    for row in current['results']:
+        old = before.get((row['scenario'], row['stage']))
+        if not old:
+            continue
+        change = (row['medianMs'] - old['medianMs']) / old['medianMs'] * 100 if old['medianMs'] else 0.0
+        line = f"  {row['scenario']:<6} {row['stage']:<15} median {old['medianMs']:.2f} -> {row['medianMs']:.2f} ms ({change:+.1f}%)"
+        if row.get('peakRssMb') is not None and old.get('peakRssMb') is not None:
+            line += f"  RSS {old['peakRssMb']} -> {row['peakRssMb']} MB"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark download, validation, extraction and aggregation.')
+    parser.add_argument('--scenario', action='append', type=parse_scenario,
+                        help='MONTHSxDAYS, e.g. 1x31 or 12x31 (repeatable; default 1x1 1x15 1x31 12x31)')
+    parser.add_argument('--stage', action='append', choices=STAGES, help='only these stages (repeatable)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed passes per stage after one warm-up')
+    parser.add_argument('--latency-ms', type=float, default=0, help='added mock server latency per request')
+    parser.add_argument('--fixtures', type=Path, default=FIXTURE_DIR, help='where generated workbooks are cached')
+    parser.add_argument('--output', type=Path, help='write results as JSON')
+    parser.add_argument('--compare', type=Path, help='earlier --output file to compare against')
+    args = parser.parse_args()
+
+    scenarios = args.scenario or [parse_scenario(text) for text in DEFAULT_SCENARIOS]
+    document = benchmark(scenarios, args.stage or STAGES, args.repeat, args.latency_ms / 1000, args.fixtures)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(document, json.load(f))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Compact binary snapshot of the current month's hourly readings.
+
+public/boiler_hourly.bin holds the same rows as the month's day shards, as
+columns instead of one JSON object per boiler per hour. All integers are
+little-endian:
+
+    offset  size  field
+    0       4     magic b'BLRS'
+    4       1     format version (1)
+    5       1     flags (0)
+    6       2     column count C
+    8       4     row count N
+    12      4     first row time, minutes since 1970-01-01T00:00 (plant local time)
+    16      2     metadata length M
+    18      M     UTF-8 JSON: {"month", "version", "columns": [C names]}
+    ..            zero padding to a multiple of 4
+    ..      2N    time deltas, uint16 minutes since the previous row (first is 0)
+    ..            zero padding to a multiple of 4
+    ..      4CN   values, float32, column after column (NaN = missing)
+
+The float block is 4-byte aligned, so a browser can wrap it in a
+Float32Array without copying. With delta-coded times (almost all 60) and
+float32 values it is several times smaller than the JSON before compression
+and decodes without a parse step; .gz/.br siblings are written next to it
+(precompress.py).
+
+`python binary_snapshot.py` prints the size and decode-time comparison with
+the equivalent JSON for a stored month.
+"""
+
+import argparse
+import json
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+from day_shards import build_day_documents, encode_document
+from precompress import compress_bytes, write_siblings
+from timeseries_store import (
+    COLUMNS,
+    DAILY_SUM,
+    HOURLY,
+    TIME_COLUMN,
+    list_months,
+    load_month,
+    read_meta,
+)
+
+SNAPSHOT_NAME = 'boiler_hourly.bin'
+MAGIC = b'BLRS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBHIIH')
+MAX_DELTA = 0xFFFF
+
+# Plant-floor link used for the transfer-time estimate, in kbit/s
+DEFAULT_LINK_KBPS = 256
+
+
+class SnapshotError(Exception):
+    """Bytes are not a snapshot this reader understands."""
+
+
+def _pad(length):
+    return b'\0' * (-length % 4)
+
+
+def encode_snapshot(columns, meta=None):
+    """Encode a store column dict ({'time': datetime64[m], '<boiler>_<metric>': float}) as bytes."""
+    times = np.asarray(columns[TIME_COLUMN], dtype='datetime64[m]').astype(np.int64)
+    names = [name for name in columns if name != TIME_COLUMN]
+    deltas = np.diff(times, prepend=times[:1]) if len(times) else times
+    if len(deltas) and (deltas.min() < 0 or deltas.max() > MAX_DELTA):
+        raise SnapshotError("Rows must be time-ordered with gaps under 45 days")
+
+    meta_bytes = json.dumps({**(meta or {}), 'columns': names}, separators=(',', ':')).encode('utf-8')
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(names), len(times),
+                         int(times[0]) if len(times) else 0, len(meta_bytes)), meta_bytes]
+    parts.append(_pad(HEADER.size + len(meta_bytes)))
+    delta_bytes = deltas.astype('<u2').tobytes()
+    parts.append(delta_bytes)
+    parts.append(_pad(len(delta_bytes)))
+    parts.extend(np.asarray(columns[name], dtype='<f4').tobytes() for name in names)
+    return b''.join(parts)
+
+
+def decode_snapshot(body):
+    """Inverse of encode_snapshot: returns (columns, meta); value arrays are float32 views of `body`."""
+    if len(body) < HEADER.size:
+        raise SnapshotError("Truncated snapshot header")
+    magic, version, _flags, column_count, row_count, base, meta_length = HEADER.unpack_from(body)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise SnapshotError(f"Not a version {FORMAT_VERSION} boiler snapshot")
+
+    offset = HEADER.size
+    meta = json.loads(body[offset:offset + meta_length].decode('utf-8'))
+    offset += meta_length
+    offset += -offset % 4
+    deltas = np.frombuffer(body, dtype='<u2', count=row_count, offset=offset)
+    offset += 2 * row_count
+    offset += -offset % 4
+    if len(body) < offset + 4 * column_count * row_count:
+        raise SnapshotError("Truncated snapshot values")
+
+    columns = {TIME_COLUMN: (base + np.cumsum(deltas, dtype=np.int64)).astype('datetime64[m]')}
+    for index, name in enumerate(meta['columns']):
+        columns[name] = np.frombuffer(body, dtype='<f4', count=row_count, offset=offset + 4 * index * row_count)
+    return columns, meta
+
+
+def latest_month(store_dir=None):
+    kwargs = {'store_dir': store_dir} if store_dir else {}
+    months = list_months(**kwargs)
+    return months[-1] if months else None
+
+
+def publish_snapshot(public_dir, month=None, store_dir=None):
+    """Write public/boiler_hourly.bin (+ siblings) for `month` (default: latest). Returns its size."""
+    kwargs = {'store_dir': store_dir} if store_dir else {}
+    month = month or latest_month(store_dir)
+    if month is None:
+        return 0
+    columns = load_month(month, COLUMNS, kind=HOURLY, mmap=False, **kwargs)
+    body = encode_snapshot(columns, {'month': month, 'version': read_meta(month, **kwargs)['version']})
+
+    path = Path(public_dir) / SNAPSHOT_NAME
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    tmp_path.replace(path)
+    write_siblings(path, body)
+    return len(body)
+
+
+def _timed(function, repeat):
+    """Best-of-`repeat` wall time in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - begin)
+    return best * 1000
+
+
+def compare_formats(month, store_dir=None, repeat=20):
+    """
+    Sizes (raw/.gz/.br) and decode times of the month as JSON (the per-day
+    documents, pretty and compact) and as a binary snapshot.
+    """
+    kwargs = {'store_dir': store_dir} if store_dir else {}
+    hourly = load_month(month, COLUMNS, kind=HOURLY, mmap=False, **kwargs)
+    daily_sum = load_month(month, COLUMNS, kind=DAILY_SUM, mmap=False, **kwargs)
+    hours = [hour for _, document in sorted(build_day_documents(hourly, daily_sum).items())
+             for hour in document['hours']]
+
+    pretty = json.dumps(hours, indent=2).encode('utf-8')
+    compact = encode_document(hours)
+    binary = encode_snapshot(hourly, {'month': month})
+
+    rows = []
+    for name, body, decode in (
+        ('json (indented)', pretty, lambda: json.loads(pretty)),
+        ('json (compact)', compact, lambda: json.loads(compact)),
+        ('binary', binary, lambda: decode_snapshot(binary)),
+    ):
+        rows.append({
+            'format': name,
+            'bytes': len(body),
+            **{suffix: len(data) for suffix, data in compress_bytes(body).items()},
+            'decodeMs': round(_timed(decode, repeat), 3),
+        })
+    return {'month': month, 'rows': len(hours), 'formats': rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the binary snapshot with the JSON payload.')
+    parser.add_argument('--month', help='store month, e.g. 2026-01 (default: latest)')
+    parser.add_argument('--store', type=Path, help='store directory (default: data/store)')
+    parser.add_argument('--link-kbps', type=float, default=DEFAULT_LINK_KBPS,
+                        help='link speed for the transfer-time estimate')
+    args = parser.parse_args()
+
+    month = args.month or latest_month(args.store)
+    if month is None:
+        print('❌ No months in the store yet')
+        return
+    result = compare_formats(month, args.store)
+
+    print(f"📦 {result['month']}: {result['rows']} hourly rows")
+    print(f"   {'format':<16} {'raw':>10} {'.gz':>10} {'.br':>10} {'decode':>10} {'transfer':>10}")
+    for row in result['formats']:
+        smallest = min(row.get('.br', row['.gz']), row['.gz'])
+        transfer = smallest * 8 / (args.link_kbps * 1000)
+        brotli_size = f"{row['.br']:,}" if '.br' in row else '-'
+        print(f"   {row['format']:<16} {row['bytes']:>10,} {row['.gz']:>10,} "
+              f"{brotli_size:>10} {row['decodeMs']:>8.2f}ms {transfer:>9.2f}s")
+    print(f"   transfer = smallest compressed size at {args.link_kbps:g} kbit/s")
+
+
+if __name__ == '__main__':
+    main()
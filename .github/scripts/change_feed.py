@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Row-level change sets between syncs, and the feed that pushes them.
+
+Before a sync overwrites a month in the store, the old partition is loaded
+and compared with the new one (diff_partitions). The result lists only
+
+    added      hourly rows that did not exist before (full values)
+    corrected  existing hourly rows whose values changed (changed metrics only)
+    removed    timestamps of rows that disappeared
+    sums       sheet sum rows that are new or changed (changed metrics only)
+
+Rows use the day-shard shape ({'timestamp', 'time', 'b1': {...}, ...}), so
+a dashboard can patch what it already holds. Each non-empty change set is
+appended to CHANGE_FEED_FILE (JSON lines) with the next sequence number;
+the last CHANGE_FEED_LIMIT entries are kept. A change set touching more
+than MAX_CHANGE_ROWS rows (a new store, a re-extracted month) is recorded
+as a `reset` instead, telling clients to reload.
+
+ChangeFeed tails that file and fans new entries out to Server-Sent Events
+subscribers (read_api.py serves it as GET /changes). A client resumes with
+Last-Event-ID (EventSource sends it on reconnect) or ?since=<seq> and gets
+every retained entry after it; one too old to resume from gets a `reset`.
+"""
+
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from excel_extract import BOILER_KEYS, METRICS
+from timeseries_store import DAILY_SUM, HOURLY, STORE_DIR, TIME_COLUMN, column_name, list_months, load_month
+
+CHANGE_FEED_FILE = Path(os.getenv('CHANGE_FEED_FILE', 'data/change_feed.jsonl'))
+CHANGE_FEED_LIMIT = int(os.getenv('CHANGE_FEED_LIMIT', '1000'))
+
+# Bigger change sets are sent as a reset (reload) rather than row by row
+MAX_CHANGE_ROWS = 240
+
+CHANGE_POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 15.0
+RETRY_MS = 5000
+
+# A subscriber this many events behind is dropped (it reconnects and resumes)
+SUBSCRIBER_BACKLOG = 256
+
+
+def _value(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _differs(old, new):
+    """Element-wise inequality where NaN equals NaN."""
+    return ~((old == new) | (np.isnan(old) & np.isnan(new)))
+
+
+def _row(columns, position, changed=None):
+    """{'b1': {metric: value}, ...} for one row, limited to `changed` columns if given."""
+    values = {}
+    for boiler in BOILER_KEYS:
+        metrics = {
+            metric: _value(columns[column_name(boiler, metric)][position])
+            for metric in METRICS
+            if changed is None or column_name(boiler, metric) in changed
+        }
+        if metrics:
+            values[boiler] = metrics
+    return values
+
+
+def diff_columns(old, new):
+    """
+    Compare two column dicts of one kind (hourly or daily_sum).
+    Returns (added positions in new, [(new position, changed columns)], removed times).
+    """
+    old_times, new_times = old[TIME_COLUMN], new[TIME_COLUMN]
+    _, old_common, new_common = np.intersect1d(old_times, new_times, assume_unique=True, return_indices=True)
+    added = np.flatnonzero(~np.isin(new_times, old_times))
+    removed = old_times[~np.isin(old_times, new_times)]
+
+    names = [name for name in new if name != TIME_COLUMN and name in old]
+    changed = np.zeros((len(names), len(new_common)), dtype=bool)
+    for index, name in enumerate(names):
+        changed[index] = _differs(np.asarray(old[name])[old_common], np.asarray(new[name])[new_common])
+    corrected = [
+        (int(new_common[position]), {names[index] for index in np.flatnonzero(changed[:, position])})
+        for position in np.flatnonzero(changed.any(axis=0))
+    ]
+    corrected.sort()
+    return added, corrected, removed
+
+
+def diff_partitions(old, new):
+    """
+    Change set between two (hourly, daily_sum) pairs of one month; `old` may
+    be None for a month not stored before. Returns None when nothing changed.
+    """
+    new_hourly, new_sums = new
+    if old is None:
+        old = tuple({name: array[:0] for name, array in columns.items()} for columns in new)
+    old_hourly, old_sums = old
+
+    added, corrected, removed = diff_columns(old_hourly, new_hourly)
+    sums_added, sums_corrected, _ = diff_columns(old_sums, new_sums)
+    times, sum_times = new_hourly[TIME_COLUMN], new_sums[TIME_COLUMN]
+
+    def hour(position, changed=None):
+        timestamp = str(times[position])
+        return {'timestamp': timestamp, 'time': timestamp[11:16].replace(':', ''),
+                **_row(new_hourly, position, changed)}
+
+    change = {
+        'added': [hour(position) for position in added],
+        'corrected': [hour(position, changed) for position, changed in corrected],
+        'removed': [str(moment) for moment in removed],
+        'sums': sorted(
+            [{'date': str(sum_times[position]), **_row(new_sums, position)} for position in sums_added]
+            + [{'date': str(sum_times[position]), **_row(new_sums, position, changed)}
+               for position, changed in sums_corrected],
+            key=lambda row: row['date'],
+        ),
+    }
+    if not any(change.values()):
+        return None
+    return change
+
+
+def load_partition(month, store_dir=STORE_DIR):
+    """(hourly, daily_sum) of a stored month as in-memory arrays, or None."""
+    if month is None or month not in list_months(store_dir):
+        return None
+    return tuple(load_month(month, kind=kind, store_dir=store_dir, mmap=False) for kind in (HOURLY, DAILY_SUM))
+
+
+def read_changes(path=CHANGE_FEED_FILE):
+    entries = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # torn line from an interrupted write
+    except OSError:
+        pass
+    return entries
+
+
+def append_change(change, month, version, path=CHANGE_FEED_FILE, limit=CHANGE_FEED_LIMIT):
+    """Give `change` the next sequence number and add it to the feed file. Returns the entry."""
+    path = Path(path)
+    entries = read_changes(path)
+    entry = {
+        'seq': entries[-1]['seq'] + 1 if entries else 1,
+        'at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'month': month,
+        'version': version,
+    }
+    rows = sum(len(rows) for rows in change.values())
+    if rows > MAX_CHANGE_ROWS:
+        entry.update(reset=True, rows=rows)
+    else:
+        entry.update(change)
+    entries = (entries + [entry])[-limit:]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for item in entries:
+            f.write(json.dumps(item, separators=(',', ':')) + '\n')
+    os.replace(tmp_path, path)
+    return entry
+
+
+def record_changes(month, previous, version, store_dir=STORE_DIR, path=CHANGE_FEED_FILE):
+    """Diff the freshly written `month` against `previous` (load_partition before the write)."""
+    change = diff_partitions(previous, load_partition(month, store_dir))
+    if change is None:
+        return None
+    return append_change(change, month, version, path)
+
+
+def encode_event(entry):
+    """SSE frame for a feed entry; resets are their own event type."""
+    data = json.dumps(entry, separators=(',', ':'))
+    kind = 'reset' if entry.get('reset') else 'change'
+    return f"id: {entry['seq']}\nevent: {kind}\ndata: {data}\n\n".encode('utf-8')
+
+
+class Subscriber:
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        self.dropped = False
+
+
+class ChangeFeed:
+    """Tails the feed file and broadcasts new entries to subscribers."""
+
+    def __init__(self, path=CHANGE_FEED_FILE, poll_interval=CHANGE_POLL_INTERVAL):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._events = []  # (seq, encoded frame), oldest first
+        self._signature = None
+        self._subscribers = set()
+        self._stop = threading.Event()
+        self.refresh()
+
+    @property
+    def latest(self):
+        return self._events[-1][0] if self._events else 0
+
+    def refresh(self):
+        """Re-read the file if it changed and push entries newer than the last one seen."""
+        try:
+            stat = self.path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        if signature == self._signature:
+            return
+        self._signature = signature
+        entries = read_changes(self.path)
+
+        with self._lock:
+            latest = self.latest
+            self._events = [(entry['seq'], encode_event(entry)) for entry in entries]
+            newest = entries[-1]['seq'] if entries else 0
+            if newest < latest:
+                # Feed file was removed or replaced with an older history: everyone reloads
+                fresh = [self._reset_frame(newest)]
+            else:
+                fresh = [frame for seq, frame in self._events if seq > latest]
+            for subscriber in list(self._subscribers):
+                for frame in fresh:
+                    try:
+                        subscriber.queue.put_nowait(frame)
+                    except queue.Full:
+                        subscriber.dropped = True
+                        self._subscribers.discard(subscriber)
+                        break
+
+    @staticmethod
+    def _reset_frame(seq):
+        return encode_event({'seq': seq, 'reset': True})
+
+    def subscribe(self, last_id=None):
+        """
+        Register a subscriber. Returns (subscriber, backlog frames): entries
+        after `last_id`, or a reset when it is outside the retained window.
+        """
+        subscriber = Subscriber()
+        with self._lock:
+            backlog = []
+            if last_id is not None:
+                oldest = self._events[0][0] if self._events else self.latest + 1
+                if last_id > self.latest or last_id < oldest - 1:
+                    backlog = [self._reset_frame(self.latest)]
+                else:
+                    backlog = [frame for seq, frame in self._events if seq > last_id]
+            self._subscribers.add(subscriber)
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def start(self):
+        threading.Thread(target=self._run, name='change-feed', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stream(self, write, last_id=None, heartbeat=HEARTBEAT_INTERVAL):
+        """
+        Write SSE frames with `write` until it raises (client gone) or the
+        subscriber falls too far behind. Comments keep idle proxies open.
+        """
+        subscriber, backlog = self.subscribe(last_id)
+        try:
+            write(f"retry: {RETRY_MS}\n: latest {self.latest}\n\n".encode('utf-8'))
+            for frame in backlog:
+                write(frame)
+            while not subscriber.dropped:
+                try:
+                    write(subscriber.queue.get(timeout=heartbeat))
+                except queue.Empty:
+                    write(b': keepalive\n\n')
+        except OSError:
+            pass
+        finally:
+            self.unsubscribe(subscriber)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Immutable per-day JSON shards for the dashboard, built from the columnar store.
+
+    public/data/days/2026-01-05.3f9a1c0b7e2d.json   one report day (0800-0700)
+    public/data/manifest.json                      list of current shards
+
+A shard's file name carries the hash of its content, so a day that did not
+change keeps the same URL and can be cached forever by the browser and the
+Pages CDN; a sync only changes the manifest and the current day's shard.
+Shards no longer listed are removed one publish later, so a client holding
+the previous manifest can still fetch what it lists. Shards and the manifest
+carry .gz/.br siblings (precompress.py) that go with them.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from aggregate import report_days
+from excel_extract import BOILER_KEYS, HOURS_PER_DAY, METRICS
+from precompress import missing_siblings, remove_siblings, write_siblings
+from timeseries_store import DAILY_SUM, HOURLY, TIME_COLUMN, column_name, load_range, store_version
+
+SHARD_DIR_NAME = 'data/days'
+MANIFEST_NAME = 'data/manifest.json'
+HASH_LENGTH = 12
+
+
+def _value(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _boiler_values(columns, position):
+    return {
+        boiler: {metric: _value(columns[column_name(boiler, metric)][position]) for metric in METRICS}
+        for boiler in BOILER_KEYS
+    }
+
+
+def build_day_documents(hourly, daily_sum):
+    """One document per report day: its hourly readings plus the sheet's sum row."""
+    times = hourly[TIME_COLUMN]
+    day_of_row = report_days(times)
+    sum_days = daily_sum[TIME_COLUMN].astype('datetime64[D]')
+
+    # load_range returns rows sorted by time, so each day is one contiguous run
+    days, starts, counts = np.unique(day_of_row, return_index=True, return_counts=True)
+
+    documents = {}
+    for day, start, count in zip(days, starts, counts):
+        rows = range(start, start + count)
+        sum_rows = np.flatnonzero(sum_days == day)
+        documents[str(day)] = {
+            'date': str(day),
+            'complete': len(rows) == HOURS_PER_DAY,
+            'hours': [
+                {
+                    'timestamp': str(times[position]),
+                    'time': str(times[position])[11:16].replace(':', ''),
+                    **_boiler_values(hourly, position),
+                }
+                for position in rows
+            ],
+            'sum': _boiler_values(daily_sum, sum_rows[-1]) if len(sum_rows) else None,
+        }
+    return documents
+
+
+def encode_document(document):
+    """Canonical bytes so identical content always hashes the same."""
+    return json.dumps(document, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def shard_name(date, body):
+    return f"{date}.{hashlib.sha256(body).hexdigest()[:HASH_LENGTH]}.json"
+
+
+def _read_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def publish_day_shards(public_dir, hourly=None, daily_sum=None):
+    """
+    Write missing shards, the manifest, and prune stale shards.
+    Returns (manifest, written, removed).
+    """
+    public_dir = Path(public_dir)
+    shard_dir = public_dir / SHARD_DIR_NAME
+    manifest_path = public_dir / MANIFEST_NAME
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    hourly = hourly if hourly is not None else load_range(kind=HOURLY)
+    daily_sum = daily_sum if daily_sum is not None else load_range(kind=DAILY_SUM)
+    documents = build_day_documents(hourly, daily_sum)
+
+    entries = []
+    written = 0
+    for date, document in sorted(documents.items()):
+        body = encode_document(document)
+        name = shard_name(date, body)
+        path = shard_dir / name
+        if not path.exists():
+            tmp_path = path.with_name(name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+            written += 1
+        if missing_siblings(path, len(body)):
+            write_siblings(path, body)
+        entries.append({
+            'date': date,
+            'file': f"{SHARD_DIR_NAME}/{name}",
+            'hours': len(document['hours']),
+            'complete': document['complete'],
+            'bytes': len(body),
+        })
+
+    previous = _read_manifest(manifest_path)
+    manifest = {
+        'generatedAt': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'version': store_version(),
+        'latest': entries[-1]['date'] if entries else None,
+        'days': entries,
+    }
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+    write_siblings(manifest_path)
+
+    # Keep what the previous manifest listed for one more publish
+    keep = {Path(entry['file']).name for entry in entries + previous.get('days', [])}
+    removed = 0
+    for path in shard_dir.glob('*.json'):
+        if path.name not in keep:
+            path.unlink()
+            remove_siblings(path)
+            removed += 1
+    return manifest, written, removed
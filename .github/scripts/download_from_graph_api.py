@@ -3,14 +3,45 @@
 Download Excel from OneDrive using:
 1. Microsoft Graph API (if credentials available)
 2. OneDrive share link (fallback)
+
+The Graph path checks the drive item's eTag/cTag against data/sync_state.json
+first and skips the download when the workbook has not changed. In that case
+the step output `changed=false` is set so the workflow can skip parse/commit.
+
+With ONEDRIVE_FILE_NAME=latest the current month's report is resolved from the
+Year/Month folder tree (optionally limited to ONEDRIVE_REPORT_FOLDER) via the
+Graph delta feed, see folder_index.py.
+
+When more than one source is configured (Graph, ONEDRIVE_LINK, SMB_FILE_PATH)
+they are raced concurrently instead of tried in turn, see multi_source_fetch.py.
+The Graph eTag/cTag check still runs first, so an unchanged workbook is never
+downloaded from the other sources; if Graph is unavailable they race alone.
+FETCH_SEQUENTIAL=1 restores the one-after-another fallback.
+
+Phase timings, bytes, HTTP statuses and retries of each run are appended to
+data/sync_metrics.jsonl (see sync_metrics.py).
 """
 
 import os
 import sys
-import requests
 from pathlib import Path
 from datetime import datetime
 
+from download_utils import DownloadError, stream_download
+from folder_index import DeltaError, resolve_latest
+from graph_client import GraphClient, get_session, token_url
+from multi_source_fetch import FetchResult, FileSource, UrlSource, parse_timestamp, race, record_attempt
+from sync_metrics import add_bytes, annotate, phase, start_run
+from token_cache import TokenCache, TokenError
+from workbook_validator import validate_workbook
+from sync_state import (
+    item_fingerprint,
+    item_unchanged,
+    load_state,
+    save_state,
+    set_output,
+)
+
 # Get credentials from environment
 TENANT_ID = os.getenv('AZURE_TENANT_ID')
 CLIENT_ID = os.getenv('AZURE_CLIENT_ID')
@@ -18,205 +49,380 @@ CLIENT_SECRET = os.getenv('AZURE_CLIENT_SECRET')
 REFRESH_TOKEN = os.getenv('AZURE_REFRESH_TOKEN')
 ONEDRIVE_FILE_NAME = os.getenv('ONEDRIVE_FILE_NAME', 'boiler_data.xlsx')
 ONEDRIVE_LINK = os.getenv('ONEDRIVE_LINK')
+FORCE_DOWNLOAD = os.getenv('FORCE_DOWNLOAD', '').lower() in ('1', 'true', 'yes')
+# Workbook on an SMB share, as a mount point or UNC path (e.g. //BOILER-PC/Users/.../boiler.xlsx)
+SMB_FILE_PATH = os.getenv('SMB_FILE_PATH')
+FETCH_SEQUENTIAL = os.getenv('FETCH_SEQUENTIAL', '').lower() in ('1', 'true', 'yes')
+
+OUTPUT_FILE = Path('data/boiler_data.xlsx')
+
+# ONEDRIVE_FILE_NAME value that resolves the current month's report workbook
+LATEST_REPORT = 'latest'
+
+SHARE_HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+
+# Outcomes of a Graph download attempt
+DOWNLOADED = 'downloaded'
+UNCHANGED = 'unchanged'
+
 
-print("=" * 60)
-print("📥 OneDrive File Download")
-print("=" * 60)
+def validate_share_download(path, content_type):
+    """Share links return HTML on expiry, so require a spreadsheet content type too."""
+    if 'spreadsheet' not in content_type.lower() and 'sheet' not in content_type.lower():
+        raise DownloadError(f"Wrong content type: {content_type[:30]}")
+    validate_workbook(path, content_type)
 
-# Try delegated auth with refresh token first (best method)
-if TENANT_ID and CLIENT_ID and REFRESH_TOKEN:
-    print("\n🔐 Using delegated authentication (refresh token)...")
-    
+
+def get_delegated_token(token_cache):
+    """Access token for delegated auth, reusing the cached one while it is valid."""
+    reused = token_cache.access_token_valid()
     try:
-        token_url = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/token"
-        token_data = {
-            'client_id': CLIENT_ID,
-            'grant_type': 'refresh_token',
-            'refresh_token': REFRESH_TOKEN,
-            'scope': 'Files.Read.All Sites.Read.All offline_access'
-        }
-        
-        token_response = requests.post(token_url, data=token_data, timeout=10)
-        
-        if token_response.status_code == 200:
-            print("✅ Access token obtained via refresh token")
-            token_json = token_response.json()
-            access_token = token_json.get('access_token')
-            new_refresh_token = token_json.get('refresh_token')
-            
-            # Note: New refresh token might be returned, ideally should update GitHub secret
-            if new_refresh_token and new_refresh_token != REFRESH_TOKEN:
-                print("⚠️  Note: New refresh token available (consider updating GitHub secret)")
-            
-            if access_token:
-                headers = {
-                    'Authorization': f'Bearer {access_token}',
-                    'Content-Type': 'application/json'
-                }
-                
-                # Search for file
-                print(f"🔍 Searching for '{ONEDRIVE_FILE_NAME}' in OneDrive...")
-                
-                # Use delegated auth endpoint (works with refresh token)
-                search_url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{ONEDRIVE_FILE_NAME}"
-                search_response = requests.get(search_url, headers=headers, timeout=10)
-                
-                if search_response.status_code == 200:
-                    file_item = search_response.json()
-                    file_id = file_item.get('id')
-                    file_name = file_item.get('name')
-                    file_size = file_item.get('size', 0)
-                    
-                    print(f"✅ Found: {file_name} ({file_size:,} bytes)")
-                    
-                    # Download file
-                    print("📥 Downloading file...")
-                    download_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{file_id}/content"
-                    download_response = requests.get(download_url, headers=headers, timeout=30)
-                    
-                    if download_response.status_code == 200:
-                        Path('data').mkdir(exist_ok=True)
-                        with open('data/boiler_data.xlsx', 'wb') as f:
-                            f.write(download_response.content)
-                        print(f"✅ File saved: data/boiler_data.xlsx ({len(download_response.content):,} bytes)")
-                        print(f"⏰ Timestamp: {datetime.now().isoformat()}\n")
-                        print("🎉 SUCCESS: Automatic sync using delegated auth")
-                        sys.exit(0)
-                    else:
-                        print(f"⚠️ Download failed: {download_response.status_code}")
-                elif search_response.status_code == 404:
-                    print(f"⚠️ File not found: {ONEDRIVE_FILE_NAME}")
-                    print("  Make sure it's in your OneDrive root folder")
-                else:
-                    print(f"⚠️ Search failed: {search_response.status_code}")
-                    print(search_response.text[:200])
+        with phase('token'):
+            access_token = token_cache.get_access_token()
+    except TokenError as e:
+        print(f"⚠️ {e}")
+        return None
+
+    if reused:
+        print("✅ Reusing cached access token")
+    else:
+        print("✅ Access token obtained via refresh token")
+    return access_token
+
+
+def get_app_token():
+    """Get an app-only access token (client credentials)."""
+    token_data = {
+        'client_id': CLIENT_ID,
+        'client_secret': CLIENT_SECRET,
+        'scope': 'https://graph.microsoft.com/.default',
+        'grant_type': 'client_credentials'
+    }
+
+    with phase('token'):
+        token_response = get_session().post(token_url(TENANT_ID), data=token_data)
+
+    if token_response.status_code != 200:
+        print(f"⚠️ Client credentials auth failed: {token_response.status_code}")
+        return None
+
+    print("✅ Access token obtained")
+    return token_response.json().get('access_token')
+
+
+def find_by_path(client):
+    """Look up ONEDRIVE_FILE_NAME relative to the OneDrive root."""
+    print(f"🔍 Searching for '{ONEDRIVE_FILE_NAME}' in OneDrive...")
+
+    # Use delegated auth endpoint (works with refresh token)
+    search_response = client.item_by_path(ONEDRIVE_FILE_NAME)
+
+    if search_response.status_code == 404:
+        print(f"⚠️ File not found: {ONEDRIVE_FILE_NAME}")
+        print("  Make sure it's in your OneDrive root folder")
+        return None
+    if search_response.status_code != 200:
+        print(f"⚠️ Search failed: {search_response.status_code}")
+        print(search_response.text[:200])
+        return None
+
+    return search_response.json()
+
+
+def find_latest_report(client):
+    """Resolve this month's report workbook from the delta-synced folder index."""
+    print("🔍 Resolving latest monthly report from the folder index...")
+    try:
+        file_item, index = resolve_latest(client)
+    except DeltaError as e:
+        print(f"⚠️ {e}")
+        return None
+
+    print(f"   {'Full scan' if index.get('fullScan') else 'Delta'}: {index['changes']} changed entries, "
+          f"{len(index['reports'])} report workbooks indexed")
+    if file_item is None:
+        print("⚠️ No monthly report workbook found (REPORT DAILY BULAN YYYY - MM ...xlsx)")
+    return file_item
+
+
+def lookup_item(client):
+    """Resolve the configured workbook's drive item, or None."""
+    with phase('lookup'):
+        if ONEDRIVE_FILE_NAME == LATEST_REPORT:
+            file_item = find_latest_report(client)
         else:
-            print(f"⚠️ Refresh token auth failed: {token_response.status_code}")
-            print(token_response.text[:200])
-    except Exception as e:
-        print(f"⚠️ Delegated auth error: {e}")
-
-# Try Graph API with client credentials (limited, won't work with /me/drive)
-elif TENANT_ID and CLIENT_ID and CLIENT_SECRET:
-    print("\n🔐 Attempting Graph API authentication...")
-
-try:
-        token_url = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/token"
-        token_data = {
-            'client_id': CLIENT_ID,
-            'client_secret': CLIENT_SECRET,
-            'scope': 'https://graph.microsoft.com/.default',
-            'grant_type': 'client_credentials'
-        }
-        
-        token_response = requests.post(token_url, data=token_data, timeout=10)
-        
-        if token_response.status_code == 200:
-            print("✅ Access token obtained")
-            access_token = token_response.json().get('access_token')
-            
-            if access_token:
-                headers = {
-                    'Authorization': f'Bearer {access_token}',
-                    'Content-Type': 'application/json'
-                }
-                
-                # Try to find file using search
-                print(f"🔍 Searching for '{ONEDRIVE_FILE_NAME}' in OneDrive...")
-                
-                search_url = f"https://graph.microsoft.com/v1.0/me/drive/root:/{ONEDRIVE_FILE_NAME}"
-                search_response = requests.get(search_url, headers=headers, timeout=10)
-                
-                if search_response.status_code == 200:
-                    file_item = search_response.json()
-                    file_id = file_item.get('id')
-                    print(f"✅ Found: {ONEDRIVE_FILE_NAME}")
-                    
-                    # Download file
-                    print("📥 Downloading file...")
-                    download_url = f"https://graph.microsoft.com/v1.0/me/drive/items/{file_id}/content"
-                    download_response = requests.get(download_url, headers=headers, timeout=30)
-                    
-                    if download_response.status_code == 200:
-                        Path('data').mkdir(exist_ok=True)
-                        with open('data/boiler_data.xlsx', 'wb') as f:
-                            f.write(download_response.content)
-                        print(f"✅ File saved: data/boiler_data.xlsx ({len(download_response.content):,} bytes)")
-                        print(f"⏰ Timestamp: {datetime.now().isoformat()}\n")
-                        sys.exit(0)
-                    else:
-                        print(f"⚠️ Download failed: {download_response.status_code}")
-                elif search_response.status_code == 404:
-                    print(f"⚠️ File not found: {ONEDRIVE_FILE_NAME}")
-                    print("  Make sure it's in your OneDrive root folder")
-                else:
-                    print(f"⚠️ Search failed: {search_response.status_code}")
-    except Exception as e:
-        print(f"⚠️ Graph API error: {e}")
-
-# Fallback to share link
-print("\n📌 Falling back to OneDrive share link...\n")
-
-if not ONEDRIVE_LINK:
-    print("❌ ERROR: No download method available")
-    print("\nYou need ONE of these:")
-    print("  1. Graph API: AZURE_TENANT_ID, AZURE_CLIENT_ID, AZURE_CLIENT_SECRET")
-    print("  2. Share Link: ONEDRIVE_LINK")
-    print("\nTo generate a new share link:")
-    print("  1. Open OneDrive → Find your Excel file")
-    print("  2. Click 'Share' → 'Copy link'")
-    print("  3. Add to GitHub secret: ONEDRIVE_LINK")
-    sys.exit(1)
-
-print("📥 Downloading from OneDrive share link...")
-
-urls_to_try = [
-    ONEDRIVE_LINK + "&download=1",
-    ONEDRIVE_LINK.replace("?", "?download=1&") if "?" in ONEDRIVE_LINK else ONEDRIVE_LINK,
-    ONEDRIVE_LINK,
-]
-
-file_downloaded = False
-
-for i, url in enumerate(urls_to_try, 1):
+            file_item = find_by_path(client)
+    if file_item is None:
+        return None
+
+    print(f"✅ Found: {file_item.get('name')} ({file_item.get('size', 0):,} bytes)")
+    print(f"   Modified: {file_item.get('lastModifiedDateTime')}  cTag: {file_item.get('cTag')}")
+    return file_item
+
+
+def record_graph_download(state, file_item, sha256):
+    state['graph'] = {
+        **item_fingerprint(file_item),
+        'name': file_item.get('name'),
+        'sha256': sha256,
+        'syncedAt': datetime.now().isoformat(),
+    }
+
+
+def download_via_graph(access_token, force=FORCE_DOWNLOAD, state=None):
+    """
+    Look up the workbook's drive item and download it if it changed
+    (or unconditionally with force). Returns DOWNLOADED, UNCHANGED, or None
+    on failure. `state` is the sync state to use, loaded from disk if None.
+    """
+    client = GraphClient(access_token)
+    state = load_state() if state is None else state
+
+    file_item = lookup_item(client)
+    if file_item is None:
+        return None
+
+    # Skip the content fetch when nothing changed since the last sync
+    if not force and item_unchanged(state.get('graph'), file_item, OUTPUT_FILE):
+        print("⏭️  Workbook unchanged since last sync (eTag/cTag match) - skipping download")
+        return UNCHANGED
+
+    # Download file
+    print("📥 Downloading file...")
     try:
-        print(f"  Attempt {i}...", end=" ")
-        
-        response = requests.get(
-            url,
-            timeout=30,
-            allow_redirects=True,
-            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
-        )
-        
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', '')
-            if 'spreadsheet' in content_type.lower() or 'sheet' in content_type.lower():
-                Path('data').mkdir(exist_ok=True)
-                with open('data/boiler_data.xlsx', 'wb') as f:
-                    f.write(response.content)
-                print(f"✅ Success ({len(response.content):,} bytes)")
-                print(f"✅ File saved: data/boiler_data.xlsx")
-                print(f"⏰ Timestamp: {datetime.now().isoformat()}\n")
-                file_downloaded = True
-                break
+        with phase('download'):
+            result = client.download_item(file_item['id'], OUTPUT_FILE, validate=validate_workbook)
+    except DownloadError as e:
+        print(f"⚠️ Download failed: {e}")
+        return None
+    add_bytes(result.size)
+
+    record_graph_download(state, file_item, result.sha256)
+    save_state(state)
+
+    print(f"✅ File saved: {OUTPUT_FILE} ({result.size:,} bytes)")
+    print(f"⏰ Timestamp: {datetime.now().isoformat()}\n")
+    return DOWNLOADED
+
+
+def share_link_urls():
+    return [
+        ONEDRIVE_LINK + "&download=1",
+        ONEDRIVE_LINK.replace("?", "?download=1&") if "?" in ONEDRIVE_LINK else ONEDRIVE_LINK,
+        ONEDRIVE_LINK,
+    ]
+
+
+def download_via_share_link():
+    """Download using the OneDrive share link. Returns True on success."""
+    print("📥 Downloading from OneDrive share link...")
+
+    for i, url in enumerate(share_link_urls(), 1):
+        try:
+            print(f"  Attempt {i}...", end=" ")
+
+            with phase('download'):
+                result = stream_download(
+                    url,
+                    OUTPUT_FILE,
+                    headers=SHARE_HEADERS,
+                    session=get_session(),
+                    validate=validate_share_download
+                )
+            add_bytes(result.size)
+            print(f"✅ Success ({result.size:,} bytes)")
+            print(f"✅ File saved: {OUTPUT_FILE}")
+            print(f"⏰ Timestamp: {datetime.now().isoformat()}\n")
+            return True
+        except DownloadError as e:
+            if e.status_code == 403:
+                print("⚠️ Access denied (403)")
+            elif e.status_code:
+                print(f"⚠️ Status {e.status_code}")
             else:
-                print(f"⚠️ Wrong content type: {content_type[:30]}")
-        elif response.status_code == 403:
-            print(f"⚠️ Access denied (403)")
+                print(f"⚠️ {e}")
+        except Exception as e:
+            print(f"⚠️ Error: {e}")
+
+    return False
+
+
+class GraphSource:
+    """Race entrant: token, item lookup, eTag/cTag check and download in one worker."""
+
+    name = 'graph'
+
+    def __init__(self, get_token, state, force=FORCE_DOWNLOAD):
+        self.get_token = get_token
+        self.state = state
+        self.force = force
+        self.client = None
+        self.item = None
+
+    def check(self):
+        """Token, item lookup and eTag/cTag check. Returns True if the workbook is unchanged."""
+        access_token = self.get_token()
+        if not access_token:
+            raise DownloadError("No Graph access token")
+        self.client = GraphClient(access_token)
+        self.item = lookup_item(self.client)
+        if self.item is None:
+            raise DownloadError("Workbook not found in OneDrive")
+        return not self.force and item_unchanged(self.state.get('graph'), self.item, OUTPUT_FILE)
+
+    def fetch(self, dest, cancel):
+        # The item is normally resolved by check() before the race starts
+        unchanged = self.check() if self.item is None else False
+        modified = parse_timestamp(self.item.get('lastModifiedDateTime'))
+        if unchanged:
+            return FetchResult(source=self.name, last_modified=modified, unchanged=True,
+                               metadata={'item': self.item})
+
+        result = self.client.download_item(self.item['id'], dest, validate=validate_workbook, cancel=cancel)
+        return FetchResult(source=self.name, path=result.path, size=result.size, sha256=result.sha256,
+                           last_modified=modified, metadata={'item': self.item})
+
+
+def configured_sources(token_cache, state):
+    sources = []
+    if token_cache and token_cache.has_refresh_token():
+        sources.append(GraphSource(lambda: get_delegated_token(token_cache), state))
+    elif TENANT_ID and CLIENT_ID and CLIENT_SECRET:
+        sources.append(GraphSource(get_app_token, state))
+    if ONEDRIVE_LINK:
+        sources.append(UrlSource('share', share_link_urls(), headers=SHARE_HEADERS,
+                                 validate=validate_share_download))
+    if SMB_FILE_PATH:
+        sources.append(FileSource('smb', SMB_FILE_PATH, validate=validate_workbook))
+    return sources
+
+
+def download_via_race(sources, state):
+    """
+    Check the Graph eTag/cTag first, then race every configured source for
+    the content only if the workbook changed (or Graph could not tell).
+    Returns DOWNLOADED, UNCHANGED, or None if all failed.
+    """
+    graph = next((source for source in sources if isinstance(source, GraphSource)), None)
+    if graph is not None:
+        try:
+            unchanged = graph.check()
+        except Exception as e:
+            print(f"⚠️ Graph metadata unavailable ({e}) - racing the other sources")
+            record_attempt(state, graph.name, ok=False, error=str(e))
+            sources = [source for source in sources if source is not graph]
         else:
-            print(f"⚠️ Status {response.status_code}")
-    except requests.exceptions.Timeout:
-        print("⚠️ Timeout")
-    except Exception as e:
-        print(f"⚠️ Error: {e}")
-
-if not file_downloaded:
-    print("\n❌ Download failed from share link")
-    print("\nThe share link may have expired. To fix:")
-    print("  1. Open OneDrive → Find your Excel file")
-    print("  2. Click 'Share' → 'Copy link'")
-    print("  3. Go to GitHub repo → Settings → Secrets and variables")
-    print("  4. Update secret ONEDRIVE_LINK with the new link")
-    print("  5. Re-run the workflow")
-    sys.exit(1)
+            if unchanged:
+                save_state(state)
+                annotate(source=graph.name)
+                print("⏭️  Workbook unchanged since last sync (eTag/cTag match) - skipping download")
+                return UNCHANGED
+
+    print(f"🏁 Racing {len(sources)} sources: {', '.join(source.name for source in sources)}")
+    try:
+        with phase('race'):
+            winner = race(sources, OUTPUT_FILE, state)
+    except DownloadError as e:
+        print(f"⚠️ {e}")
+        save_state(state)
+        return None
+
+    for name, stats in sorted(state['sources'].items()):
+        print(f"   {name}: {stats['successes']}/{stats['attempts']} ok, {stats['wins']} wins, "
+              f"~{stats.get('latency') or 0:.2f}s")
+
+    annotate(source=winner.source)
+    add_bytes(winner.size)
+    # Whichever source won, remember the item Graph saw so the next eTag check can skip
+    if graph is not None and graph.item is not None:
+        record_graph_download(state, graph.item, winner.sha256)
+    save_state(state)
+    print(f"✅ {winner.source} won in {winner.latency:.2f}s (modified {winner.last_modified})")
+    print(f"✅ File saved: {OUTPUT_FILE} ({winner.size:,} bytes)")
+    print(f"⏰ Timestamp: {datetime.now().isoformat()}\n")
+    return DOWNLOADED
+
+
+def finish(result):
+    """Report the Graph outcome to the workflow and exit if it succeeded."""
+    annotate(result=result)
+    if result == UNCHANGED:
+        set_output('changed', 'false')
+        print("ℹ️  No changes - downstream parse and commit can be skipped")
+        sys.exit(0)
+    if result == DOWNLOADED:
+        set_output('changed', 'true')
+        sys.exit(0)
+
+
+def main():
+    print("=" * 60)
+    print("📥 OneDrive File Download")
+    print("=" * 60)
+
+    token_cache = TokenCache(TENANT_ID, CLIENT_ID, REFRESH_TOKEN) if TENANT_ID and CLIENT_ID else None
+
+    state = load_state()
+    sources = configured_sources(token_cache, state)
+    if len(sources) > 1 and not FETCH_SEQUENTIAL:
+        finish(download_via_race(sources, state))
+        print("\n❌ Download failed from every source")
+        sys.exit(1)
+
+    # Try delegated auth with refresh token first (best method)
+    if token_cache and token_cache.has_refresh_token():
+        print("\n🔐 Using delegated authentication (refresh token)...")
+
+        try:
+            access_token = get_delegated_token(token_cache)
+            if access_token:
+                result = download_via_graph(access_token)
+                if result == DOWNLOADED:
+                    print("🎉 SUCCESS: Automatic sync using delegated auth")
+                finish(result)
+        except Exception as e:
+            print(f"⚠️ Delegated auth error: {e}")
+
+    # Try Graph API with client credentials (limited, won't work with /me/drive)
+    elif TENANT_ID and CLIENT_ID and CLIENT_SECRET:
+        print("\n🔐 Attempting Graph API authentication...")
+
+        try:
+            access_token = get_app_token()
+            if access_token:
+                finish(download_via_graph(access_token))
+        except Exception as e:
+            print(f"⚠️ Graph API error: {e}")
+
+    # Fallback to share link
+    print("\n📌 Falling back to OneDrive share link...\n")
+
+    if not ONEDRIVE_LINK:
+        print("❌ ERROR: No download method available")
+        print("\nYou need ONE of these:")
+        print("  1. Graph API: AZURE_TENANT_ID, AZURE_CLIENT_ID, AZURE_CLIENT_SECRET")
+        print("  2. Share Link: ONEDRIVE_LINK")
+        print("\nTo generate a new share link:")
+        print("  1. Open OneDrive → Find your Excel file")
+        print("  2. Click 'Share' → 'Copy link'")
+        print("  3. Add to GitHub secret: ONEDRIVE_LINK")
+        sys.exit(1)
+
+    if not download_via_share_link():
+        print("\n❌ Download failed from share link")
+        print("\nThe share link may have expired. To fix:")
+        print("  1. Open OneDrive → Find your Excel file")
+        print("  2. Click 'Share' → 'Copy link'")
+        print("  3. Go to GitHub repo → Settings → Secrets and variables")
+        print("  4. Update secret ONEDRIVE_LINK with the new link")
+        print("  5. Re-run the workflow")
+        sys.exit(1)
+
+    # Share links expose no change metadata, so always treat as changed
+    annotate(result=DOWNLOADED, source='share')
+    set_output('changed', 'true')
+
+
+if __name__ == '__main__':
+    with start_run('download_from_graph_api'):
+        main()
@@ -2,6 +2,8 @@
 """
 Download latest Excel file from OneDrive folder structure.
 Handles: Year/Month folder hierarchy
+
+Each run's download time, bytes and HTTP statuses go to data/sync_metrics.jsonl.
 """
 
 import os
@@ -10,6 +12,14 @@ import requests
 from datetime import datetime
 from pathlib import Path
 
+from download_utils import DownloadError, stream_download
+from graph_client import get_session
+from sync_metrics import add_bytes, phase, start_run
+from workbook_validator import validate_workbook
+
+# Written at exit; the outcome stays 'failed' unless set below
+metrics = start_run('download_from_onedrive')
+
 # Get OneDrive link from environment
 ONEDRIVE_LINK = os.getenv('ONEDRIVE_LINK')
 
@@ -18,7 +28,7 @@ if not ONEDRIVE_LINK:
     print("Please add your OneDrive share link to GitHub secrets")
     sys.exit(1)
 
-print(f"📂 OneDrive Link provided: Yes")
+print("📂 OneDrive Link provided: Yes")
 
 try:
     # Create data directory
@@ -44,57 +54,36 @@ try:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            response = requests.get(
-                url, 
-                timeout=30, 
-                allow_redirects=True,
-                headers=headers,
-                stream=True
-            )
+            # Streams to a temp file and only replaces data/boiler_data.xlsx
+            # once its zip directory and sheet parts check out
+            with phase('download'):
+                result = stream_download(
+                    url, 'data/boiler_data.xlsx', headers=headers, session=get_session(),
+                    validate=validate_workbook
+                )
+            add_bytes(result.size)
             
-            print(f"  Status: {response.status_code}")
-            print(f"  Content-Type: {response.headers.get('content-type', 'unknown')[:50]}")
+            print(f"  Content-Type: {result.content_type[:50] or 'unknown'}")
+            print(f"  Content size: {result.size} bytes")
+            print(f"  SHA-256: {result.sha256[:16]}...")
+            print(f"✅ Downloaded successfully ({result.size / 1024:.1f} KB)")
+            file_downloaded = True
+            break
             
-            if response.status_code == 200:
-                content = response.content
-                content_size = len(content)
-                
-                print(f"  Content size: {content_size} bytes")
-                
-                # Check if it looks like an Excel file
-                # Excel files start with specific magic bytes
-                is_valid_excel = (
-                    content_size > 5000 and  # Excel files are typically > 5KB
-                    (content[:4] == b'PK\x03\x04' or  # ZIP-based (xlsx)
-                     content[:8] == b'\xd0\xcf\x11\xe0' or  # OLE2 (xls)
-                     'vnd.openxmlformats' in response.headers.get('content-type', '') or
-                     'vnd.ms-excel' in response.headers.get('content-type', ''))
-                )
-                
-                # Detailed diagnostics
-                print(f"  Magic bytes: {content[:4].hex() if len(content) > 4 else 'N/A'}")
-                print(f"  Is valid Excel: {is_valid_excel}")
-                
-                if is_valid_excel:
-                    with open('data/boiler_data.xlsx', 'wb') as f:
-                        f.write(content)
-                    
-                    print(f"✅ Downloaded successfully ({content_size / 1024:.1f} KB)")
-                    file_downloaded = True
-                    break
-                else:
-                    print(f"  ⚠️ Response doesn't look like Excel file (size: {content_size})")
-                    if content_size < 1000:
-                        try:
-                            content_preview = content.decode('utf-8', errors='ignore')[:200]
-                            print(f"  Content preview: {content_preview}")
-                            if '<html' in content_preview.lower():
-                                print("  ⚠️ Received HTML response - OneDrive link may be incorrect or expired")
-                        except:
-                            print(f"  First bytes: {content[:50]}")
-                        
-        except requests.exceptions.RequestException as e:
-            print(f"  ⚠️ Request failed: {str(e)[:80]}")
+        except DownloadError as e:
+            if isinstance(e.__cause__, requests.RequestException):
+                print(f"  ⚠️ {str(e)[:80]}")
+                continue
+            if e.status_code:
+                print(f"  Status: {e.status_code}")
+            print(f"  Content-Type: {e.content_type[:50] or 'unknown'}")
+            print(f"  ⚠️ Response doesn't look like Excel file: {e}")
+            if e.preview:
+                print(f"  Magic bytes: {e.preview[:4].hex()}")
+                content_preview = e.preview.decode('utf-8', errors='ignore')
+                print(f"  Content preview: {content_preview}")
+                if '<html' in content_preview.lower():
+                    print("  ⚠️ Received HTML response - OneDrive link may be incorrect or expired")
             continue
         except Exception as e:
             print(f"  ⚠️ Error: {str(e)[:80]}")
@@ -116,8 +105,10 @@ try:
             Path('data/.sync_ready').touch()
         
         print("\n📝 Next: Upload Excel file manually to data/boiler_data.xlsx")
+        metrics.outcome = 'unavailable'
         sys.exit(0)  # Don't fail, allow manual workaround
     
+    metrics.outcome = 'ok'
     print(f"📊 Sync time: {datetime.now().isoformat()}")
     
 except Exception as e:
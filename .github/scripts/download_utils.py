@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Streaming download routine shared by the OneDrive download scripts.
+
+The response body is written in fixed-size chunks to a temp file next to the
+destination and hashed as it streams, so memory stays flat no matter how big
+the workbook gets. A dropped connection is resumed with an HTTP Range request,
+and the temp file is only renamed over the destination once it validates, so
+a half-written workbook never reaches the parser.
+"""
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+
+CHUNK_SIZE = 256 * 1024
+MAX_RESUMES = 3
+
+XLSX_MAGIC = b'PK\x03\x04'
+XLS_MAGIC = b'\xd0\xcf\x11\xe0'
+MIN_EXCEL_SIZE = 5000  # Excel files are typically > 5KB
+
+# Errors that mean the connection dropped mid-body and a resume is worth trying
+RESUMABLE_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+
+class DownloadError(Exception):
+    """Download failed or the downloaded file did not validate."""
+
+    def __init__(self, message, status_code=None, content_type='', preview=b''):
+        super().__init__(message)
+        self.status_code = status_code
+        self.content_type = content_type
+        self.preview = preview
+
+
+class DownloadCancelled(DownloadError):
+    """Another source won the race and this download was abandoned."""
+
+
+@dataclass
+class DownloadResult:
+    path: Path
+    size: int
+    sha256: str
+    content_type: str
+    resumes: int = 0
+    last_modified: str = None
+    status_code: int = None  # of the last response (206 after a resume)
+
+
+def read_preview(path, length=200):
+    """First bytes of a file, for diagnostics on rejected downloads."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(length)
+    except OSError:
+        return b''
+
+
+def looks_like_excel(path, content_type=''):
+    """Cheap check on a finished download: size plus xlsx/xls magic bytes."""
+    size = os.path.getsize(path)
+    magic = read_preview(path, 8)
+    if size < MIN_EXCEL_SIZE:
+        raise DownloadError(f"File too small to be a workbook ({size} bytes)", content_type=content_type)
+    if not (magic.startswith(XLSX_MAGIC) or magic.startswith(XLS_MAGIC)):
+        raise DownloadError(f"Not an Excel file (magic bytes {magic[:4].hex()})", content_type=content_type)
+
+
+def _content_range_start(response):
+    """Start offset from a `Content-Range: bytes start-end/total` header."""
+    value = response.headers.get('content-range', '')
+    try:
+        return int(value.split(' ', 1)[1].split('-', 1)[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def _expected_total(response, offset):
+    """Full body length implied by the response headers, if known."""
+    content_range = response.headers.get('content-range', '')
+    if '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get('content-length')
+    return offset + int(length) if length and length.isdigit() else None
+
+
+def stream_download(url, dest, headers=None, session=None, validate=looks_like_excel,
+                    timeout=(5, 30), chunk_size=CHUNK_SIZE, max_resumes=MAX_RESUMES, cancel=None,
+                    **request_kwargs):
+    """
+    Stream `url` into `dest` and return a DownloadResult.
+
+    `validate(path, content_type)` runs on the completed temp file and should
+    raise DownloadError to reject it. Raises DownloadError on HTTP errors,
+    connection failures, repeated drops, or validation failure; `dest` is untouched
+    in every failure case. Setting the `cancel` threading.Event stops the
+    transfer at the next chunk with DownloadCancelled.
+    """
+    http = session or requests
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{dest.name}.", suffix='.part', dir=dest.parent)
+    tmp_path = Path(tmp_name)
+    digest = hashlib.sha256()
+    written = 0
+    resumes = 0
+    content_type = ''
+    validator = None  # eTag/Last-Modified of the first response, for If-Range
+    last_modified = None
+    status_code = None
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise DownloadCancelled(f"Cancelled after {written:,} bytes")
+                request_headers = dict(headers or {})
+                if written:
+                    request_headers['Range'] = f"bytes={written}-"
+                    if validator:
+                        request_headers['If-Range'] = validator
+
+                try:
+                    response = http.get(
+                        url,
+                        headers=request_headers,
+                        stream=True,
+                        timeout=timeout,
+                        allow_redirects=True,
+                        **request_kwargs
+                    )
+                except RESUMABLE_ERRORS:
+                    if not written or resumes >= max_resumes:
+                        raise
+                    resumes += 1
+                    continue
+
+                with response:
+                    status_code = response.status_code
+                    if written and response.status_code == 206 and _content_range_start(response) == written:
+                        pass  # Server honoured the Range request, append
+                    elif written and response.status_code == 200:
+                        # Range ignored (or file changed under If-Range): start over
+                        f.seek(0)
+                        f.truncate()
+                        digest = hashlib.sha256()
+                        written = 0
+                    elif response.status_code != 200:
+                        raise DownloadError(
+                            f"HTTP {response.status_code}",
+                            status_code=response.status_code,
+                            content_type=response.headers.get('content-type', '')
+                        )
+
+                    if not written:
+                        content_type = response.headers.get('content-type', '')
+                        validator = response.headers.get('etag') or response.headers.get('last-modified')
+                        last_modified = response.headers.get('last-modified')
+                    expected = _expected_total(response, written)
+
+                    try:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            if cancel is not None and cancel.is_set():
+                                raise DownloadCancelled(f"Cancelled after {written:,} bytes")
+                            if chunk:
+                                f.write(chunk)
+                                digest.update(chunk)
+                                written += len(chunk)
+                    except RESUMABLE_ERRORS:
+                        if resumes >= max_resumes:
+                            raise DownloadError(f"Connection dropped after {written:,} bytes ({resumes} resumes)")
+                        resumes += 1
+                        continue
+
+                if expected is not None and written < expected:
+                    # Body ended early without an exception: resume as well
+                    if resumes >= max_resumes:
+                        raise DownloadError(f"Truncated download ({written:,} of {expected:,} bytes)")
+                    resumes += 1
+                    continue
+                break
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        if validate:
+            try:
+                validate(tmp_path, content_type)
+            except DownloadError as e:
+                e.content_type = e.content_type or content_type
+                e.preview = e.preview or read_preview(tmp_path)
+                raise
+
+        os.replace(tmp_path, dest)
+        return DownloadResult(
+            path=dest,
+            size=written,
+            sha256=digest.hexdigest(),
+            content_type=content_type,
+            resumes=resumes,
+            last_modified=last_modified,
+            status_code=status_code,
+        )
+    except requests.RequestException as e:
+        # Connection refused, DNS failure, a drop with nothing to resume, ...
+        raise DownloadError(f"Request failed: {e}") from e
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
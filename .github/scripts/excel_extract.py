@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Extract hourly boiler readings from the monthly report workbook.
+
+Only the NGSTEAM RATIO and WATER_STEAM RATIO sheets are opened, in openpyxl
+read-only mode, and only the columns listed in DATA_MAPPING.md are read, so
+parse time and memory follow the rows we need rather than the whole
+workbook and its formatting.
+
+Both sheets share one layout: each day is a block of 24 hourly rows
+(0800hrs to 0700hrs next day) followed by a sum row, and blocks repeat every
+26 rows (e.g. 506-529 + 530, 532-555 + 556).
+
+Incremental runs pass the previous extract back in: completed day blocks
+are reused as-is and the sheet XML is scanned from the first unfinished
+block, skipping earlier rows without parsing them, so a late-month sync
+costs about the same as an early-month one. Only the sum rows of the
+reused days are parsed, to catch corrections: the scan restarts at the
+first completed day whose sum row no longer matches. An edit that leaves
+every sum unchanged is only picked up by a full extract (FULL_EXTRACT=1).
+"""
+
+import hashlib
+import io
+import json
+import re
+import zipfile
+from datetime import date, datetime, timedelta
+from itertools import zip_longest
+from xml.etree.ElementTree import fromstring, iterparse
+
+from openpyxl import load_workbook
+
+FIRST_DATA_ROW = 12   # 0800hrs of day 1
+HOURS_PER_DAY = 24
+BLOCK_STRIDE = 26     # 24 hourly rows + sum row + blank spacer row
+FIRST_HOUR = 8        # blocks start at 0800hrs
+
+BOILER_KEYS = ('b1', 'b2', 'b3')
+
+# 1-based Excel columns for B1, B2, B3 (DATA_MAPPING.md)
+STEAM_SHEET_COLUMNS = {
+    'steam': (5, 9, 13),     # E, I, M
+    'ng': (6, 10, 14),       # F, J, N
+    'ratio': (7, 11, 15),    # G, K, O
+    'output': (8, 12, 16),   # H, L, P
+}
+WATER_SHEET_COLUMNS = {
+    'water': (7, 13, 19),          # G, M, S
+    'waterSteam': (8, 14, 20),     # H, N, T
+    'electricSteam': (9, 15, 21),  # I, O, U
+}
+METRICS = tuple(STEAM_SHEET_COLUMNS) + tuple(WATER_SHEET_COLUMNS)
+
+DATE_COLUMN = 1  # A
+STEAM_MAX_COLUMN = 16  # P
+WATER_MIN_COLUMN = 7   # G
+WATER_MAX_COLUMN = 21  # U
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+DOC_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+SHEET_DATA_OPEN = re.compile(rb'<(?:\w+:)?sheetData\b[^>]*>')
+SHEET_DATA_CLOSE = re.compile(rb'</(?:\w+:)?sheetData>')
+ROW_OPEN = re.compile(rb'<(?:\w+:)?row\b[^>]*?\sr="(\d+)"')
+CELL_COLUMN = re.compile(r'[A-Z]+')
+
+
+class ExtractError(Exception):
+    """Workbook does not have the expected sheets or layout."""
+
+
+def to_number(value):
+    """Cell value as float, or None for blanks, text and error values."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(',', '').strip())
+        except ValueError:
+            return None
+    return None
+
+
+def to_date(value):
+    """Parse the date column (datetime, Excel serial or DD/M/YYYY text)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        return (EXCEL_EPOCH + timedelta(days=float(value))).date()
+    if isinstance(value, str):
+        text = value.strip()
+        for fmt in ('%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d', '%d-%m-%Y'):
+            try:
+                return datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+    return None
+
+
+def hour_label(hour_index):
+    """0 -> '0800', 23 -> '0700' (next day)."""
+    return f"{(FIRST_HOUR + hour_index) % 24:02d}00"
+
+
+def reading_timestamp(day_date, hour_index):
+    """Local timestamp of an hourly row, rolling past midnight into the next day."""
+    if day_date is None:
+        return None
+    moment = datetime.combine(day_date, datetime.min.time()) + timedelta(hours=FIRST_HOUR + hour_index)
+    return moment.isoformat(timespec='minutes')
+
+
+def block_start_row(day_number, first_row=FIRST_DATA_ROW):
+    """First hourly row of the given (1-based) day block."""
+    return first_row + (day_number - 1) * BLOCK_STRIDE
+
+
+def find_sheets(sheet_names):
+    """Locate the steam and water sheets by name, like excel_to_json.js does."""
+    steam = next((name for name in sheet_names if 'ngsteam' in name.lower().replace(' ', '')), None)
+    water = next((name for name in sheet_names if 'water' in name.lower()), None)
+    if not steam or not water:
+        raise ExtractError(f"Required sheets not found. Available sheets: {', '.join(sheet_names)}")
+    return steam, water
+
+
+def open_workbook(path):
+    return load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+
+def parse_values(steam_cells, water_cells):
+    """Map raw cell tuples onto {'b1': {metric: value}, ...}."""
+    values = {}
+    for index, key in enumerate(BOILER_KEYS):
+        boiler = {}
+        for metric, columns in STEAM_SHEET_COLUMNS.items():
+            col = columns[index] - 1
+            boiler[metric] = to_number(steam_cells[col]) if col < len(steam_cells) else None
+        for metric, columns in WATER_SHEET_COLUMNS.items():
+            col = columns[index] - WATER_MIN_COLUMN
+            boiler[metric] = to_number(water_cells[col]) if col < len(water_cells) else None
+        values[key] = boiler
+    return values
+
+
+def has_data(values):
+    """A row counts as filled in once any boiler has non-zero steam or NG."""
+    return any(values[key]['steam'] or values[key]['ng'] for key in BOILER_KEYS)
+
+
+def has_reading(values):
+    """Steam or NG typed in (zero included), as opposed to a blank row."""
+    return any(values[key]['steam'] is not None or values[key]['ng'] is not None for key in BOILER_KEYS)
+
+
+def iter_sheet_rows(steam_ws, water_ws, min_row):
+    """Yield (row_number, steam_cells, water_cells) from both sheets in lockstep."""
+    steam_rows = steam_ws.iter_rows(min_row=min_row, max_col=STEAM_MAX_COLUMN, values_only=True)
+    water_rows = water_ws.iter_rows(
+        min_row=min_row, min_col=WATER_MIN_COLUMN, max_col=WATER_MAX_COLUMN, values_only=True
+    )
+    for offset, (steam_cells, water_cells) in enumerate(zip_longest(steam_rows, water_rows, fillvalue=())):
+        yield min_row + offset, steam_cells, water_cells
+
+
+def sheet_parts(archive):
+    """Map sheet name -> worksheet part path using xl/workbook.xml and its rels."""
+    workbook = fromstring(archive.read('xl/workbook.xml'))
+    rels = fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target', '') for rel in rels.iter(f'{PKG_REL_NS}Relationship')}
+
+    parts = {}
+    for sheet in workbook.iter(f'{SHEET_NS}sheet'):
+        target = targets.get(sheet.get(f'{DOC_REL_NS}id'))
+        if target:
+            parts[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    return parts
+
+
+class SharedStrings:
+    """xl/sharedStrings.xml, loaded only if a text cell is actually read."""
+
+    def __init__(self, archive):
+        self.archive = archive
+        self._strings = None
+
+    def __getitem__(self, index):
+        if self._strings is None:
+            try:
+                root = fromstring(self.archive.read('xl/sharedStrings.xml'))
+            except KeyError:
+                root = None
+            self._strings = [] if root is None else [
+                ''.join(t.text or '' for t in item.iter(f'{SHEET_NS}t'))
+                for item in root.iter(f'{SHEET_NS}si')
+            ]
+        return self._strings[index]
+
+
+def column_number(cell_ref):
+    """'E12' -> 5."""
+    number = 0
+    for letter in CELL_COLUMN.match(cell_ref).group():
+        number = number * 26 + ord(letter) - 64
+    return number
+
+
+def cell_value(cell, shared_strings):
+    """Cached value of a raw <c> element, matching openpyxl's data_only values."""
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(f'{SHEET_NS}t'))
+    value = cell.find(f'{SHEET_NS}v')
+    if value is None or value.text is None:
+        return None
+    if cell_type == 's':
+        return shared_strings[int(value.text)]
+    if cell_type == 'b':
+        return value.text == '1'
+    if cell_type in ('str', 'e'):
+        return value.text if cell_type == 'str' else None
+    return float(value.text)
+
+
+def iter_part_rows(archive, part, min_row, min_col, max_col, shared_strings, max_row=None):
+    """
+    Yield (row_number, cells) from a worksheet part starting at `min_row`.
+
+    The part is decompressed, but rows before `min_row` are skipped with a
+    byte search instead of being parsed; only the tail goes through the XML
+    parser. Missing rows are yielded as all-None, like openpyxl does.
+    """
+    xml = archive.read(part)
+    sheet_data = SHEET_DATA_OPEN.search(xml)
+    if sheet_data is None or xml[sheet_data.end() - 2:sheet_data.end()] == b'/>':
+        return
+
+    start = None
+    for match in ROW_OPEN.finditer(xml, sheet_data.end()):
+        if int(match.group(1)) >= min_row:
+            start = match.start()
+            break
+    if start is None:
+        return
+
+    width = max_col - min_col + 1
+    expected = min_row
+    tail = io.BytesIO(xml[:sheet_data.end()] + xml[start:])
+    for _, element in iterparse(tail):
+        if element.tag != f'{SHEET_NS}row':
+            continue
+        row_number = int(element.get('r'))
+        if max_row is not None and row_number > max_row:
+            break
+        while expected < row_number:
+            yield expected, (None,) * width
+            expected += 1
+
+        cells = row_cells(element, min_col, max_col, shared_strings)
+        element.clear()
+
+        yield row_number, cells
+        expected = row_number + 1
+
+
+def read_part_rows(archive, part, row_numbers, min_col, max_col, shared_strings):
+    """
+    {row_number: cells} for just the listed rows of a worksheet part. Rows
+    are located with the same byte search as iter_part_rows() and only
+    their own XML is parsed; missing rows come back as all-None.
+    """
+    width = max_col - min_col + 1
+    found = {number: (None,) * width for number in row_numbers}
+    xml = archive.read(part)
+    sheet_data = SHEET_DATA_OPEN.search(xml)
+    if sheet_data is None or xml[sheet_data.end() - 2:sheet_data.end()] == b'/>':
+        return found
+
+    starts = [(int(match.group(1)), match.start()) for match in ROW_OPEN.finditer(xml, sheet_data.end())]
+    closing = SHEET_DATA_CLOSE.search(xml, starts[-1][1] if starts else sheet_data.end())
+    ends = [start for _, start in starts[1:]] + [closing.start() if closing else len(xml)]
+    wanted = b''.join(
+        xml[start:end] for (number, start), end in zip(starts, ends) if number in found
+    )
+    if not wanted:
+        return found
+
+    tail = io.BytesIO(xml[:sheet_data.end()] + wanted + xml[ends[-1]:])
+    for _, element in iterparse(tail):
+        if element.tag == f'{SHEET_NS}row':
+            found[int(element.get('r'))] = row_cells(element, min_col, max_col, shared_strings)
+            element.clear()
+    return found
+
+
+def row_cells(element, min_col, max_col, shared_strings):
+    """Values of columns min_col..max_col of a parsed <row> element."""
+    cells = [None] * (max_col - min_col + 1)
+    column = 0
+    for cell in element.iter(f'{SHEET_NS}c'):
+        ref = cell.get('r')
+        column = column_number(ref) if ref else column + 1
+        if min_col <= column <= max_col:
+            cells[column - min_col] = cell_value(cell, shared_strings)
+    return tuple(cells)
+
+
+def iter_archive_rows(archive, steam_part, water_part, min_row, shared_strings):
+    """Archive-backed counterpart of iter_sheet_rows() for resumed scans."""
+    steam_rows = iter_part_rows(archive, steam_part, min_row, 1, STEAM_MAX_COLUMN, shared_strings)
+    water_rows = iter_part_rows(archive, water_part, min_row, WATER_MIN_COLUMN, WATER_MAX_COLUMN, shared_strings)
+    for offset, (steam, water) in enumerate(zip_longest(steam_rows, water_rows, fillvalue=(None, ()))):
+        yield min_row + offset, steam[1], water[1]
+
+
+def read_days(rows, first_day=1, first_row=FIRST_DATA_ROW, previous_date=None):
+    """
+    Build day blocks from (row_number, steam_cells, water_cells) tuples that
+    start at the first row of `first_day`, and return them in order.
+
+    Trailing blocks with no hourly data are dropped. Rows where every boiler
+    reads zero are kept only when a filled-in row follows them (the plant
+    was idle); after the last one they are template rows for hours to come.
+    A day is `complete` once all 24 hours are filled in or a later day has
+    data.
+    """
+    days = {}
+    idle = {}  # day number -> all-zero rows not yet followed by data
+
+    for row_number, steam_cells, water_cells in rows:
+        offset = row_number - first_row
+        day_number = offset // BLOCK_STRIDE + 1
+        position = offset % BLOCK_STRIDE
+        if position > HOURS_PER_DAY:
+            continue  # spacer row between blocks
+
+        day = days.get(day_number)
+        if day is None:
+            day = days[day_number] = {
+                'day': day_number,
+                'date': None,
+                'startRow': block_start_row(day_number, first_row),
+                'sumRow': block_start_row(day_number, first_row) + HOURS_PER_DAY,
+                'complete': False,
+                'hours': [],
+                'sum': None,
+            }
+
+        values = parse_values(steam_cells, water_cells)
+        if position == HOURS_PER_DAY:
+            day['sum'] = {'row': row_number, **values}
+            continue
+
+        if position == 0:
+            day['date'] = to_date(steam_cells[DATE_COLUMN - 1] if steam_cells else None)
+        if not has_reading(values):
+            continue
+
+        hour = {'row': row_number, 'hour': position, 'time': hour_label(position), **values}
+        if has_data(values):
+            for number, idle_hours in idle.items():
+                days[number]['hours'].extend(idle_hours)
+            idle.clear()
+            day['hours'].append(hour)
+        else:
+            idle.setdefault(day_number, []).append(hour)
+
+    # Fill in missing dates from the previous block and drop empty trailing days
+    ordered = []
+    for day_number in sorted(days):
+        day = days[day_number]
+        if day['date'] is None and previous_date is not None:
+            day['date'] = previous_date + timedelta(days=1)
+        previous_date = day['date']
+        ordered.append(day)
+
+    while ordered and not ordered[-1]['hours']:
+        ordered.pop()
+
+    for index, day in enumerate(ordered):
+        later_data = any(later['hours'] for later in ordered[index + 1:])
+        day['complete'] = len(day['hours']) == HOURS_PER_DAY or later_data
+        for hour in day['hours']:
+            hour['timestamp'] = reading_timestamp(day['date'], hour['hour'])
+        day['date'] = day['date'].isoformat() if day['date'] else None
+
+    return ordered
+
+
+def completed_prefix(days):
+    """Leading run of complete day blocks (day 1, 2, ...) that can be reused."""
+    prefix = []
+    for expected, day in enumerate(days, 1):
+        if day['day'] != expected or not day['complete']:
+            break
+        prefix.append(day)
+    return prefix
+
+
+def unchanged_prefix(archive, steam_part, water_part, days, shared_strings):
+    """
+    Leading days whose sum row in the workbook still matches the one
+    recorded in `days`; the first mismatch marks a corrected day.
+    """
+    sum_rows = [day['sumRow'] for day in days]
+    steam = read_part_rows(archive, steam_part, sum_rows, 1, STEAM_MAX_COLUMN, shared_strings)
+    water = read_part_rows(archive, water_part, sum_rows, WATER_MIN_COLUMN, WATER_MAX_COLUMN, shared_strings)
+    for index, day in enumerate(days):
+        recorded = {key: value for key, value in (day['sum'] or {}).items() if key != 'row'}
+        if parse_values(steam[day['sumRow']], water[day['sumRow']]) != recorded:
+            return days[:index]
+    return days
+
+
+def resume_extract(path, previous):
+    """
+    Re-read only the blocks after the last completed day of `previous`
+    whose sum row is unchanged. Returns None when the workbook no longer
+    matches (new month, renamed sheets) or day 1 itself was corrected, in
+    which case the caller does a full extract.
+    """
+    reuse = completed_prefix(previous.get('days') or [])
+    if not reuse:
+        return None
+
+    with zipfile.ZipFile(path) as archive:
+        parts = sheet_parts(archive)
+        steam_name, water_name = find_sheets(list(parts))
+        if (steam_name, water_name) != (previous.get('steamSheet'), previous.get('waterSheet')):
+            return None
+
+        # Same month? Compare the date heading day 1
+        shared_strings = SharedStrings(archive)
+        first_row = next(iter_part_rows(
+            archive, parts[steam_name], FIRST_DATA_ROW, DATE_COLUMN, DATE_COLUMN,
+            shared_strings, max_row=FIRST_DATA_ROW
+        ), None)
+        first_date = to_date(first_row[1][0]) if first_row else None
+        if (first_date.isoformat() if first_date else None) != reuse[0]['date']:
+            return None
+
+        reuse = unchanged_prefix(archive, parts[steam_name], parts[water_name], reuse, shared_strings)
+        if not reuse:
+            return None
+
+        resume_day = reuse[-1]['day'] + 1
+        rows = iter_archive_rows(
+            archive, parts[steam_name], parts[water_name], block_start_row(resume_day), shared_strings
+        )
+        new_days = read_days(rows, first_day=resume_day, previous_date=to_date(reuse[-1]['date']))
+
+    return {
+        'steamSheet': steam_name,
+        'waterSheet': water_name,
+        'days': reuse + new_days,
+        'resumedFromDay': resume_day,
+    }
+
+
+def extract_workbook(path, previous=None):
+    """
+    Extract every day block from a workbook file. With `previous` (an
+    earlier result for the same workbook) completed days are reused and
+    only the remaining blocks are read.
+    """
+    if previous:
+        resumed = resume_extract(path, previous)
+        if resumed is not None:
+            return resumed
+
+    wb = open_workbook(path)
+    try:
+        steam_name, water_name = find_sheets(wb.sheetnames)
+        rows = iter_sheet_rows(wb[steam_name], wb[water_name], FIRST_DATA_ROW)
+        days = read_days(rows)
+    finally:
+        wb.close()
+
+    return {
+        'steamSheet': steam_name,
+        'waterSheet': water_name,
+        'days': days,
+        'resumedFromDay': None,
+    }
+
+
+def latest_reading(extract):
+    """Most recent filled-in hourly row, with its date attached."""
+    for day in reversed(extract['days']):
+        if day['hours']:
+            return {'date': day['date'], **day['hours'][-1]}
+    return None
+
+
+def month_key(extract):
+    """'YYYY-MM' of the first dated day block, or None."""
+    for day in extract['days']:
+        if day['date']:
+            return day['date'][:7]
+    return None
+
+
+def extract_fingerprint(extract):
+    """
+    Hash of the extracted values only (dates, hour labels, readings, sums).
+    Excel rewrites zip metadata on every save, so two workbooks with the
+    same data differ byte-wise but share this fingerprint.
+    """
+    digest = hashlib.sha256()
+    for day in extract['days']:
+        values = [
+            day['date'],
+            [[hour['time']] + [hour[boiler] for boiler in BOILER_KEYS] for hour in day['hours']],
+            [day['sum'][boiler] for boiler in BOILER_KEYS] if day['sum'] else None,
+        ]
+        digest.update(json.dumps(values, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
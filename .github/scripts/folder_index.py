@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Index of the monthly report workbooks in OneDrive, kept fresh with the
+Graph delta API so the current month's file can be found without anyone
+editing ORIGINAL_FILE / ONEDRIVE_FILE_NAME each month.
+
+The first run walks the whole drive once (GET /me/drive/root/delta); after
+that only the entries changed since the persisted deltaLink are fetched.
+Folders are remembered (id -> name, parent) so a report's path can be
+rebuilt and matched against ONEDRIVE_REPORT_FOLDER, since delta responses
+do not include parentReference.path. The index holds every folder name in
+the drive, so it is kept in FOLDER_INDEX_FILE (restored via actions/cache,
+never committed) rather than in the sync state; losing it only costs one
+full enumeration.
+"""
+
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+
+from sync_state import load_state, save_state
+
+ONEDRIVE_REPORT_FOLDER = os.getenv('ONEDRIVE_REPORT_FOLDER', '')
+FOLDER_INDEX_FILE = Path(os.getenv('FOLDER_INDEX_FILE', 'data/folder_index.json'))
+
+# e.g. "REPORT DAILY BULAN 2026 - 01 JANUARI.xlsx"
+REPORT_PATTERN = re.compile(r'REPORT DAILY BULAN\s+(\d{4})\s*-\s*(\d{1,2})\b.*\.xlsx$', re.IGNORECASE)
+
+DELTA_URL = 'me/drive/root/delta'
+DELTA_SELECT = 'id,name,eTag,cTag,size,lastModifiedDateTime,parentReference,file,folder,root,deleted'
+REPORT_FIELDS = ('id', 'name', 'eTag', 'cTag', 'size', 'lastModifiedDateTime')
+
+
+class DeltaError(Exception):
+    """The delta feed could not be read."""
+
+
+def report_month(name):
+    """'YYYY-MM' from a report workbook file name, or None if it is not one."""
+    match = REPORT_PATTERN.search(name or '')
+    return f"{match.group(1)}-{int(match.group(2)):02d}" if match else None
+
+
+def empty_index():
+    return {'deltaLink': None, 'rootId': None, 'folders': {}, 'reports': {}}
+
+
+def apply_changes(index, items):
+    """Fold one page of delta entries into the index."""
+    folders = index['folders']
+    reports = index['reports']
+    for item in items:
+        item_id = item['id']
+        if 'deleted' in item:
+            folders.pop(item_id, None)
+            reports.pop(item_id, None)
+            continue
+
+        parent_id = (item.get('parentReference') or {}).get('id')
+        if 'root' in item:
+            index['rootId'] = item_id
+        elif 'folder' in item:
+            folders[item_id] = [item.get('name'), parent_id]
+        elif 'file' in item:
+            month = report_month(item.get('name'))
+            if month and not item['name'].startswith('~$'):
+                reports[item_id] = {
+                    **{field: item.get(field) for field in REPORT_FIELDS},
+                    'parentId': parent_id,
+                    'month': month,
+                }
+            else:
+                # Renamed away from the report pattern
+                reports.pop(item_id, None)
+
+
+def sync_index(client, index=None):
+    """
+    Pull delta changes into `index` (or a fresh one) and return it.
+    An expired delta token (410 Gone) restarts from a full enumeration.
+    """
+    index = index or empty_index()
+    url = index.get('deltaLink')
+    params = None
+    full_scan = not url
+    if full_scan:
+        index = empty_index()
+        url, params = DELTA_URL, {'$select': DELTA_SELECT}
+
+    changes = 0
+    while url:
+        response = client.get(url, params=params)
+        if response.status_code == 410 and index.get('deltaLink'):
+            print("⚠️ Delta token expired - rebuilding the folder index")
+            return sync_index(client, empty_index())
+        if response.status_code != 200:
+            raise DeltaError(f"Delta query failed: {response.status_code} {response.text[:200]}")
+
+        page = response.json()
+        items = page.get('value', [])
+        apply_changes(index, items)
+        changes += len(items)
+
+        # nextLink/deltaLink already carry the query
+        params = None
+        url = page.get('@odata.nextLink')
+        if url is None:
+            index['deltaLink'] = page.get('@odata.deltaLink')
+
+    index['changes'] = changes
+    index['fullScan'] = full_scan
+    index['updatedAt'] = datetime.now().isoformat()
+    return index
+
+
+def item_path(index, item_id):
+    """Folder path of an indexed item relative to the drive root."""
+    names = []
+    folders = index['folders']
+    parent_id = index['reports'].get(item_id, {}).get('parentId')
+    seen = set()
+    while parent_id and parent_id != index.get('rootId') and parent_id not in seen:
+        seen.add(parent_id)
+        name, parent_id = folders.get(parent_id, (None, None))
+        if name is None:
+            break
+        names.append(name)
+    return '/'.join(reversed(names))
+
+
+def in_folder(path, folder):
+    folder = folder.strip('/').lower()
+    path = path.lower()
+    return not folder or path == folder or path.startswith(folder + '/')
+
+
+def latest_report(index, folder=ONEDRIVE_REPORT_FOLDER, today=None):
+    """
+    Report workbook for the current month, or the newest earlier one if this
+    month's file does not exist yet. Returns the indexed entry or None.
+    """
+    current = (today or date.today()).strftime('%Y-%m')
+    candidates = [
+        report for report in index['reports'].values()
+        if report['month'] <= current and in_folder(item_path(index, report['id']), folder)
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda report: (report['month'], report.get('lastModifiedDateTime') or ''))
+
+
+def resolve_latest(client, folder=ONEDRIVE_REPORT_FOLDER, today=None, path=FOLDER_INDEX_FILE):
+    """Refresh the persisted index and return (latest report item, index)."""
+    index = sync_index(client, load_state(path) or None)
+    save_state(index, path)
+    return latest_report(index, folder, today), index
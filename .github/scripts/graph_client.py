@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the Microsoft Graph / OneDrive scripts.
+
+One keep-alive requests.Session per process, so login.microsoftonline.com and
+graph.microsoft.com are each handshaked once instead of once per call. Every
+request gets separate connect/read timeouts and bounded retries with
+exponential backoff and jitter, honouring Retry-After on 429/503.
+"""
+
+import os
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from download_utils import stream_download
+
+LOGIN_URL = os.getenv('AZURE_AUTHORITY_HOST', 'https://login.microsoftonline.com').rstrip('/')
+GRAPH_URL = os.getenv('GRAPH_API_URL', 'https://graph.microsoft.com/v1.0').rstrip('/')
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0   # seconds, doubled per attempt
+BACKOFF_MAX = 30.0   # cap for our own backoff
+RETRY_AFTER_MAX = 120.0  # give up rather than honour a longer Retry-After
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+ITEM_SELECT = 'id,name,eTag,cTag,size,lastModifiedDateTime'
+
+
+def retry_after_seconds(response):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    value = response.headers.get('retry-after')
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given (0-based) retry."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+class RetryingSession(requests.Session):
+    """
+    requests.Session with default timeouts and retry/backoff.
+
+    Throttling and 5xx responses are retried for every method, since the
+    server did not act on them. Dropped connections are only retried for
+    idempotent methods, so a token redemption is never sent twice.
+    `retry_count` accumulates across calls for instrumentation.
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, timeout=DEFAULT_TIMEOUT, pool_maxsize=8):
+        super().__init__()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.retry_count = 0
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+
+        attempt = 0
+        while True:
+            try:
+                response = super().request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # A connect timeout never reached the server, so it is safe for POST too
+                safe = method.upper() in IDEMPOTENT_METHODS or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not safe or attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = retry_after_seconds(response)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                elif delay > RETRY_AFTER_MAX:
+                    return response
+                response.close()
+
+            attempt += 1
+            self.retry_count += 1
+            time.sleep(delay)
+
+
+_session = None
+
+
+def get_session():
+    """Process-wide pooled session, created on first use."""
+    global _session
+    if _session is None:
+        _session = RetryingSession()
+    return _session
+
+
+def token_url(tenant_id):
+    return f"{LOGIN_URL}/{tenant_id}/oauth2/v2.0/token"
+
+
+def device_code_url(tenant_id):
+    return f"{LOGIN_URL}/{tenant_id}/oauth2/v2.0/devicecode"
+
+
+class GraphClient:
+    """Thin wrapper adding the bearer token and base URL to session calls."""
+
+    def __init__(self, access_token, session=None, base_url=GRAPH_URL):
+        self.session = session or get_session()
+        self.base_url = base_url
+        self.headers = {'Authorization': f'Bearer {access_token}'}
+
+    def url(self, path):
+        return path if path.startswith('http') else f"{self.base_url}/{path.lstrip('/')}"
+
+    def get(self, path, **kwargs):
+        headers = {**self.headers, **kwargs.pop('headers', {})}
+        return self.session.get(self.url(path), headers=headers, **kwargs)
+
+    def item_by_path(self, path, select=ITEM_SELECT):
+        """GET /me/drive/root:/{path} with only the change-tracking fields."""
+        return self.get(f"me/drive/root:/{path}", params={'$select': select})
+
+    def download_item(self, item_id, dest, **kwargs):
+        """Stream an item's content to `dest` (see download_utils.stream_download)."""
+        return stream_download(
+            self.url(f"me/drive/items/{item_id}/content"),
+            dest,
+            headers=self.headers,
+            session=self.session,
+            **kwargs
+        )
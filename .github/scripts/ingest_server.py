@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Push ingestion for the boiler workbook: the source PC sends the file as soon
+as it changes instead of the hourly workflow pulling it over SMB.
+
+Two ways in, both ending in the same ingest():
+
+  HTTP   PUT/POST /workbook        body = the .xlsx bytes
+         POST /notify              {"sha256": "..."} -> tells the sender
+                                   whether an upload is needed at all
+         GET  /status              last ingest record
+  Drop   any *.xlsx copied into --drop-dir (picked up once its size and
+         mtime are stable across two scans, then removed; files that fail
+         validation or publishing are moved to --drop-dir/rejected/)
+
+Uploads are hashed while they stream to a temp file, checked with the same
+structural validation as the downloaders, and deduplicated against the last
+ingested SHA-256 in the sync state. Only new content replaces
+data/boiler_data.xlsx and runs publish_boiler_data.publish().
+
+    python .github/scripts/ingest_server.py --port 8765 --drop-dir "D:/boiler-drop"
+
+Set INGEST_TOKEN to require `Authorization: Bearer <token>` on every request.
+The server listens on 127.0.0.1 by default; any other --host (e.g. 0.0.0.0
+for the source PC on the LAN) is refused unless INGEST_TOKEN is set.
+"""
+
+import argparse
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from download_utils import CHUNK_SIZE, DownloadError
+from excel_extract import ExtractError
+from publish_boiler_data import EXCEL_PATH, publish
+from sync_state import file_sha256, load_state, save_state
+from workbook_validator import validate_workbook
+
+INGEST_HOST = os.getenv('INGEST_HOST', '127.0.0.1')
+INGEST_PORT = int(os.getenv('INGEST_PORT', '8765'))
+INGEST_TOKEN = os.getenv('INGEST_TOKEN')
+INGEST_DROP_DIR = os.getenv('INGEST_DROP_DIR')
+INGEST_AFTER_COMMAND = os.getenv('INGEST_AFTER_COMMAND')
+
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+DROP_SCAN_INTERVAL = 2.0
+REJECTED_DIR_NAME = 'rejected'
+
+# Outcomes of ingest()
+PUBLISHED = 'published'
+DUPLICATE = 'duplicate'
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class Ingestor:
+    """Dedupes incoming workbooks by content hash and publishes new ones, one at a time."""
+
+    def __init__(self, excel_path=EXCEL_PATH, after_command=INGEST_AFTER_COMMAND):
+        self.excel_path = Path(excel_path)
+        self.after_command = after_command
+        self._lock = threading.Lock()
+        state = load_state().get('ingest', {})
+        self.last_sha256 = state.get('sha256') or file_sha256(self.excel_path)
+
+    def is_duplicate(self, sha256):
+        return sha256 == self.last_sha256
+
+    def status(self):
+        return load_state().get('ingest', {})
+
+    def ingest(self, tmp_path, sha256, source):
+        """
+        Take ownership of a validated temp file. Duplicates are discarded;
+        new content replaces the workbook and is published. Returns
+        (outcome, summary-or-None).
+        """
+        with self._lock:
+            if self.is_duplicate(sha256):
+                os.unlink(tmp_path)
+                log(f"⏭️  {source}: unchanged (sha256 {sha256[:12]})")
+                return DUPLICATE, None
+
+            self.excel_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, self.excel_path)
+            received = datetime.now()
+            summary = publish(self.excel_path)
+            self.last_sha256 = sha256
+
+            state = load_state()
+            state['ingest'] = {
+                'sha256': sha256,
+                'size': self.excel_path.stat().st_size,
+                'source': source,
+                'receivedAt': received.isoformat(),
+                'publishedAt': datetime.now().isoformat(),
+                'readingDate': summary['readingDate'],
+                'readingTime': summary['readingTime'],
+            }
+            save_state(state)
+            log(f"📊 {source}: published reading {summary['readingDate']} {summary['readingTime']}hrs "
+                f"in {(datetime.now() - received).total_seconds():.2f}s")
+
+            if self.after_command:
+                code = subprocess.call(shlex.split(self.after_command, posix=os.name != 'nt'))
+                if code != 0:
+                    log(f"⚠️ After-command exited with {code}: {self.after_command}")
+            return PUBLISHED, summary
+
+    def stage(self, chunks):
+        """Copy a stream into a temp file next to the workbook, hashing as it goes."""
+        self.excel_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.ingest-', suffix='.xlsx', dir=self.excel_path.parent)
+        digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    digest.update(chunk)
+            validate_workbook(tmp_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest()
+
+
+def read_body(rfile, length):
+    """Yield exactly `length` bytes of a request body in CHUNK_SIZE pieces."""
+    remaining = length
+    while remaining > 0:
+        chunk = rfile.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise DownloadError(f"Upload ended {remaining} bytes early")
+        remaining -= len(chunk)
+        yield chunk
+
+
+def make_handler(ingestor, token=INGEST_TOKEN):
+    class IngestHandler(BaseHTTPRequestHandler):
+        server_version = 'BoilerIngest/1.0'
+
+        def log_message(self, format, *args):
+            log(f"{self.address_string()} {format % args}")
+
+        def send_json(self, status, data):
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def authorized(self):
+            if not token:
+                return True
+            supplied = self.headers.get('Authorization', '')
+            if hmac.compare_digest(supplied, f"Bearer {token}"):
+                return True
+            self.send_json(401, {'error': 'unauthorized'})
+            return False
+
+        def content_length(self):
+            try:
+                return int(self.headers.get('Content-Length', ''))
+            except ValueError:
+                return None
+
+        def do_GET(self):
+            if not self.authorized():
+                return
+            if self.path.rstrip('/') == '/status':
+                self.send_json(200, ingestor.status())
+            else:
+                self.send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path.rstrip('/') == '/notify':
+                self.handle_notify()
+            else:
+                self.do_PUT()
+
+        def handle_notify(self):
+            if not self.authorized():
+                return
+            length = self.content_length()
+            if length is None or length > 4096:
+                self.send_json(400, {'error': 'expected a small JSON body'})
+                return
+            try:
+                sha256 = json.loads(self.rfile.read(length) or b'{}').get('sha256', '').lower()
+            except (ValueError, AttributeError):
+                self.send_json(400, {'error': 'invalid JSON'})
+                return
+            changed = not ingestor.is_duplicate(sha256)
+            self.send_json(200, {'changed': changed, 'upload': '/workbook' if changed else None})
+
+        def do_PUT(self):
+            if not self.authorized():
+                return
+            if self.path.rstrip('/') != '/workbook':
+                self.send_json(404, {'error': 'not found'})
+                return
+            length = self.content_length()
+            if length is None:
+                self.send_json(411, {'error': 'Content-Length required'})
+                return
+            if length > MAX_UPLOAD_BYTES:
+                self.send_json(413, {'error': f'upload larger than {MAX_UPLOAD_BYTES} bytes'})
+                return
+
+            source = self.headers.get('X-File-Name') or f"upload from {self.client_address[0]}"
+            try:
+                tmp_path, sha256 = ingestor.stage(read_body(self.rfile, length))
+                expected = self.headers.get('X-Content-SHA256', '').lower()
+                if expected and expected != sha256:
+                    os.unlink(tmp_path)
+                    self.send_json(422, {'error': 'sha256 mismatch', 'sha256': sha256})
+                    return
+                outcome, summary = ingestor.ingest(tmp_path, sha256, source)
+            except DownloadError as e:
+                self.send_json(422, {'error': str(e)})
+                return
+            except ExtractError as e:
+                self.send_json(500, {'error': str(e)})
+                return
+            except Exception as e:
+                log(f"❌ Ingest from {source} failed: {e!r}")
+                self.send_json(500, {'error': f"ingest failed: {e}"})
+                return
+            self.send_json(200, {'outcome': outcome, 'sha256': sha256, 'summary': summary})
+
+    return IngestHandler
+
+
+def watch_drop_dir(ingestor, drop_dir, stop, interval=DROP_SCAN_INTERVAL):
+    """Ingest workbooks copied into `drop_dir` once they stop growing."""
+    drop_dir = Path(drop_dir)
+    drop_dir.mkdir(parents=True, exist_ok=True)
+    log(f"📂 Watching drop directory {drop_dir}")
+    seen = {}
+    while not stop.wait(interval):
+        for path in sorted(drop_dir.glob('*.xlsx')):
+            if path.name.startswith(('~$', '.')):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if seen.get(path) != signature:
+                # Still being copied (or new): check again on the next scan
+                seen[path] = signature
+                continue
+            seen.pop(path, None)
+            try:
+                with open(path, 'rb') as f:
+                    tmp_path, sha256 = ingestor.stage(iter(lambda: f.read(CHUNK_SIZE), b''))
+                ingestor.ingest(tmp_path, sha256, path.name)
+                path.unlink()
+            except (DownloadError, ExtractError) as e:
+                reject_drop(path, e)
+            except OSError as e:
+                # Locked or vanished mid-copy: try again on a later scan
+                log(f"⚠️ {path.name}: {e}")
+            except Exception as e:
+                reject_drop(path, repr(e))
+
+
+def reject_drop(path, reason):
+    """Move a dropped workbook that cannot be ingested aside, so it is not retried forever."""
+    rejected_dir = path.parent / REJECTED_DIR_NAME
+    target = rejected_dir / path.name
+    if target.exists():
+        target = rejected_dir / f"{path.stem}.{datetime.now():%Y%m%d-%H%M%S}{path.suffix}"
+    try:
+        rejected_dir.mkdir(exist_ok=True)
+        os.replace(path, target)
+    except OSError as e:
+        log(f"❌ {path.name}: {reason} (could not move it to {rejected_dir}: {e})")
+        return
+    log(f"❌ {path.name}: {reason} - moved to {target}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Receive pushed boiler workbooks and publish them')
+    parser.add_argument('--host', default=INGEST_HOST)
+    parser.add_argument('--port', type=int, default=INGEST_PORT)
+    parser.add_argument('--drop-dir', default=INGEST_DROP_DIR, help='Also ingest *.xlsx copied here')
+    parser.add_argument('--no-http', action='store_true', help='Only watch the drop directory')
+    parser.add_argument('--after', default=INGEST_AFTER_COMMAND, help='Command to run after each publish')
+    args = parser.parse_args()
+
+    if args.no_http and not args.drop_dir:
+        print("❌ --no-http needs --drop-dir")
+        sys.exit(1)
+    if not args.no_http and not INGEST_TOKEN and not is_loopback(args.host):
+        print(f"❌ Refusing to listen on {args.host} without INGEST_TOKEN (anyone on the network could replace the workbook)")
+        sys.exit(1)
+
+    ingestor = Ingestor(after_command=args.after)
+    stop = threading.Event()
+    if args.drop_dir:
+        threading.Thread(target=watch_drop_dir, args=(ingestor, args.drop_dir, stop), daemon=True).start()
+
+    try:
+        if args.no_http:
+            while True:
+                time.sleep(3600)
+        server = ThreadingHTTPServer((args.host, args.port), make_handler(ingestor))
+        log(f"📥 Ingest server listening on http://{args.host}:{args.port} "
+            f"({'token required' if INGEST_TOKEN else 'no token'})")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        log("🛑 Ingest server stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Race several workbook sources (Graph API, share link, SMB/UNC path) instead
+of trying them one after another.
+
+Every source downloads into its own temp file in a thread. The first result
+that passes validation wins, except that sources finishing within
+FRESHNESS_GRACE seconds of it are also considered and the one with the
+newest lastModified is kept; the others are then cancelled through a shared
+threading.Event. A source may also report the workbook unchanged (Graph
+eTag/cTag match), which ends the race immediately. Sources stopped by the
+cancel are not counted; ones that still succeeded count as successes.
+
+Per-source attempts, wins and an exponentially weighted latency are kept in
+the sync state under 'sources'. Sources start in order of that record,
+each HEDGE_DELAY seconds after the previous one, so a source that keeps
+losing or failing stops competing for bandwidth with the usual winner.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from download_utils import CHUNK_SIZE, DownloadCancelled, DownloadError, stream_download
+from graph_client import get_session
+from sync_state import file_sha256
+
+FRESHNESS_GRACE = float(os.getenv('FETCH_FRESHNESS_GRACE', '2'))
+HEDGE_DELAY = float(os.getenv('FETCH_HEDGE_DELAY', '0.3'))
+RACE_TIMEOUT = float(os.getenv('FETCH_RACE_TIMEOUT', '120'))
+
+# Weight of the newest sample in the per-source latency average
+LATENCY_ALPHA = 0.3
+
+
+@dataclass
+class FetchResult:
+    source: str
+    path: Path = None
+    size: int = 0
+    sha256: str = None
+    last_modified: datetime = None
+    latency: float = 0.0
+    unchanged: bool = False
+    metadata: dict = field(default_factory=dict)
+
+
+def parse_timestamp(value):
+    """ISO 8601 (Graph) or RFC 1123 (HTTP Last-Modified) -> aware datetime, or None."""
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class UrlSource:
+    """Plain HTTP download, trying each URL variant in turn (e.g. share links)."""
+
+    def __init__(self, name, urls, headers=None, validate=None, session=None):
+        self.name = name
+        self.urls = list(urls)
+        self.headers = headers
+        self.validate = validate
+        self.session = session or get_session()
+
+    def fetch(self, dest, cancel):
+        errors = []
+        for url in self.urls:
+            try:
+                kwargs = {'validate': self.validate} if self.validate else {}
+                result = stream_download(url, dest, headers=self.headers, session=self.session,
+                                         cancel=cancel, **kwargs)
+            except DownloadCancelled:
+                raise
+            except DownloadError as e:
+                errors.append(str(e))
+                continue
+            return FetchResult(
+                source=self.name,
+                path=result.path,
+                size=result.size,
+                sha256=result.sha256,
+                last_modified=parse_timestamp(result.last_modified),
+            )
+        raise DownloadError('; '.join(errors) or 'no URLs configured')
+
+
+class FileSource:
+    """Copy from a filesystem path, e.g. an SMB share mounted or reached by UNC path."""
+
+    def __init__(self, name, path, validate=None):
+        self.name = name
+        self.path = Path(path)
+        self.validate = validate
+
+    def fetch(self, dest, cancel):
+        try:
+            modified = self.path.stat().st_mtime
+            with open(self.path, 'rb') as src, open(dest, 'wb') as out:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                    if cancel.is_set():
+                        raise DownloadCancelled(f"Cancelled copying {self.path}")
+                    out.write(chunk)
+        except OSError as e:
+            # Locked by Excel on the source PC shows up here as a sharing violation
+            raise DownloadError(f"{self.path}: {e}") from e
+        if self.validate:
+            self.validate(dest, '')
+        return FetchResult(
+            source=self.name,
+            path=Path(dest),
+            size=Path(dest).stat().st_size,
+            sha256=file_sha256(dest),
+            last_modified=parse_timestamp(modified),
+        )
+
+
+def source_score(stats):
+    """Lower is better: recent success rate first, then typical latency."""
+    attempts = stats.get('attempts', 0)
+    if not attempts:
+        return (0.5, 0.0)  # untried sources sit between reliable and failing ones
+    failure_rate = 1 - stats.get('successes', 0) / attempts
+    return (failure_rate, stats.get('latency') or 0.0)
+
+
+def order_sources(sources, state):
+    stats = state.get('sources', {})
+    return sorted(sources, key=lambda source: source_score(stats.get(source.name, {})))
+
+
+def record_attempt(state, name, ok, latency=None, won=False, error=None):
+    stats = state.setdefault('sources', {}).setdefault(name, {'attempts': 0, 'successes': 0, 'wins': 0})
+    stats['attempts'] += 1
+    if ok:
+        stats['successes'] += 1
+        previous = stats.get('latency')
+        stats['latency'] = round(latency if previous is None
+                                 else LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * previous, 3)
+        stats['lastSuccessAt'] = datetime.now().isoformat()
+    else:
+        stats['lastError'] = (error or '')[:200]
+    if won:
+        stats['wins'] += 1
+
+
+def race(sources, dest, state, grace=FRESHNESS_GRACE, hedge=HEDGE_DELAY, timeout=RACE_TIMEOUT):
+    """
+    Fetch `dest` from whichever source delivers a valid (and freshest) copy
+    first. Returns the winning FetchResult; raises DownloadError if all fail.
+    Updates per-source stats in `state` (the caller saves it).
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    ordered = order_sources(sources, state)
+    cancel = threading.Event()
+    started = time.monotonic()
+
+    def run(position, source):
+        # Stagger starts by rank; a cancelled race skips sources not yet started
+        if position and cancel.wait(position * hedge):
+            raise DownloadCancelled("Race finished before start")
+        begin = time.monotonic()
+        result = source.fetch(dest.with_name(f".{source.name}.{dest.name}"), cancel)
+        result.latency = time.monotonic() - begin
+        return result
+
+    results = []
+    errors = {}
+    winner = None
+    pool = ThreadPoolExecutor(max_workers=len(ordered))
+    pending = {pool.submit(run, position, source): source for position, source in enumerate(ordered)}
+    try:
+        deadline = None
+        while pending:
+            remaining = timeout - (time.monotonic() - started)
+            if deadline is not None:
+                remaining = min(remaining, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    result = future.result()
+                except DownloadCancelled:
+                    continue
+                except Exception as e:
+                    errors[source.name] = str(e)
+                    continue
+                results.append(result)
+                if result.unchanged:
+                    winner = result
+                elif deadline is None:
+                    deadline = time.monotonic() + grace
+            if winner is not None:
+                break
+        cancel.set()
+
+        if winner is None and results:
+            newest = datetime.min.replace(tzinfo=timezone.utc)
+            # Freshest copy wins; among equals (or unknown timestamps) the fastest
+            winner = max(results, key=lambda result: (result.last_modified or newest, -result.latency))
+        # Losers only write their own temp files, so the winner can go into place before they stop
+        if winner is not None and winner.path:
+            os.replace(winner.path, dest)
+            winner.path = dest
+    finally:
+        cancel.set()
+        pool.shutdown(wait=True)
+
+    # Every worker has stopped, so nothing else touches `state` or the temp files now
+    for future, source in pending.items():
+        if future.cancelled() or isinstance(future.exception(), DownloadCancelled):
+            continue  # stopped by us: says nothing about the source
+        if future.exception() is not None:
+            errors[source.name] = str(future.exception())
+            continue
+        # Finished after the race was decided: a success that simply lost
+        results.append(future.result())
+    for name, error in errors.items():
+        record_attempt(state, name, ok=False, error=error)
+    for result in results:
+        record_attempt(state, result.source, ok=True, latency=result.latency, won=result is winner)
+        if result is not winner and result.path and Path(result.path).exists():
+            Path(result.path).unlink()
+
+    if winner is None:
+        detail = ', '.join(f"{name}: {error}" for name, error in errors.items()) or 'timed out'
+        raise DownloadError(f"All sources failed ({detail})")
+    return winner
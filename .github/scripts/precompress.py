@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Pre-compressed .gz / .br siblings of the published dashboard files.
+
+Hosts that serve precompressed assets (nginx gzip_static/brotli_static, most
+CDNs) then skip on-the-fly compression, and clients on slow links can fetch
+the .br directly. Output is deterministic (gzip mtime 0) so an unchanged
+file never produces a git diff. Brotli is optional: without the `brotli`
+package only .gz is written.
+"""
+
+import gzip
+import os
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Below this a sibling saves less than a TCP packet
+MIN_SIZE = 256
+
+
+def sibling_suffixes():
+    return ('.gz', '.br') if brotli else ('.gz',)
+
+
+def missing_siblings(path, size=None):
+    """
+    Suffixes `path` should have a sibling for but does not, e.g. ('.br',)
+    after brotli was installed. For files whose siblings are only ever
+    written whole (content-hashed names), an empty result means current.
+    """
+    path = Path(path)
+    if (path.stat().st_size if size is None else size) < MIN_SIZE:
+        return ()
+    return tuple(suffix for suffix in sibling_suffixes() if not path.with_name(path.name + suffix).exists())
+
+
+def _write(path, data):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def compress_bytes(body):
+    """{'.gz': bytes, '.br': bytes} for `body` (.br only with brotli installed)."""
+    encoded = {'.gz': gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli:
+        encoded['.br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return encoded
+
+
+def write_siblings(path, body=None):
+    """
+    Write path.gz (and path.br) next to `path`. Returns {suffix: size}.
+    Small files get none, and stale siblings of them are removed.
+    """
+    path = Path(path)
+    if body is None:
+        body = path.read_bytes()
+    if len(body) < MIN_SIZE:
+        remove_siblings(path)
+        return {}
+
+    sizes = {}
+    for suffix, data in compress_bytes(body).items():
+        sibling = path.with_name(path.name + suffix)
+        # Skip the write when the sibling is already current
+        if not sibling.exists() or sibling.stat().st_size != len(data) or sibling.read_bytes() != data:
+            _write(sibling, data)
+        sizes[suffix] = len(data)
+    return sizes
+
+
+def remove_siblings(path):
+    for suffix in ('.gz', '.br'):
+        sibling = Path(path).with_name(Path(path).name + suffix)
+        if sibling.exists():
+            sibling.unlink()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Parse data/boiler_data.xlsx and publish the dashboard JSON in public/.
+
+Python replacement for the summary part of excel_to_json.js: reads only the
+NGSTEAM RATIO / WATER_STEAM RATIO columns it needs (see excel_extract.py)
+and writes public/boiler_data.json directly after the download step.
+
+The extracted day blocks are cached in data/extract_cache.json, and the last
+completed block is recorded in the sync state, so the next run only scans
+the current day plus any earlier day whose sum row was corrected. Set
+FULL_EXTRACT=1 to re-read the whole month.
+
+Hourly readings are also written to the columnar store (timeseries_store.py)
+under the workbook's report month, and public/boiler_rollup.json is rebuilt
+from the whole store (aggregate.py). Per-day content-hashed shards and their
+manifest are written under public/data/ (day_shards.py). New hourly rows
+are run through the alert rules (alerts.py) and the open and recent alerts
+published as public/boiler_alerts.json. The month's rows are also diffed
+against what the store held before, and the added/corrected rows appended
+to the change feed that read_api.py pushes to live dashboards
+(change_feed.py). The latest month is also written as
+a compact binary snapshot, public/boiler_hourly.bin (binary_snapshot.py),
+and every published file gets precompressed .gz/.br siblings
+(precompress.py).
+
+Outputs are only rewritten when the fingerprint of the extracted values
+changes (excel_extract.extract_fingerprint), so a workbook Excel re-saved
+without new readings produces no diff; the step output `data_changed` tells
+the workflow whether to commit. Set FORCE_PUBLISH=1 to rewrite anyway, and
+ARCHIVE_WORKBOOK=1 to keep each changed workbook in the content-addressed
+archive (workbook_archive.py) instead of committing the .xlsx.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from aggregate import build_rollup
+from alerts import update_alerts
+from binary_snapshot import SNAPSHOT_NAME, publish_snapshot
+from change_feed import load_partition, record_changes
+from day_shards import publish_day_shards
+from excel_extract import (
+    ExtractError,
+    completed_prefix,
+    extract_fingerprint,
+    extract_workbook,
+    latest_reading,
+    month_key,
+)
+from precompress import write_siblings
+from sync_metrics import annotate, phase, start_run
+from sync_state import load_state, save_state, set_output
+from timeseries_store import DAILY_SUM, HOURLY, load_range, store_version, write_month
+from workbook_archive import archive_workbook
+
+EXCEL_PATH = Path(os.getenv('BOILER_EXCEL_PATH', 'data/boiler_data.xlsx'))
+PUBLIC_DIR = Path(os.getenv('BOILER_PUBLIC_DIR', 'public'))
+EXTRACT_CACHE_FILE = Path(os.getenv('EXTRACT_CACHE_FILE', 'data/extract_cache.json'))
+FULL_EXTRACT = os.getenv('FULL_EXTRACT', '').lower() in ('1', 'true', 'yes')
+FORCE_PUBLISH = os.getenv('FORCE_PUBLISH', '').lower() in ('1', 'true', 'yes')
+ARCHIVE_WORKBOOK = os.getenv('ARCHIVE_WORKBOOK', '').lower() in ('1', 'true', 'yes')
+
+BOILERS = [
+    {'key': 'b1', 'id': 1, 'name': 'Boiler No. 1', 'maxCapacity': 18},
+    {'key': 'b2', 'id': 2, 'name': 'Boiler No. 2', 'maxCapacity': 18},
+    {'key': 'b3', 'id': 3, 'name': 'Boiler No. 3', 'maxCapacity': 16},
+]
+
+
+def write_json(path, data, indent=2, compress=False):
+    """
+    Write JSON atomically so the frontend never reads a partial file.
+    With `compress`, also refresh its .gz/.br siblings.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+    if compress:
+        write_siblings(path)
+
+
+def build_summary(reading, now=None):
+    """Latest reading in the public/boiler_data.json shape the dashboard reads."""
+    now = now or datetime.now(timezone.utc)
+    boilers = []
+    for boiler in BOILERS:
+        values = reading[boiler['key']]
+        boilers.append({
+            'id': boiler['id'],
+            'name': boiler['name'],
+            'steam': values['steam'] or 0,
+            'ng': values['ng'] or 0,
+            'ratio': values['ratio'] or 0,
+            'output': values['output'] or 0,
+            'water': values['water'] or 0,
+            'waterSteam': values['waterSteam'] or 0,
+            'electricSteam': values['electricSteam'] or 0,
+            'maxCapacity': boiler['maxCapacity'],
+        })
+
+    return {
+        'timestamp': now.isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+        'lastUpdate': now.strftime('%m/%d/%Y, %I:%M:%S %p'),
+        'readingDate': reading['date'],
+        'readingTime': reading['time'],
+        'sourceRow': reading['row'],
+        'boilers': boilers,
+    }
+
+
+def load_previous_extract(state, previous=None):
+    """
+    Extract from the last run (`previous` if the caller kept it in memory,
+    else the cache file), if it agrees with the sync state.
+    """
+    if FULL_EXTRACT:
+        return None
+    if previous is None:
+        try:
+            with open(EXTRACT_CACHE_FILE, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return None
+    recorded = state.get('extract', {}).get('lastCompleteDay')
+    completed = completed_prefix(previous.get('days') or [])
+    if not completed or completed[-1]['day'] != recorded:
+        return None
+    return previous
+
+
+def record_extract(state, extract, fingerprint=None):
+    """
+    Remember the last completed day block and where the next scan starts,
+    plus the fingerprint of the data the public outputs were built from.
+    """
+    completed = completed_prefix(extract['days'])
+    last = completed[-1] if completed else None
+    state['extract'] = {
+        'steamSheet': extract['steamSheet'],
+        'waterSheet': extract['waterSheet'],
+        'lastCompleteDay': last['day'] if last else None,
+        'lastCompleteDate': last['date'] if last else None,
+        'resumeRow': last['sumRow'] + 2 if last else None,
+        'resumedFromDay': extract['resumedFromDay'],
+        'days': len(extract['days']),
+        'fingerprint': fingerprint,
+    }
+    write_json(EXTRACT_CACHE_FILE, extract, indent=None)
+    save_state(state)
+
+
+def publish_rollup(public_dir=PUBLIC_DIR):
+    """
+    Recompute daily/monthly aggregates over every stored month and refresh
+    the per-day shards from the same columns.
+    """
+    hourly = load_range(kind=HOURLY)
+    daily_sum = load_range(kind=DAILY_SUM)
+    rollup = build_rollup(hourly, daily_sum, version=store_version())
+    write_json(Path(public_dir) / 'boiler_rollup.json', rollup, indent=None, compress=True)
+
+    manifest, written, removed = publish_day_shards(public_dir, hourly, daily_sum)
+    print(f"🧩 Day shards: {len(manifest['days'])} listed, {written} new, {removed} pruned")
+    return rollup
+
+
+def publish(excel_path=EXCEL_PATH, public_dir=PUBLIC_DIR, force=FORCE_PUBLISH, state=None, warm=None):
+    """
+    Extract the workbook and, if its data changed, write the dashboard files.
+    Returns the summary of the latest reading either way.
+
+    Long-running callers pass their sync `state` dict and a `warm` dict:
+    the last extract is then kept in warm['extract'] instead of being read
+    back from the cache file on every call.
+    """
+    state = load_state() if state is None else state
+    published_fingerprint = state.get('extract', {}).get('fingerprint')
+    with phase('extract'):
+        previous = load_previous_extract(state, (warm or {}).get('extract'))
+        extract = extract_workbook(excel_path, previous=previous)
+        fingerprint = extract_fingerprint(extract)
+    if warm is not None:
+        warm['extract'] = extract
+    # Keep the old fingerprint until the outputs are written, so a failed run retries
+    record_extract(state, extract, published_fingerprint)
+
+    reading = latest_reading(extract)
+    if reading is None:
+        raise ExtractError("No valid data found in Excel")
+    summary = build_summary(reading)
+
+    summary_path = Path(public_dir) / 'boiler_data.json'
+    if not force and fingerprint == published_fingerprint and summary_path.exists():
+        print(f"⏭️  Extracted data unchanged (fingerprint {fingerprint[:12]}) - outputs left as they are")
+        set_output('data_changed', 'false')
+        annotate(dataChanged=False)
+        return summary
+
+    month = month_key(extract)
+    previous = load_partition(month)
+    with phase('store'):
+        meta = write_month(extract, source=Path(excel_path).name)
+    if meta:
+        with phase('changes'):
+            change = record_changes(month, previous, meta['version'])
+        if change:
+            print(f"📨 Change feed #{change['seq']}: " + (
+                f"reset ({change['rows']} rows)" if change.get('reset') else
+                f"{len(change['added'])} added, {len(change['corrected'])} corrected, "
+                f"{len(change['removed'])} removed, {len(change['sums'])} sum rows"))
+    write_json(summary_path, summary, compress=True)
+    print(f"✅ JSON created successfully: {summary_path}")
+
+    with phase('rollup'):
+        rollup = publish_rollup(public_dir)
+    for mismatch in rollup['mismatches']:
+        print(f"⚠️  Sum row mismatch {mismatch['date']} {mismatch['boiler']} {mismatch['metric']}: "
+              f"computed {mismatch['computed']} vs sheet {mismatch['sheet']}")
+
+    with phase('alerts'):
+        alerts, new_alerts = update_alerts(state)
+    write_json(Path(public_dir) / 'boiler_alerts.json', alerts, indent=None, compress=True)
+    print(f"🚨 Alerts: {alerts['active']} active ({alerts['critical']} critical), {new_alerts} new")
+
+    with phase('snapshot'):
+        snapshot_size = publish_snapshot(public_dir)
+    print(f"📦 Binary snapshot: {Path(public_dir) / SNAPSHOT_NAME} ({snapshot_size:,} bytes)")
+
+    if ARCHIVE_WORKBOOK:
+        with phase('archive'):
+            entry = archive_workbook(excel_path, fingerprint, month)
+        print(f"🗄️  Workbook archived: {entry['path']}")
+
+    state['extract']['fingerprint'] = fingerprint
+    save_state(state)
+    set_output('data_changed', 'true')
+    annotate(dataChanged=True)
+    return summary
+
+
+def main():
+    print('📊 Converting Excel to JSON...')
+
+    if not EXCEL_PATH.exists():
+        print(f"❌ Excel file not found: {EXCEL_PATH}")
+        sys.exit(1)
+
+    try:
+        summary = publish()
+    except ExtractError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    extract_state = load_state().get('extract', {})
+    if extract_state.get('resumedFromDay'):
+        resumed = extract_state['resumedFromDay']
+        print(f"⏩ Reused days 1-{resumed - 1}, scanned from day {resumed}")
+    print(f"📌 Last completed day: {extract_state.get('lastCompleteDate')} (next scan from row {extract_state.get('resumeRow')})")
+    print(f"📊 Latest reading: {summary['readingDate']} {summary['readingTime']}hrs (row {summary['sourceRow']})")
+    for boiler in summary['boilers']:
+        print(f"   {boiler['name']}: steam {boiler['steam']}, NG {boiler['ng']}, water {boiler['water']}")
+
+
+if __name__ == '__main__':
+    with start_run('publish_boiler_data', session=None):
+        main()
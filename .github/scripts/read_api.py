@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Read-only HTTP API over the columnar store, for dashboards on the plant LAN.
+
+Answers range and per-boiler/per-metric queries straight from
+data/store (timeseries_store.py) instead of shipping the whole dataset:
+
+    GET /version                     store version and months
+    GET /hourly?start=&end=&boiler=&metric=
+    GET /daily?start=&end=&boiler=&metric=
+    GET /changes?since=              Server-Sent Events change feed
+
+    /daily?boiler=b2&metric=ngSteam&start=2026-01-03&end=2026-01-17
+
+`start`/`end` are ISO dates or datetimes and both optional. A date means the
+whole report day (0800hrs to 0700hrs next day), so a date range covers the
+same hours as the daily rows. `boiler` (b1 or 1) and `metric` take a
+comma-separated list and default to all. Hourly metrics are the sheet
+columns (steam, ng, ratio, ...; ngSteam is accepted for ratio); daily
+metrics are those of the rollup (aggregate.daily_rollup), including the
+rolling 7/30-day means.
+
+Responses are cached in an LRU keyed on (path, query, store version). The
+store version is re-read at most every VERSION_CHECK_INTERVAL seconds, and
+a new version (a sync published) drops the cache. Each response carries an
+ETag; a matching If-None-Match gets 304 without a body.
+
+/changes streams the row-level change sets the sync records (change_feed.py)
+as they arrive, resuming after Last-Event-ID or ?since=<seq>.
+
+    python .github/scripts/read_api.py --port 8780
+
+Set READ_API_TOKEN to require `Authorization: Bearer <token>` (or ?token=
+on /changes, since EventSource cannot send headers).
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from aggregate import ROLLING_WINDOWS, _json_array, daily_rollup
+from change_feed import CHANGE_FEED_FILE, ChangeFeed
+from excel_extract import BOILER_KEYS, FIRST_HOUR, METRICS
+from timeseries_store import HOURLY, STORE_DIR, TIME_COLUMN, column_name, list_months, load_range, store_version
+
+READ_API_HOST = os.getenv('READ_API_HOST', '0.0.0.0')
+READ_API_PORT = int(os.getenv('READ_API_PORT', '8780'))
+READ_API_TOKEN = os.getenv('READ_API_TOKEN')
+READ_API_CORS_ORIGIN = os.getenv('READ_API_CORS_ORIGIN', '*')
+READ_API_CACHE_SIZE = int(os.getenv('READ_API_CACHE_SIZE', '256'))
+
+VERSION_CHECK_INTERVAL = 1.0
+
+HOURLY_ALIASES = {'ngSteam': 'ratio'}
+DAILY_METRICS = (
+    'steam', 'ng', 'water', 'ngSteam', 'waterSteam', 'electricSteam', 'output', 'hours',
+    *(f"{metric}{window}d" for window in ROLLING_WINDOWS for metric in ('steam', 'ng', 'ngSteam')),
+)
+
+
+class QueryError(Exception):
+    """Bad query parameters (400)."""
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else []
+
+
+def parse_boilers(value):
+    boilers = []
+    for item in _split(value) or BOILER_KEYS:
+        boiler = item.lower() if item.lower().startswith('b') else f"b{item}"
+        if boiler not in BOILER_KEYS:
+            raise QueryError(f"Unknown boiler {item!r} (expected one of {', '.join(BOILER_KEYS)})")
+        if boiler not in boilers:
+            boilers.append(boiler)
+    return boilers
+
+
+def parse_metrics(value, allowed):
+    metrics = _split(value) or list(allowed)
+    unknown = [metric for metric in metrics if metric not in allowed]
+    if unknown:
+        raise QueryError(f"Unknown metric(s) {', '.join(unknown)} (expected {', '.join(allowed)})")
+    return list(dict.fromkeys(metrics))
+
+
+def parse_time(value, end=False):
+    """ISO date or datetime -> datetime64[m]; a date covers its whole report day."""
+    if not value:
+        return None
+    try:
+        moment = np.datetime64(value, 'm')
+    except ValueError:
+        raise QueryError(f"Invalid date/time {value!r}") from None
+    if len(value) == 10:
+        moment += np.timedelta64(FIRST_HOUR, 'h')
+        if end:
+            moment += np.timedelta64(23, 'h')
+    return moment
+
+
+def parse_day(value):
+    if not value:
+        return None
+    try:
+        return np.datetime64(value[:10], 'D')
+    except ValueError:
+        raise QueryError(f"Invalid date {value!r}") from None
+
+
+def hourly_query(params, store_dir=STORE_DIR):
+    boilers = parse_boilers(params.get('boiler'))
+    metrics = parse_metrics(params.get('metric'), METRICS + tuple(HOURLY_ALIASES))
+    start, end = parse_time(params.get('start')), parse_time(params.get('end'), end=True)
+
+    columns = [column_name(boiler, HOURLY_ALIASES.get(metric, metric)) for boiler in boilers for metric in metrics]
+    data = load_range(start, end, columns, kind=HOURLY, store_dir=store_dir)
+    return {
+        'start': str(data[TIME_COLUMN][0]) if len(data[TIME_COLUMN]) else None,
+        'end': str(data[TIME_COLUMN][-1]) if len(data[TIME_COLUMN]) else None,
+        'times': [str(moment) for moment in data[TIME_COLUMN]],
+        'series': {
+            boiler: {metric: _json_array(data[column_name(boiler, HOURLY_ALIASES.get(metric, metric))])
+                     for metric in metrics}
+            for boiler in boilers
+        },
+    }
+
+
+def daily_query(params, store_dir=STORE_DIR):
+    boilers = parse_boilers(params.get('boiler'))
+    metrics = parse_metrics(params.get('metric'), DAILY_METRICS)
+    first, last = parse_day(params.get('start')), parse_day(params.get('end'))
+
+    # Load enough history before `start` for the rolling windows to be complete
+    load_start = None
+    if first is not None:
+        load_start = (first - np.timedelta64(max(ROLLING_WINDOWS), 'D')).astype('datetime64[m]') \
+            + np.timedelta64(FIRST_HOUR, 'h')
+    load_end = None
+    if last is not None:
+        load_end = (last + np.timedelta64(1, 'D')).astype('datetime64[m]') + np.timedelta64(FIRST_HOUR - 1, 'h')
+    days, daily = daily_rollup(load_range(load_start, load_end, kind=HOURLY, store_dir=store_dir))
+
+    keep = np.ones(len(days), dtype=bool)
+    if first is not None:
+        keep &= days >= first
+    if last is not None:
+        keep &= days <= last
+    return {
+        'days': [str(day) for day in days[keep]],
+        'series': {
+            boiler: {metric: _json_array(daily[boiler][metric][keep]) if daily[boiler] else [] for metric in metrics}
+            for boiler in boilers
+        },
+    }
+
+
+ROUTES = {'/hourly': hourly_query, '/daily': daily_query}
+
+
+class ResponseCache:
+    """LRU of encoded responses, emptied whenever the store version changes."""
+
+    def __init__(self, store_dir=STORE_DIR, size=READ_API_CACHE_SIZE, check_interval=VERSION_CHECK_INTERVAL):
+        self.store_dir = store_dir
+        self.size = size
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def version(self):
+        """Current store version, re-read at most every check_interval seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._checked < self.check_interval:
+                return self._version
+        version = store_version(self.store_dir)
+        with self._lock:
+            self._checked = now
+            if version != self._version:
+                if self._version is not None:
+                    log(f"🔄 Store version {self._version} -> {version}, dropping {len(self._entries)} cached responses")
+                self._entries.clear()
+                self._version = version
+        return version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            # A response computed before a version change must not outlive it
+            if key[-1] != self._version:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'size': self.size, 'hits': self.hits, 'misses': self.misses}
+
+
+def encode_response(data):
+    """(body, etag) for a JSON document."""
+    body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return body, f'"{hashlib.sha256(body).hexdigest()[:20]}"'
+
+
+def make_handler(cache, feed=None, token=READ_API_TOKEN, cors_origin=READ_API_CORS_ORIGIN):
+    class ReadHandler(BaseHTTPRequestHandler):
+        server_version = 'BoilerReadAPI/1.0'
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            log(f"{self.address_string()} {format % args}")
+
+        def send_body(self, status, body, etag=None, version=None, cache_state=None):
+            not_modified = etag is not None and etag in _split(self.headers.get('If-None-Match'))
+            self.send_response(304 if not_modified else status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Cache-Control', 'no-cache')
+            if cors_origin:
+                self.send_header('Access-Control-Allow-Origin', cors_origin)
+                self.send_header('Access-Control-Expose-Headers', 'ETag, X-Data-Version')
+            if etag:
+                self.send_header('ETag', etag)
+            if version:
+                self.send_header('X-Data-Version', version)
+            if cache_state:
+                self.send_header('X-Cache', cache_state)
+            self.send_header('Content-Length', '0' if not_modified else str(len(body)))
+            self.end_headers()
+            if not not_modified and self.command != 'HEAD':
+                self.wfile.write(body)
+
+        def send_json(self, status, data):
+            self.send_body(status, encode_response(data)[0])
+
+        def authorized(self):
+            if not token:
+                return True
+            supplied = self.headers.get('Authorization', '')
+            if hmac.compare_digest(supplied, f"Bearer {token}"):
+                return True
+            query_token = dict(parse_qsl(urlsplit(self.path).query)).get('token', '')
+            if urlsplit(self.path).path.rstrip('/') == '/changes' and hmac.compare_digest(query_token, token):
+                return True
+            self.send_json(401, {'error': 'unauthorized'})
+            return False
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            if cors_origin:
+                self.send_header('Access-Control-Allow-Origin', cors_origin)
+                self.send_header('Access-Control-Allow-Headers', 'Authorization, If-None-Match, Last-Event-ID')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def stream_changes(self, params):
+            last_id = self.headers.get('Last-Event-ID') or params.get('since')
+            try:
+                last_id = int(last_id) if last_id else None
+            except ValueError:
+                self.send_json(400, {'error': f"Invalid event id {last_id!r}"})
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.send_header('X-Accel-Buffering', 'no')
+            if cors_origin:
+                self.send_header('Access-Control-Allow-Origin', cors_origin)
+            self.end_headers()
+            self.close_connection = True
+            feed.stream(self.wfile.write, last_id)
+
+        def do_GET(self):
+            if not self.authorized():
+                return
+            url = urlsplit(self.path)
+            path = url.path.rstrip('/') or '/'
+            params = dict(parse_qsl(url.query))
+            params.pop('token', None)
+
+            if path == '/changes' and feed is not None and self.command == 'GET':
+                self.stream_changes(params)
+                return
+            version = cache.version()
+            if path == '/version':
+                self.send_json(200, {'version': version, 'months': list_months(cache.store_dir),
+                                     'cache': cache.stats(),
+                                     'changes': {'latest': feed.latest, 'subscribers': feed.subscriber_count()}
+                                     if feed is not None else None})
+                return
+            query = ROUTES.get(path)
+            if query is None:
+                routes = ['/version', *ROUTES] + (['/changes'] if feed is not None else [])
+                self.send_json(404, {'error': 'not found', 'routes': routes})
+                return
+
+            key = (path, tuple(sorted(params.items())), version)
+            entry = cache.get(key)
+            if entry is not None:
+                self.send_body(200, *entry, version=version, cache_state='hit')
+                return
+            try:
+                data = query(params, cache.store_dir)
+            except QueryError as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            entry = encode_response({'version': version, **data})
+            cache.put(key, entry)
+            self.send_body(200, *entry, version=version, cache_state='miss')
+
+        do_HEAD = do_GET
+
+    return ReadHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve range/boiler/metric queries over the boiler store')
+    parser.add_argument('--host', default=READ_API_HOST)
+    parser.add_argument('--port', type=int, default=READ_API_PORT)
+    parser.add_argument('--store', default=STORE_DIR, help='store directory (default: data/store)')
+    parser.add_argument('--cache-size', type=int, default=READ_API_CACHE_SIZE, help='cached responses to keep')
+    parser.add_argument('--changes', default=CHANGE_FEED_FILE, help='change feed file (default: data/change_feed.jsonl)')
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.store, size=args.cache_size)
+    feed = ChangeFeed(args.changes).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(cache, feed))
+    log(f"📡 Read API on http://{args.host}:{args.port} over {args.store} "
+        f"(version {cache.version()}, {'token required' if READ_API_TOKEN else 'no token'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        feed.stop()
+        log("🛑 Read API stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,173 +2,225 @@
 """
 One-time setup: Authenticate and get refresh token for OneDrive access.
 This refresh token will be stored in GitHub secrets and used for automatic sync.
+
+Runs the OAuth device-code flow: shows a URL and a code, then polls the
+token endpoint at the interval the server asked for (longer after
+`slow_down`) until the user has signed in or the code expires, so it
+finishes as soon as sign-in completes with nothing to press.
+
+The tokens go straight into the token cache the downloaders use
+(token_cache.py), and the refresh token is also written to
+azure_refresh_token.txt for the AZURE_REFRESH_TOKEN secret.
+
+Interactive:
+
+    python .github/scripts/setup_delegated_auth.py
+
+Headless (inputs from env or arguments, no prompts):
+
+    AZURE_TENANT_ID=... AZURE_CLIENT_ID=... \\
+        python .github/scripts/setup_delegated_auth.py --no-input --token-file ""
+
+AZURE_AUTHORITY_HOST and GRAPH_API_URL point the flow at another login /
+Graph host, e.g. a local mock token endpoint for testing.
 """
 
+import argparse
+import asyncio
 import os
 import sys
+import time
+
 import requests
-import json
-from datetime import datetime
 
-print("=" * 70)
-print("🔐 OneDrive Delegated Authentication Setup")
-print("=" * 70)
+from graph_client import GRAPH_URL, device_code_url, get_session, token_url
+from token_cache import DELEGATED_SCOPE, TokenCache, TokenError, default_store
+
+DEVICE_CODE_GRANT = 'urn:ietf:params:oauth:grant-type:device_code'
+DEFAULT_INTERVAL = 5    # seconds, when the server does not say
+DEFAULT_EXPIRES_IN = 900
+SLOW_DOWN_STEP = 5      # RFC 8628: add 5 seconds to the interval on slow_down
+TOKEN_FILE = 'azure_refresh_token.txt'
 
-# Get Azure app credentials
-TENANT_ID = input("\nEnter your AZURE_TENANT_ID: ").strip()
-CLIENT_ID = input("Enter your AZURE_CLIENT_ID: ").strip()
-CLIENT_SECRET = input("Enter your AZURE_CLIENT_SECRET: ").strip()
 
-if not TENANT_ID or not CLIENT_ID or not CLIENT_SECRET:
-    print("❌ Error: Tenant ID, Client ID, and Client Secret are required")
-    sys.exit(1)
+class DeviceCodeError(Exception):
+    """The device-code flow ended without tokens."""
 
-print(f"\n✅ Using Tenant: {TENANT_ID[:8]}...")
-print(f"✅ Using Client: {CLIENT_ID[:8]}...\n")
 
-# Step 1: Request device code
-print("📱 Step 1: Starting device code authentication flow...")
-print("-" * 70)
+def request_device_code(session, tenant_id, client_id, scope=DELEGATED_SCOPE):
+    response = session.post(device_code_url(tenant_id), data={'client_id': client_id, 'scope': scope})
+    if response.status_code != 200:
+        raise DeviceCodeError(f"Device code request failed: {response.status_code} {response.text[:200]}")
+    return response.json()
 
-device_code_url = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/devicecode"
 
-device_code_data = {
-    'client_id': CLIENT_ID,
-    'scope': 'Files.Read.All Sites.Read.All offline_access'
-}
+async def poll_for_token(session, tenant_id, client_id, device, client_secret=None,
+                         sleep=asyncio.sleep, clock=time.monotonic):
+    """
+    Poll the token endpoint until the user signs in. Waits `interval` between
+    polls (growing by SLOW_DOWN_STEP on slow_down) and gives up after
+    `expires_in`. Returns the token response JSON.
+    """
+    interval = int(device.get('interval') or DEFAULT_INTERVAL)
+    deadline = clock() + int(device.get('expires_in') or DEFAULT_EXPIRES_IN)
+    data = {'client_id': client_id, 'grant_type': DEVICE_CODE_GRANT, 'device_code': device['device_code']}
+    if client_secret:
+        data['client_secret'] = client_secret
+
+    polls = 0
+    while True:
+        await sleep(interval)
+        if clock() > deadline:
+            raise DeviceCodeError("Device code expired before sign-in completed. Please run the script again.")
+        polls += 1
+        try:
+            response = await asyncio.to_thread(session.post, token_url(tenant_id), data=data)
+            token_json = response.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"  Token poll failed ({e}), retrying...")
+            continue
+
+        if response.status_code == 200:
+            return token_json
+        error = token_json.get('error')
+        if error == 'authorization_pending':
+            if polls % 6 == 0:
+                print(f"  Still waiting... ({int(deadline - clock()) // 60} min left)")
+        elif error == 'slow_down':
+            interval += SLOW_DOWN_STEP
+            print(f"  Server asked to slow down, polling every {interval}s")
+        elif error == 'expired_token':
+            raise DeviceCodeError("Device code expired. Please run the script again.")
+        else:
+            raise DeviceCodeError(f"Token request failed: {error} {token_json.get('error_description', '')}".strip())
+
+
+def test_access(session, access_token):
+    print("\n🧪 Testing OneDrive access...")
+    response = session.get(f"{GRAPH_URL}/me/drive/root/children",
+                           headers={'Authorization': f'Bearer {access_token}'})
+    if response.status_code == 200:
+        print(f"✅ OneDrive access confirmed ({len(response.json().get('value', []))} files in root)")
+    else:
+        print(f"⚠️  OneDrive test failed: {response.status_code}")
+
+
+def print_next_steps(refresh_token, token_file, show_token):
+    print("\n" + "=" * 70)
+    print("🎉 SETUP COMPLETE!")
+    print("=" * 70)
+    print("\n📋 Next Steps:")
+    print("\n1. Go to your GitHub repository")
+    print("2. Navigate to: Settings → Secrets and variables → Actions")
+    print("3. Create a NEW secret:")
+    print("   Name: AZURE_REFRESH_TOKEN")
+    print(f"   Value: {'(copy from below)' if show_token else f'(contents of {token_file})'}")
+    if show_token:
+        print("\n" + "=" * 70)
+        print("REFRESH TOKEN (copy this):")
+        print("-" * 70)
+        print(refresh_token)
+        print("=" * 70)
+    if token_file:
+        print(f"\n✅ Token also saved to: {token_file}")
+    print("\n⚠️  IMPORTANT:")
+    print("   - Keep this token secret")
+    print("   - Don't commit it to Git")
+    print("   - It will be used for automatic OneDrive sync")
+    print("   - Valid as long as it's used at least once every 90 days")
+
+
+async def bootstrap(args):
+    session = get_session()
+
+    print("📱 Step 1: Starting device code authentication flow...")
+    print("-" * 70)
+    device = request_device_code(session, args.tenant_id, args.client_id, args.scope)
+    expires_in = int(device.get('expires_in') or DEFAULT_EXPIRES_IN)
 
-try:
-    response = requests.post(device_code_url, data=device_code_data, timeout=10)
-    
-    if response.status_code != 200:
-        print(f"❌ Device code request failed: {response.status_code}")
-        print(response.text)
-        sys.exit(1)
-    
-    device_code_response = response.json()
-    
-    user_code = device_code_response.get('user_code')
-    device_code = device_code_response.get('device_code')
-    verification_uri = device_code_response.get('verification_uri')
-    expires_in = device_code_response.get('expires_in', 900)
-    
     print("\n" + "=" * 70)
     print("🌐 AUTHENTICATION REQUIRED")
     print("=" * 70)
-    print(f"\n1. Open this URL in your browser:")
-    print(f"   {verification_uri}")
-    print(f"\n2. Enter this code:")
-    print(f"   {user_code}")
-    print(f"\n3. Sign in with your Microsoft account (the one with OneDrive access)")
+    print("\n1. Open this URL in your browser:")
+    print(f"   {device.get('verification_uri')}")
+    print("\n2. Enter this code:")
+    print(f"   {device.get('user_code')}")
+    print("\n3. Sign in with your Microsoft account (the one with OneDrive access)")
     print(f"\n⏱️  You have {expires_in // 60} minutes to complete this")
-    print("\n" + "=" * 70)
-    
-    input("\nPress ENTER after you've completed the authentication...")
-    
-    # Step 2: Poll for token
+    print("=" * 70, flush=True)
+
     print("\n🔄 Waiting for authentication...")
-    
-    token_url = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/token"
-    
-    token_data = {
-        'client_id': CLIENT_ID,
-        'client_secret': CLIENT_SECRET,
-        'grant_type': 'urn:ietf:params:oauth:grant-type:device_code',
-        'device_code': device_code
-    }
-    
-    max_attempts = 30
-    for attempt in range(max_attempts):
-        try:
-            token_response = requests.post(token_url, data=token_data, timeout=10)
-            token_json = token_response.json()
-            
-            if token_response.status_code == 200:
-                # Success!
-                access_token = token_json.get('access_token')
-                refresh_token = token_json.get('refresh_token')
-                
-                if not refresh_token:
-                    print("❌ No refresh token received")
-                    print("Make sure your Azure app has 'offline_access' scope")
-                    sys.exit(1)
-                
-                print("\n✅ Authentication successful!")
-                print("-" * 70)
-                
-                # Test the token
-                print("\n🧪 Testing OneDrive access...")
-                headers = {
-                    'Authorization': f'Bearer {access_token}',
-                    'Content-Type': 'application/json'
-                }
-                
-                test_url = "https://graph.microsoft.com/v1.0/me/drive/root/children"
-                test_response = requests.get(test_url, headers=headers, timeout=10)
-                
-                if test_response.status_code == 200:
-                    files = test_response.json().get('value', [])
-                    print(f"✅ OneDrive access confirmed ({len(files)} files in root)")
-                else:
-                    print(f"⚠️  OneDrive test failed: {test_response.status_code}")
-                
-                # Save to file for easy copy-paste
-                config_file = 'azure_refresh_token.txt'
-                with open(config_file, 'w') as f:
-                    f.write(f"AZURE_REFRESH_TOKEN={refresh_token}\n")
-                
-                print("\n" + "=" * 70)
-                print("🎉 SETUP COMPLETE!")
-                print("=" * 70)
-                print("\n📋 Next Steps:")
-                print("\n1. Go to your GitHub repository")
-                print("2. Navigate to: Settings → Secrets and variables → Actions")
-                print("3. Create a NEW secret:")
-                print(f"   Name: AZURE_REFRESH_TOKEN")
-                print(f"   Value: (copy from below)")
-                print("\n" + "=" * 70)
-                print("REFRESH TOKEN (copy this):")
-                print("-" * 70)
-                print(refresh_token)
-                print("=" * 70)
-                print(f"\n✅ Token also saved to: {config_file}")
-                print("\n⚠️  IMPORTANT:")
-                print("   - Keep this token secret")
-                print("   - Don't commit it to Git")
-                print("   - It will be used for automatic OneDrive sync")
-                print("   - Valid as long as it's used at least once every 90 days")
-                
-                sys.exit(0)
-                
-            elif token_json.get('error') == 'authorization_pending':
-                # Still waiting for user to authenticate
-                if attempt % 5 == 0:
-                    print(f"  Still waiting... ({attempt + 1}/{max_attempts})")
-                import time
-                time.sleep(5)
-                continue
-                
-            elif token_json.get('error') == 'expired_token':
-                print("❌ Device code expired. Please run the script again.")
-                sys.exit(1)
-                
-            else:
-                print(f"❌ Token request failed: {token_json.get('error')}")
-                print(token_json.get('error_description', ''))
-                sys.exit(1)
-                
-        except requests.exceptions.Timeout:
-            print("  Timeout, retrying...")
-            continue
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            sys.exit(1)
-    
-    print("❌ Timeout: No authentication completed within time limit")
-    sys.exit(1)
-    
-except Exception as e:
-    print(f"❌ Error: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+    token_json = await poll_for_token(session, args.tenant_id, args.client_id, device, args.client_secret)
+    refresh_token = token_json.get('refresh_token')
+    if not refresh_token:
+        raise DeviceCodeError("No refresh token received. Make sure your Azure app has 'offline_access' scope")
+    print("\n✅ Authentication successful!")
+    print("-" * 70)
+
+    if not args.no_cache:
+        TokenCache(args.tenant_id, args.client_id, store=default_store(), session=session,
+                   scope=args.scope).store_tokens(token_json)
+        print("💾 Tokens written to the token cache used by the downloaders")
+
+    if not args.no_test:
+        test_access(session, token_json.get('access_token'))
+
+    if args.token_file:
+        with open(args.token_file, 'w') as f:
+            f.write(f"AZURE_REFRESH_TOKEN={refresh_token}\n")
+    print_next_steps(refresh_token, args.token_file, args.show_token)
+
+
+def prompt_missing(args):
+    """Ask for credentials not given in the environment or arguments."""
+    if not args.tenant_id:
+        args.tenant_id = input("\nEnter your AZURE_TENANT_ID: ").strip()
+    if not args.client_id:
+        args.client_id = input("Enter your AZURE_CLIENT_ID: ").strip()
+    if args.client_secret is None:
+        args.client_secret = input("Enter your AZURE_CLIENT_SECRET (empty for a public client): ").strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Get a delegated OneDrive refresh token via device-code sign-in')
+    parser.add_argument('--tenant-id', default=os.getenv('AZURE_TENANT_ID'))
+    parser.add_argument('--client-id', default=os.getenv('AZURE_CLIENT_ID'))
+    parser.add_argument('--client-secret', default=os.getenv('AZURE_CLIENT_SECRET'),
+                        help='Only for confidential clients; public client flows need none')
+    parser.add_argument('--scope', default=DELEGATED_SCOPE)
+    parser.add_argument('--token-file', default=TOKEN_FILE, help='Where to save the refresh token ("" to skip)')
+    parser.add_argument('--no-input', action='store_true', help='Never prompt; fail if inputs are missing')
+    parser.add_argument('--no-cache', action='store_true', help="Don't write the token cache")
+    parser.add_argument('--no-test', action='store_true', help='Skip the OneDrive access test')
+    parser.add_argument('--show-token', action=argparse.BooleanOptionalAction, default=None,
+                        help='Print the refresh token (default: only on an interactive terminal)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🔐 OneDrive Delegated Authentication Setup")
+    print("=" * 70)
+
+    interactive = not args.no_input and sys.stdin.isatty()
+    if interactive:
+        prompt_missing(args)
+    if args.show_token is None:
+        args.show_token = interactive
+    if not args.tenant_id or not args.client_id:
+        print("❌ Error: Tenant ID and Client ID are required (AZURE_TENANT_ID / AZURE_CLIENT_ID or --tenant-id / --client-id)")
+        sys.exit(1)
+
+    print(f"\n✅ Using Tenant: {args.tenant_id[:8]}...")
+    print(f"✅ Using Client: {args.client_id[:8]}...\n")
+
+    try:
+        asyncio.run(bootstrap(args))
+    except KeyboardInterrupt:
+        print("\n⏹️  Cancelled")
+        sys.exit(1)
+    except (DeviceCodeError, TokenError, requests.RequestException) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
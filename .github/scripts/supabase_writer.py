@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Upsert the stored hourly and daily readings into Supabase via PostgREST.
+
+Rows are keyed on (boiler, reading_time) / (boiler, reading_date) and sent in
+large batches with `Prefer: resolution=merge-duplicates`, so re-syncing a
+month updates rows in place instead of duplicating them (see
+SQL_ADD_READING_KEYS.sql). Only rows whose content hash changed since the
+last successful sync are sent: months whose store version did not change are
+skipped outright, and within a changed month each row is compared with the
+hash recorded in SUPABASE_STATE_FILE.
+
+Runs that sent rows also upsert the latest reading into boiler_readings
+(keyed by reading_time) and log an admin_uploads record with rows_processed.
+
+SUPABASE_REST_URL points the writer at a plain PostgREST instead, e.g.
+http://localhost:3000 for a local Postgres + PostgREST stand-in.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+from excel_extract import BOILER_KEYS, FIRST_HOUR, METRICS, reading_timestamp
+from graph_client import get_session
+from sync_metrics import annotate, phase, start_run
+from sync_state import load_state, save_state
+from timeseries_store import (
+    DAILY_SUM,
+    HOURLY,
+    TIME_COLUMN,
+    column_name,
+    list_months,
+    load_month,
+    read_meta,
+)
+
+SUPABASE_URL = os.getenv('SUPABASE_URL', '').rstrip('/')
+SUPABASE_KEY = os.getenv('SUPABASE_KEY')
+SUPABASE_REST_URL = os.getenv('SUPABASE_REST_URL') or (f"{SUPABASE_URL}/rest/v1" if SUPABASE_URL else None)
+SUPABASE_STATE_FILE = Path(os.getenv('SUPABASE_STATE_FILE', 'data/supabase_sync.json'))
+
+BATCH_SIZE = 1000
+
+HOURLY_TABLE = 'boiler_hourly_readings'
+DAILY_TABLE = 'boiler_daily_readings'
+SNAPSHOT_TABLE = 'boiler_readings'
+UPLOADS_TABLE = 'admin_uploads'
+
+# Store metric -> database column
+DB_COLUMNS = {
+    'steam': 'steam',
+    'ng': 'ng',
+    'ratio': 'ratio',
+    'output': 'output',
+    'water': 'water',
+    'waterSteam': 'water_steam',
+    'electricSteam': 'electric_steam',
+}
+
+# table -> (time column, on_conflict key, store kind)
+TABLES = {
+    HOURLY_TABLE: ('reading_time', 'boiler,reading_time', HOURLY),
+    DAILY_TABLE: ('reading_date', 'boiler,reading_date', DAILY_SUM),
+}
+
+
+class SupabaseError(Exception):
+    """PostgREST rejected a request."""
+
+
+def _number(value):
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def table_rows(columns, time_column):
+    """Long-format rows (one per boiler per timestamp) from store columns."""
+    times = [str(value) for value in columns[TIME_COLUMN]]
+    for boiler in BOILER_KEYS:
+        values = {
+            DB_COLUMNS[metric]: columns[column_name(boiler, metric)].tolist()
+            for metric in METRICS
+        }
+        for position, moment in enumerate(times):
+            yield {
+                'boiler': boiler,
+                time_column: moment,
+                **{name: _number(series[position]) for name, series in values.items()},
+            }
+
+
+def row_hash(row):
+    return hashlib.sha256(json.dumps(row, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class SupabaseWriter:
+    """Batching PostgREST client with a row-hash ledger."""
+
+    def __init__(self, rest_url=SUPABASE_REST_URL, key=SUPABASE_KEY, session=None,
+                 state_file=SUPABASE_STATE_FILE, batch_size=BATCH_SIZE):
+        self.rest_url = rest_url.rstrip('/')
+        self.session = session or get_session()
+        self.headers = {'Content-Type': 'application/json'}
+        if key:
+            self.headers.update({'apikey': key, 'Authorization': f'Bearer {key}'})
+        self.state_file = Path(state_file)
+        self.batch_size = batch_size
+        self.ledger = load_state(self.state_file)
+
+    def post(self, table, rows, on_conflict=None):
+        params = {'on_conflict': on_conflict} if on_conflict else None
+        prefer = 'return=minimal'
+        if on_conflict:
+            prefer = 'resolution=merge-duplicates,' + prefer
+        response = self.session.post(
+            f"{self.rest_url}/{table}",
+            params=params,
+            headers={**self.headers, 'Prefer': prefer},
+            data=json.dumps(rows),
+        )
+        if response.status_code not in (200, 201, 204):
+            raise SupabaseError(f"{table}: {response.status_code} {response.text[:300]}")
+
+    def upsert(self, table, rows, on_conflict):
+        """Send rows in batches. Returns the number of rows written."""
+        for start in range(0, len(rows), self.batch_size):
+            self.post(table, rows[start:start + self.batch_size], on_conflict)
+        return len(rows)
+
+    def sync_month(self, month, store_dir=None):
+        """Upsert the changed rows of one store partition. Returns rows sent per table."""
+        kwargs = {'store_dir': store_dir} if store_dir else {}
+        version = read_meta(month, **kwargs)['version']
+        ledger = self.ledger.setdefault('months', {}).setdefault(month, {})
+        if ledger.get('version') == version:
+            return {}
+
+        sent = {}
+        for table, (time_column, on_conflict, kind) in TABLES.items():
+            hashes = ledger.setdefault(table, {})
+            changed = []
+            changed_hashes = {}
+            for row in table_rows(load_month(month, kind=kind, **kwargs), time_column):
+                key = f"{row['boiler']}|{row[time_column]}"
+                digest = row_hash(row)
+                if hashes.get(key) != digest:
+                    changed.append(row)
+                    changed_hashes[key] = digest
+            sent[table] = self.upsert(table, changed, on_conflict)
+            # Only remember rows PostgREST accepted
+            hashes.update(changed_hashes)
+            save_state(self.ledger, self.state_file)
+
+        ledger['version'] = version
+        ledger['syncedAt'] = datetime.now().isoformat()
+        save_state(self.ledger, self.state_file)
+        return sent
+
+    def upsert_snapshot(self, summary):
+        """Latest reading in the legacy boiler_readings shape, keyed by its hour."""
+        boilers = {boiler['id']: boiler for boiler in summary['boilers']}
+        # 0000-0700 readings belong to the report day but fall on the next calendar day
+        hour_index = (int(summary['readingTime'][:2]) - FIRST_HOUR) % 24
+        reading_time = reading_timestamp(date.fromisoformat(summary['readingDate']), hour_index)
+        row = {
+            'reading_time': reading_time,
+            'b1_steam': boilers[1]['steam'],
+            'b2_steam': boilers[2]['steam'],
+            'b3_steam': boilers[3]['steam'],
+            'b1_water': boilers[1]['water'],
+            'b2_water': boilers[2]['water'],
+            'b3_water': boilers[3]['water'],
+            'ng_ratio': boilers[1]['ng'],
+            'created_at': summary['timestamp'],
+        }
+        self.post(SNAPSHOT_TABLE, [row], on_conflict='reading_time')
+
+    def log_upload(self, file_name, rows_processed, status='success'):
+        self.post(UPLOADS_TABLE, [{
+            'file_name': file_name,
+            'uploaded_by': 'github_sync',
+            'rows_processed': rows_processed,
+            'status': status,
+        }])
+
+
+def sync_store(writer, months=None, store_dir=None):
+    """Sync every (or the given) store month. Returns (rows sent, sources)."""
+    kwargs = {'store_dir': store_dir} if store_dir else {}
+    total = 0
+    sources = []
+    for month in months or list_months(**kwargs):
+        with phase('upsert'):
+            sent = writer.sync_month(month, store_dir)
+        rows = sum(sent.values())
+        if rows:
+            total += rows
+            sources.append(read_meta(month, **kwargs).get('source') or month)
+            print(f"  {month}: {sent.get(HOURLY_TABLE, 0)} hourly, {sent.get(DAILY_TABLE, 0)} daily rows upserted")
+    return total, sources
+
+
+def main():
+    print('🔄 Syncing stored readings to Supabase...')
+
+    if not SUPABASE_REST_URL:
+        print('❌ Missing Supabase environment variables')
+        print('   Please set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY secrets')
+        sys.exit(1)
+
+    writer = SupabaseWriter()
+    try:
+        total, sources = sync_store(writer)
+        annotate(rows=total)
+        if total:
+            summary_path = Path(os.getenv('BOILER_PUBLIC_DIR', 'public')) / 'boiler_data.json'
+            if summary_path.exists():
+                with open(summary_path, 'r', encoding='utf-8') as f:
+                    writer.upsert_snapshot(json.load(f))
+            writer.log_upload(', '.join(sources), total)
+    except SupabaseError as e:
+        print(f"❌ {e}")
+        try:
+            writer.log_upload('data/boiler_data.xlsx', 0, status='failed')
+        except SupabaseError:
+            pass
+        sys.exit(1)
+
+    if total:
+        print(f"✅ {total} changed rows upserted")
+    else:
+        print('✅ Supabase already up to date')
+    print(f"📅 Timestamp: {datetime.now().isoformat()}")
+
+
+if __name__ == '__main__':
+    with start_run('supabase_writer'):
+        main()
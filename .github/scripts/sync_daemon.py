@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Long-running sync service: polls the workbook's Graph metadata every
+SYNC_INTERVAL seconds and only downloads and publishes when it changed.
+
+Unlike the hourly workflow, the process stays up, so the token cache, the
+pooled HTTP session (graph_client.get_session), the parsed sync state and
+the last extract are kept in memory between polls; the state and extract
+cache files are still written after each change, but only read at startup.
+An unchanged poll is one metadata request (or one delta request with
+ONEDRIVE_FILE_NAME=latest). The daemon owns data/sync_state.json while it
+runs, so don't point other sync scripts at the same file meanwhile.
+
+Runs anywhere Python does, e.g. on the PC next to the source workbook:
+
+    python .github/scripts/sync_daemon.py --interval 60
+    python .github/scripts/sync_daemon.py --after "node .github/scripts/parse_hourly_data.js"
+
+Blocking work (HTTP, openpyxl) runs in worker threads via asyncio.to_thread.
+Failures back off exponentially up to --max-backoff, then return to the
+normal interval after the next successful poll. Ctrl+C / SIGTERM stop it.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import signal
+import sys
+import time
+from datetime import datetime
+
+from download_from_graph_api import (
+    CLIENT_ID,
+    FORCE_DOWNLOAD,
+    REFRESH_TOKEN,
+    TENANT_ID,
+    UNCHANGED,
+    download_via_graph,
+)
+from excel_extract import ExtractError
+from publish_boiler_data import publish
+from sync_state import load_state
+from token_cache import TokenCache, TokenError
+
+SYNC_INTERVAL = float(os.getenv('SYNC_INTERVAL', '60'))
+SYNC_MAX_BACKOFF = float(os.getenv('SYNC_MAX_BACKOFF', '900'))
+SYNC_AFTER_COMMAND = os.getenv('SYNC_AFTER_COMMAND')
+
+# Spread polls a little so several instances never line up
+POLL_JITTER = 0.1
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+
+class SyncDaemon:
+    """Poll/download/publish loop sharing one token cache for its whole life."""
+
+    def __init__(self, token_cache, interval=SYNC_INTERVAL, max_backoff=SYNC_MAX_BACKOFF,
+                 after_command=SYNC_AFTER_COMMAND):
+        self.token_cache = token_cache
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.after_command = after_command
+        self.failures = 0
+        self.polls = 0
+        self.published = 0
+        self.last_change = None
+        # Set between a download and its successful publish. download_via_graph
+        # has already recorded the new eTag, so a failed publish is retried
+        # on the next poll even though the workbook then looks unchanged.
+        self.publish_pending = False
+        # Parsed once and shared by download and publish, so neither re-reads the files
+        self.state = load_state()
+        self.warm = {}
+        self._stop = asyncio.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    async def poll_once(self, force=False):
+        """
+        One metadata check; download and publish if the workbook changed (or
+        force), or publish again if the last publish failed.
+        """
+        self.polls += 1
+        access_token = await asyncio.to_thread(self.token_cache.get_access_token)
+        result = await asyncio.to_thread(download_via_graph, access_token, force, self.state)
+
+        if result is None:
+            # Most often an expired/revoked access token: refresh on the next poll
+            self.token_cache.invalidate()
+            raise RuntimeError("Graph lookup or download failed")
+        if result == UNCHANGED and not self.publish_pending:
+            return False
+
+        self.publish_pending = True
+        started = time.perf_counter()
+        summary = await asyncio.to_thread(publish, state=self.state, warm=self.warm)
+        self.publish_pending = False
+        self.published += 1
+        self.last_change = datetime.now()
+        log(f"📊 Published reading {summary['readingDate']} {summary['readingTime']}hrs "
+            f"in {time.perf_counter() - started:.2f}s")
+
+        if self.after_command:
+            await self.run_after_command()
+        return True
+
+    async def run_after_command(self):
+        process = await asyncio.create_subprocess_shell(self.after_command)
+        code = await process.wait()
+        if code != 0:
+            log(f"⚠️ After-command exited with {code}: {self.after_command}")
+
+    def next_delay(self):
+        """Normal interval with jitter, or exponential backoff after failures."""
+        delay = self.interval
+        if self.failures:
+            delay = min(self.interval * 2 ** self.failures, self.max_backoff)
+        return delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+    async def run(self, once=False):
+        log(f"🔄 Sync daemon started (interval {self.interval:.0f}s)")
+        force = FORCE_DOWNLOAD
+        while not self._stop.is_set():
+            try:
+                changed = await self.poll_once(force=force)
+                force = False
+                self.failures = 0
+                if changed:
+                    log("✅ Workbook changed - dashboard data updated")
+            except (TokenError, ExtractError) as e:
+                self.failures += 1
+                log(f"⚠️ {e}")
+            except Exception as e:
+                self.failures += 1
+                log(f"⚠️ Poll failed: {e}")
+
+            if once:
+                break
+            delay = self.next_delay()
+            if self.failures:
+                log(f"⏳ Retrying in {delay:.0f}s (failure {self.failures})")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+        log(f"🛑 Sync daemon stopped after {self.polls} polls, {self.published} publishes")
+        return self.failures == 0
+
+
+async def serve(args, token_cache):
+    daemon = SyncDaemon(token_cache, interval=args.interval, max_backoff=args.max_backoff,
+                        after_command=args.after)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, daemon.stop)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops have no signal handlers; Ctrl+C still raises KeyboardInterrupt
+            pass
+    return await daemon.run(once=args.once)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep public/ in sync with the OneDrive workbook')
+    parser.add_argument('--interval', type=float, default=SYNC_INTERVAL, help='Seconds between metadata polls')
+    parser.add_argument('--max-backoff', type=float, default=SYNC_MAX_BACKOFF, help='Longest delay after failures')
+    parser.add_argument('--after', default=SYNC_AFTER_COMMAND, help='Shell command to run after each publish')
+    parser.add_argument('--once', action='store_true', help='Poll a single time and exit')
+    args = parser.parse_args()
+
+    if not (TENANT_ID and CLIENT_ID):
+        print("❌ AZURE_TENANT_ID and AZURE_CLIENT_ID are required")
+        sys.exit(1)
+    token_cache = TokenCache(TENANT_ID, CLIENT_ID, REFRESH_TOKEN)
+    if not token_cache.has_refresh_token():
+        print("❌ No refresh token: set AZURE_REFRESH_TOKEN or run setup_delegated_auth.py first")
+        sys.exit(1)
+
+    try:
+        ok = asyncio.run(serve(args, token_cache))
+    except KeyboardInterrupt:
+        ok = True
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Per-run timing and transfer metrics for the sync scripts.
+
+A run times named phases (token, lookup, download, extract, ...), counts
+bytes transferred, HTTP status codes seen by the shared session (retried
+attempts included, so Graph throttling shows up as 429s) and the session's
+retry count. When the run ends one JSON line is appended to
+SYNC_METRICS_FILE:
+
+    {"script": "download_from_graph_api", "outcome": "ok", "result": "downloaded",
+     "durationSeconds": 2.41, "phases": {"token": 0.31, "lookup": 0.22, ...},
+     "bytes": 94877, "httpStatuses": {"200": 3}, "retries": 0, ...}
+
+With SYNC_METRICS_PROM_DIR set, the same run is also written as a Prometheus
+textfile (boiler_sync_<script>.prom) for node_exporter's textfile collector.
+
+    with start_run('download_from_graph_api') as run:
+        main()
+
+Code running inside a run uses the module-level phase(), add_bytes() and
+annotate(), which do nothing when no run is active. `python sync_metrics.py`
+prints p50/p95 durations per script and phase from the JSON lines.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SYNC_METRICS_FILE = Path(os.getenv('SYNC_METRICS_FILE', 'data/sync_metrics.jsonl'))
+SYNC_METRICS_PROM_DIR = os.getenv('SYNC_METRICS_PROM_DIR')
+
+PROM_PREFIX = 'boiler_sync'
+
+# start_run() default: instrument graph_client's shared session
+SHARED_SESSION = object()
+
+_current = None
+
+
+class SyncRun:
+    """Metrics of one script invocation. Thread-safe, so racing sources can share it."""
+
+    def __init__(self, script, metrics_file=SYNC_METRICS_FILE, prom_dir=SYNC_METRICS_PROM_DIR):
+        self.script = script
+        self.metrics_file = Path(metrics_file) if metrics_file else None
+        self.prom_dir = Path(prom_dir) if prom_dir else None
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.phases = defaultdict(float)
+        self.bytes = 0
+        self.statuses = Counter()
+        self.fields = {}
+        self.outcome = None
+        self.sessions = []
+        self.closed = False
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - begin
+            with self.lock:
+                self.phases[name] += elapsed
+
+    def add_bytes(self, count):
+        with self.lock:
+            self.bytes += count or 0
+
+    def annotate(self, **fields):
+        with self.lock:
+            self.fields.update(fields)
+
+    def on_response(self, response, *args, **kwargs):
+        """requests response hook: count status codes, one per attempt."""
+        with self.lock:
+            self.statuses[str(response.status_code)] += 1
+
+    def instrument(self, session):
+        """Hook a requests session; retries are counted from its current retry_count on."""
+        session.hooks['response'].append(self.on_response)
+        self.sessions.append((session, getattr(session, 'retry_count', 0)))
+
+    def retries(self):
+        return sum(getattr(session, 'retry_count', 0) - baseline for session, baseline in self.sessions)
+
+    def record(self):
+        return {
+            'script': self.script,
+            'startedAt': self.started_at.isoformat(),
+            'outcome': self.outcome or 'failed',
+            'durationSeconds': round(time.perf_counter() - self.started, 3),
+            'phases': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            'bytes': self.bytes,
+            'httpStatuses': dict(sorted(self.statuses.items())),
+            'retries': self.retries(),
+            **self.fields,
+        }
+
+    def close(self, outcome=None):
+        """Write the run once (later calls are ignored). Returns the record."""
+        global _current
+        if self.closed:
+            return None
+        self.closed = True
+        if outcome:
+            self.outcome = outcome
+        if _current is self:
+            _current = None
+
+        record = self.record()
+        try:
+            if self.metrics_file:
+                self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.metrics_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, sort_keys=True) + '\n')
+            if self.prom_dir:
+                write_textfile(record, self.prom_dir)
+        except OSError as e:
+            # Metrics must never fail a sync
+            print(f"⚠️ Could not write sync metrics: {e}")
+        return record
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.outcome is None:
+            if exc_type is None or (exc_type is SystemExit and exc.code in (0, None)):
+                self.outcome = 'ok'
+            else:
+                self.outcome = 'failed'
+        self.close()
+        return False
+
+
+def start_run(script, session=SHARED_SESSION, **kwargs):
+    """
+    Begin a run and make it current. It is written when used as a context
+    manager exits, on close(), or at interpreter exit, whichever comes first.
+    `session` defaults to the shared graph_client session; pass None for
+    scripts that make no HTTP calls (and may run without `requests`).
+    """
+    global _current
+    if session is SHARED_SESSION:
+        from graph_client import get_session
+        session = get_session()
+
+    run = SyncRun(script, **kwargs)
+    if session is not None:
+        run.instrument(session)
+    _current = run
+    atexit.register(run.close)
+    return run
+
+
+def phase(name):
+    """Time a block under the current run (no-op without one)."""
+    return _current.phase(name) if _current else nullcontext()
+
+
+def add_bytes(count):
+    if _current:
+        _current.add_bytes(count)
+
+
+def annotate(**fields):
+    if _current:
+        _current.annotate(**fields)
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def write_textfile(record, prom_dir):
+    """Write the run as Prometheus gauges, atomically (the collector may read at any time)."""
+    script = record['script']
+    lines = []
+
+    def gauge(name, help_text, samples):
+        lines.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROM_PREFIX}_{name} gauge")
+        for labels, value in samples:
+            lines.append(f"{PROM_PREFIX}_{name}{{{_labels(script=script, **labels)}}} {value}")
+
+    gauge('last_run_timestamp_seconds', 'Start of the last sync run.',
+          [({}, round(datetime.fromisoformat(record['startedAt']).timestamp(), 3))])
+    gauge('success', 'Whether the last sync run succeeded.', [({}, int(record['outcome'] == 'ok'))])
+    gauge('duration_seconds', 'Wall time of the last sync run.', [({}, record['durationSeconds'])])
+    gauge('phase_seconds', 'Time spent per phase in the last sync run.',
+          [({'phase': name}, seconds) for name, seconds in sorted(record['phases'].items())])
+    gauge('bytes', 'Bytes transferred in the last sync run.', [({}, record['bytes'])])
+    gauge('http_responses', 'HTTP responses by status code in the last sync run.',
+          [({'code': code}, count) for code, count in record['httpStatuses'].items()])
+    gauge('retries', 'HTTP retries in the last sync run.', [({}, record['retries'])])
+
+    prom_dir = Path(prom_dir)
+    prom_dir.mkdir(parents=True, exist_ok=True)
+    path = prom_dir / f"{PROM_PREFIX}_{script}.prom"
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path)
+
+
+def load_records(path=SYNC_METRICS_FILE, since=None):
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a run killed mid-write
+                if since is None or record.get('startedAt', '') >= since.isoformat():
+                    records.append(record)
+    except OSError:
+        pass
+    return records
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def summarize(records):
+    """{script: {'runs', 'failed', 'p50', 'p95', 'phases': {phase: (p50, p95)}}}"""
+    by_script = defaultdict(list)
+    for record in records:
+        by_script[record['script']].append(record)
+
+    summary = {}
+    for script, runs in sorted(by_script.items()):
+        durations = [run['durationSeconds'] for run in runs]
+        phases = defaultdict(list)
+        for run in runs:
+            for name, seconds in run.get('phases', {}).items():
+                phases[name].append(seconds)
+        summary[script] = {
+            'runs': len(runs),
+            'failed': sum(run.get('outcome') != 'ok' for run in runs),
+            'p50': percentile(durations, 0.5),
+            'p95': percentile(durations, 0.95),
+            'phases': {name: (percentile(values, 0.5), percentile(values, 0.95))
+                       for name, values in sorted(phases.items())},
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarise sync run metrics (p50/p95 per phase).')
+    parser.add_argument('--file', default=SYNC_METRICS_FILE, help='JSON lines written by the sync scripts')
+    parser.add_argument('--days', type=int, default=28, help='only runs from the last N days (0 for all)')
+    args = parser.parse_args()
+
+    since = datetime.now() - timedelta(days=args.days) if args.days else None
+    records = load_records(args.file, since)
+    if not records:
+        print(f"No sync runs recorded in {args.file}")
+        return
+
+    for script, stats in summarize(records).items():
+        print(f"{script}: {stats['runs']} runs, {stats['failed']} failed, "
+              f"p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s")
+        for name, (p50, p95) in stats['phases'].items():
+            print(f"   {name:<12} p50 {p50:.2f}s  p95 {p95:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
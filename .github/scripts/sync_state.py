@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Small JSON state file shared by the sync scripts.
+Remembers what was downloaded last time so unchanged workbooks can be skipped.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+SYNC_STATE_FILE = Path(os.getenv('SYNC_STATE_FILE', 'data/sync_state.json'))
+
+# Drive item fields that change whenever the workbook changes on OneDrive
+ITEM_FIELDS = ('id', 'eTag', 'cTag', 'size', 'lastModifiedDateTime')
+
+
+def load_state(path=SYNC_STATE_FILE):
+    """Load the sync state, returning an empty dict if missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=SYNC_STATE_FILE):
+    """Write the sync state atomically so a crash never leaves half a file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file, or None if it does not exist."""
+    try:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+def item_fingerprint(item):
+    """Pick the change-tracking fields out of a Graph driveItem."""
+    return {field: item.get(field) for field in ITEM_FIELDS}
+
+
+def item_unchanged(previous, item, local_path):
+    """
+    True when the drive item metadata matches what we last downloaded
+    and the local copy is still the exact file we saved.
+    """
+    if not previous or not previous.get('sha256'):
+        return False
+    if any(previous.get(field) != item.get(field) for field in ITEM_FIELDS):
+        return False
+    return file_sha256(local_path) == previous['sha256']
+
+
+def set_output(name, value):
+    """Expose a step output to GitHub Actions (no-op when run locally)."""
+    output_file = os.getenv('GITHUB_OUTPUT')
+    if output_file:
+        with open(output_file, 'a', encoding='utf-8') as f:
+            f.write(f"{name}={value}\n")
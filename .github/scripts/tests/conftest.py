@@ -0,0 +1,72 @@
+"""
+Shared fixtures: the sync scripts are imported as top-level modules (as the
+workflows run them), and HTTP dependencies are replaced by small
+http.server stand-ins on localhost. Run with
+
+    python -m pytest .github/scripts/tests
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Records each request and answers with server.respond(handler)."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle_request(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+        # The handler is reused across a keep-alive connection, so keep a copy
+        self.server.requests.append(SimpleNamespace(
+            method=self.command, path=self.path, headers=dict(self.headers), body=self.body))
+        self.server.respond(self)
+
+    do_GET = do_POST = handle_request
+
+    def send_body(self, status, body=b'', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+            headers = {'Content-Type': 'application/json', **(headers or {})}
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def stand_in():
+    """
+    Start a localhost HTTP server answering with `respond(handler)`.
+    Returns (base URL, server); server.requests lists what was received
+    (method, path, headers, body).
+    """
+    servers = []
+
+    def start(respond):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        server.daemon_threads = True
+        server.requests = []
+        server.respond = respond
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}", server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
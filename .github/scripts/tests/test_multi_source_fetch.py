@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from benchmark_sync import generate_workbook
+from download_utils import DownloadCancelled, DownloadError
+from multi_source_fetch import FetchResult, FileSource, UrlSource, race
+from workbook_validator import validate_workbook
+
+XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+@pytest.fixture(scope='module')
+def workbook(tmp_path_factory):
+    path = tmp_path_factory.mktemp('source') / 'report.xlsx'
+    generate_workbook(path, 2026, 1, 1, seed=1)
+    return path
+
+
+def serve_workbook(body, chunk_delay=0.0, last_modified='Wed, 01 Jan 2025 00:00:00 GMT'):
+    """Stand-in share link; records in `aborted` when the client hangs up mid-body."""
+    aborted = threading.Event()
+
+    def respond(handler):
+        if handler.path == '/expired':
+            handler.send_body(200, b'<html>link expired</html>', {'Content-Type': 'text/html'})
+            return
+        handler.send_response(200)
+        handler.send_header('Content-Type', XLSX)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.send_header('Last-Modified', last_modified)
+        handler.end_headers()
+        try:
+            for start in range(0, len(body), 64 * 1024):
+                time.sleep(chunk_delay)
+                handler.wfile.write(body[start:start + 64 * 1024])
+                handler.wfile.flush()
+        except OSError:
+            aborted.set()
+            handler.close_connection = True
+
+    return respond, aborted
+
+
+class WaitingSource:
+    """Never finishes on its own; records whether the race cancelled it."""
+
+    def __init__(self, name):
+        self.name = name
+        self.cancelled = threading.Event()
+
+    def fetch(self, dest, cancel):
+        if not cancel.wait(10):
+            raise DownloadError("never cancelled")
+        self.cancelled.set()
+        raise DownloadCancelled("cancelled")
+
+
+def leftovers(dest):
+    return sorted(path.name for path in dest.parent.iterdir() if path != dest)
+
+
+def test_fastest_source_wins_and_losers_are_cancelled(stand_in, workbook, tmp_path):
+    # Several read chunks long, so the transfer is still running when smb wins
+    respond, aborted = serve_workbook(b'PK' + bytes(4 * 1024 * 1024), chunk_delay=0.05)
+    base_url, _ = stand_in(respond)
+    slow_link = UrlSource('share', [f"{base_url}/report.xlsx"], validate=validate_workbook,
+                          session=requests.Session())
+    waiting = WaitingSource('graph')
+    dest = tmp_path / 'out' / 'boiler_data.xlsx'
+    state = {}
+
+    started = time.monotonic()
+    winner = race([slow_link, waiting, FileSource('smb', workbook, validate=validate_workbook)],
+                  dest, state, grace=0, hedge=0)
+
+    assert winner.source == 'smb'
+    assert time.monotonic() - started < 2
+    assert dest.read_bytes() == workbook.read_bytes()
+    assert waiting.cancelled.is_set()
+    assert aborted.wait(5), "share download was not abandoned"
+    assert leftovers(dest) == []
+    # Cancelled losers are not held against the source
+    assert state['sources']['smb'] == {**state['sources']['smb'], 'attempts': 1, 'successes': 1, 'wins': 1}
+    assert 'share' not in state['sources'] and 'graph' not in state['sources']
+
+
+def test_invalid_copy_loses_to_a_valid_one(stand_in, workbook, tmp_path):
+    respond, _ = serve_workbook(workbook.read_bytes())
+    base_url, _ = stand_in(respond)
+    expired = UrlSource('share', [f"{base_url}/expired"], validate=validate_workbook, session=requests.Session())
+    dest = tmp_path / 'boiler_data.xlsx'
+    state = {}
+
+    winner = race([expired, FileSource('smb', workbook, validate=validate_workbook)], dest, state, hedge=0)
+
+    assert winner.source == 'smb'
+    assert state['sources']['share']['successes'] == 0
+    assert state['sources']['share']['lastError']
+    assert leftovers(dest) == []
+
+
+def test_fresher_copy_wins_within_grace(stand_in, workbook, tmp_path):
+    respond, _ = serve_workbook(workbook.read_bytes(), last_modified='Wed, 01 Jan 2031 00:00:00 GMT')
+    base_url, _ = stand_in(respond)
+    fresh_link = UrlSource('share', [f"{base_url}/report.xlsx"], validate=validate_workbook,
+                           session=requests.Session())
+    state = {}
+
+    winner = race([FileSource('smb', workbook), fresh_link], tmp_path / 'boiler_data.xlsx', state,
+                  grace=2, hedge=0.1)
+
+    assert winner.source == 'share'
+    assert state['sources']['smb']['successes'] == 1 and state['sources']['smb']['wins'] == 0
+
+
+def test_unchanged_result_ends_the_race(tmp_path):
+    class Unchanged:
+        name = 'graph'
+
+        def fetch(self, dest, cancel):
+            return FetchResult(source=self.name, unchanged=True)
+
+    waiting = WaitingSource('share')
+    started = time.monotonic()
+    winner = race([Unchanged(), waiting], tmp_path / 'boiler_data.xlsx', {}, hedge=0.5)
+
+    assert winner.unchanged
+    # The hedged second source is either never started or stopped at once
+    assert time.monotonic() - started < 2
+
+
+def test_all_sources_failing_raises(tmp_path):
+    state = {}
+    with pytest.raises(DownloadError, match='All sources failed'):
+        race([FileSource('smb', tmp_path / 'missing.xlsx'), FileSource('usb', tmp_path / 'gone.xlsx')],
+             tmp_path / 'boiler_data.xlsx', state, hedge=0)
+    assert {name: stats['attempts'] for name, stats in state['sources'].items()} == {'smb': 1, 'usb': 1}
@@ -0,0 +1,108 @@
+import asyncio
+import importlib
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+
+import graph_client
+from setup_delegated_auth import DEVICE_CODE_GRANT, SLOW_DOWN_STEP, DeviceCodeError, poll_for_token
+
+TENANT = 'tenant-id'
+CLIENT = 'client-id'
+
+
+@pytest.fixture
+def token_endpoint(stand_in, monkeypatch):
+    """
+    Mock login host reached through AZURE_AUTHORITY_HOST. Answers token polls
+    with the queued (status, body) pairs, repeating the last one.
+    """
+    replies = []
+
+    def respond(handler):
+        status, body = replies.pop(0) if len(replies) > 1 else replies[0]
+        handler.send_body(status, body)
+
+    base_url, server = stand_in(respond)
+    monkeypatch.setenv('AZURE_AUTHORITY_HOST', base_url)
+    importlib.reload(graph_client)
+    yield replies, server
+    monkeypatch.delenv('AZURE_AUTHORITY_HOST')
+    importlib.reload(graph_client)
+
+
+class FakeClock:
+    """Virtual time: sleep() advances the clock instead of waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def poll(device, clock):
+    return asyncio.run(poll_for_token(requests.Session(), TENANT, CLIENT, device,
+                                      sleep=clock.sleep, clock=clock))
+
+
+def pending():
+    return 400, {'error': 'authorization_pending'}
+
+
+def test_pending_until_signed_in(token_endpoint):
+    replies, server = token_endpoint
+    replies += [pending(), pending(), (200, {'access_token': 'at', 'refresh_token': 'rt'})]
+    clock = FakeClock()
+
+    tokens = poll({'device_code': 'dc', 'interval': 3, 'expires_in': 900}, clock)
+
+    assert tokens['refresh_token'] == 'rt'
+    assert clock.sleeps == [3, 3, 3]
+    assert [request.path for request in server.requests] == [f"/{TENANT}/oauth2/v2.0/token"] * 3
+    form = parse_qs(server.requests[0].body.decode())
+    assert form == {'client_id': [CLIENT], 'grant_type': [DEVICE_CODE_GRANT], 'device_code': ['dc']}
+
+
+def test_slow_down_lengthens_the_interval(token_endpoint):
+    replies, _ = token_endpoint
+    replies += [(400, {'error': 'slow_down'}), pending(), (200, {'refresh_token': 'rt'})]
+    clock = FakeClock()
+
+    poll({'device_code': 'dc', 'interval': 5, 'expires_in': 900}, clock)
+
+    assert clock.sleeps == [5, 5 + SLOW_DOWN_STEP, 5 + SLOW_DOWN_STEP]
+
+
+def test_expired_token_stops_polling(token_endpoint):
+    replies, server = token_endpoint
+    replies += [pending(), (400, {'error': 'expired_token'})]
+
+    with pytest.raises(DeviceCodeError, match='expired'):
+        poll({'device_code': 'dc', 'interval': 1, 'expires_in': 900}, FakeClock())
+    assert len(server.requests) == 2
+
+
+def test_gives_up_at_expires_in_without_polling_again(token_endpoint):
+    replies, server = token_endpoint
+    replies.append(pending())
+    clock = FakeClock()
+
+    with pytest.raises(DeviceCodeError, match='expired'):
+        poll({'device_code': 'dc', 'interval': 5, 'expires_in': 12}, clock)
+    assert len(server.requests) == 2
+    assert clock.now == 15
+
+
+def test_declined_sign_in_is_an_error(token_endpoint):
+    replies, _ = token_endpoint
+    replies.append((400, {'error': 'authorization_declined', 'error_description': 'User said no'}))
+
+    with pytest.raises(DeviceCodeError, match='authorization_declined User said no'):
+        poll({'device_code': 'dc', 'interval': 1}, FakeClock())
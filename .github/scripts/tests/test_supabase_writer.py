@@ -0,0 +1,80 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+
+from benchmark_sync import generate_workbook
+from excel_extract import extract_workbook
+from supabase_writer import DAILY_TABLE, HOURLY_TABLE, SupabaseError, SupabaseWriter
+from timeseries_store import write_month
+
+
+def accept(handler):
+    handler.send_body(201)
+
+
+def posted(server):
+    """(table, on_conflict, Prefer, rows) for each request the stand-in got."""
+    calls = []
+    for request in server.requests:
+        url = urlsplit(request.path)
+        on_conflict = parse_qs(url.query).get('on_conflict', [None])[0]
+        calls.append((url.path.lstrip('/'), on_conflict, request.headers['Prefer'], json.loads(request.body)))
+    return calls
+
+
+def make_writer(base_url, tmp_path, batch_size=1000):
+    return SupabaseWriter(rest_url=base_url, key='service-key', session=requests.Session(),
+                          state_file=tmp_path / 'supabase_sync.json', batch_size=batch_size)
+
+
+def test_upsert_batches_rows_with_conflict_key(stand_in, tmp_path):
+    base_url, server = stand_in(accept)
+    writer = make_writer(base_url, tmp_path, batch_size=2)
+    rows = [{'boiler': 'b1', 'reading_time': f"2026-01-01T{hour:02d}:00"} for hour in range(5)]
+
+    assert writer.upsert(HOURLY_TABLE, rows, 'boiler,reading_time') == 5
+
+    calls = posted(server)
+    assert [len(batch) for *_, batch in calls] == [2, 2, 1]
+    assert [row for *_, batch in calls for row in batch] == rows
+    for table, on_conflict, prefer, _ in calls:
+        assert table == HOURLY_TABLE
+        assert on_conflict == 'boiler,reading_time'
+        assert prefer == 'resolution=merge-duplicates,return=minimal'
+    assert server.requests[0].headers['apikey'] == 'service-key'
+    assert server.requests[0].headers['Authorization'] == 'Bearer service-key'
+
+
+def test_insert_without_conflict_key_is_plain(stand_in, tmp_path):
+    base_url, server = stand_in(accept)
+    make_writer(base_url, tmp_path).log_upload('boiler.xlsx', 3)
+
+    (table, on_conflict, prefer, rows), = posted(server)
+    assert (table, on_conflict, prefer) == ('admin_uploads', None, 'return=minimal')
+    assert rows[0]['rows_processed'] == 3
+
+
+def test_rejected_batch_raises(stand_in, tmp_path):
+    base_url, _ = stand_in(lambda handler: handler.send_body(409, {'message': 'conflict'}))
+    with pytest.raises(SupabaseError, match='409'):
+        make_writer(base_url, tmp_path).upsert(HOURLY_TABLE, [{'boiler': 'b1'}], 'boiler,reading_time')
+
+
+def test_sync_month_sends_only_changed_rows(stand_in, tmp_path):
+    workbook = tmp_path / 'report.xlsx'
+    store_dir = tmp_path / 'store'
+    generate_workbook(workbook, 2026, 1, 2, seed=1)
+    write_month(extract_workbook(workbook), store_dir=store_dir)
+    base_url, server = stand_in(accept)
+
+    writer = make_writer(base_url, tmp_path, batch_size=100)
+    assert writer.sync_month('2026-01', store_dir) == {HOURLY_TABLE: 2 * 24 * 3, DAILY_TABLE: 2 * 3}
+    keys = {table: on_conflict for table, on_conflict, _, _ in posted(server)}
+    assert keys == {HOURLY_TABLE: 'boiler,reading_time', DAILY_TABLE: 'boiler,reading_date'}
+
+    # Same store version: nothing is sent again, even from a fresh writer
+    server.requests.clear()
+    assert make_writer(base_url, tmp_path).sync_month('2026-01', store_dir) == {}
+    assert server.requests == []
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Columnar time-series store for the hourly boiler readings.
+
+One typed NumPy array per metric per boiler, partitioned by report month:
+
+    data/store/2026-01/hourly/time.npy          datetime64[m]
+    data/store/2026-01/hourly/b1_steam.npy      float64 (NaN = missing)
+    ...
+    data/store/2026-01/daily_sum/time.npy       datetime64[D]
+    data/store/2026-01/daily_sum/b1_steam.npy   sheet sum rows
+    data/store/2026-01/meta.json
+
+Partitions are loaded with mmap_mode='r', so a multi-month trend query only
+touches the columns it asks for instead of re-parsing a workbook per month.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from excel_extract import BOILER_KEYS, METRICS, month_key
+
+STORE_DIR = Path(os.getenv('BOILER_STORE_DIR', 'data/store'))
+
+HOURLY = 'hourly'
+DAILY_SUM = 'daily_sum'
+TIME_COLUMN = 'time'
+
+COLUMNS = tuple(f"{boiler}_{metric}" for boiler in BOILER_KEYS for metric in METRICS)
+
+
+def column_name(boiler, metric):
+    """('b2', 'ratio') -> 'b2_ratio'."""
+    return f"{boiler}_{metric}"
+
+
+def _save_array(path, array):
+    """np.save via a temp file so readers never map a half-written column."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _columns_from_rows(rows):
+    return {
+        column_name(boiler, metric): np.array(
+            [np.nan if row[boiler][metric] is None else row[boiler][metric] for row in rows],
+            dtype=np.float64
+        )
+        for boiler in BOILER_KEYS
+        for metric in METRICS
+    }
+
+
+def extract_to_columns(extract):
+    """Turn an excel_extract result into (hourly, daily_sum) column dicts."""
+    hours = [hour for day in extract['days'] for hour in day['hours'] if hour.get('timestamp')]
+    hourly = {TIME_COLUMN: np.array([hour['timestamp'] for hour in hours], dtype='datetime64[m]')}
+    hourly.update(_columns_from_rows(hours))
+
+    sum_days = [day for day in extract['days'] if day['sum'] and day['date']]
+    daily_sum = {TIME_COLUMN: np.array([day['date'] for day in sum_days], dtype='datetime64[D]')}
+    daily_sum.update(_columns_from_rows([day['sum'] for day in sum_days]))
+    return hourly, daily_sum
+
+
+def columns_version(*groups):
+    """Content hash over every array, used as the partition's data version."""
+    digest = hashlib.sha256()
+    for group in groups:
+        for name in sorted(group):
+            digest.update(name.encode('utf-8'))
+            digest.update(np.ascontiguousarray(group[name]).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def write_partition(month, hourly, daily_sum, store_dir=STORE_DIR, source=None):
+    """Write one month's columns and its meta.json (written last)."""
+    month_dir = Path(store_dir) / month
+    for kind, columns in ((HOURLY, hourly), (DAILY_SUM, daily_sum)):
+        kind_dir = month_dir / kind
+        kind_dir.mkdir(parents=True, exist_ok=True)
+        for name, array in columns.items():
+            _save_array(kind_dir / f"{name}.npy", array)
+
+    meta = {
+        'month': month,
+        'rows': int(len(hourly[TIME_COLUMN])),
+        'days': int(len(daily_sum[TIME_COLUMN])),
+        'boilers': list(BOILER_KEYS),
+        'metrics': list(METRICS),
+        'version': columns_version(hourly, daily_sum),
+        'source': source,
+        'updatedAt': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    tmp_path = month_dir / 'meta.json.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, month_dir / 'meta.json')
+    return meta
+
+
+def write_month(extract, store_dir=STORE_DIR, source=None):
+    """Store an extract under its report month. Returns the partition meta."""
+    month = month_key(extract)
+    if month is None:
+        return None
+    hourly, daily_sum = extract_to_columns(extract)
+    return write_partition(month, hourly, daily_sum, store_dir=store_dir, source=source)
+
+
+def list_months(store_dir=STORE_DIR):
+    """Months with a complete partition, oldest first."""
+    store_dir = Path(store_dir)
+    if not store_dir.exists():
+        return []
+    return sorted(path.parent.name for path in store_dir.glob('*/meta.json'))
+
+
+def read_meta(month, store_dir=STORE_DIR):
+    with open(Path(store_dir) / month / 'meta.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_month(month, columns=None, kind=HOURLY, store_dir=STORE_DIR, mmap=True):
+    """
+    Load the requested columns (plus time) of one partition. Arrays are
+    read-only memory maps unless mmap=False.
+    """
+    kind_dir = Path(store_dir) / month / kind
+    names = [TIME_COLUMN] + [name for name in (columns or COLUMNS) if name != TIME_COLUMN]
+    mode = 'r' if mmap else None
+    return {name: np.load(kind_dir / f"{name}.npy", mmap_mode=mode) for name in names}
+
+
+def load_range(start=None, end=None, columns=None, kind=HOURLY, store_dir=STORE_DIR):
+    """
+    Concatenate the requested columns across months, keeping rows whose time
+    falls in [start, end] (ISO strings or datetime64, either may be None).
+    """
+    unit = 'm' if kind == HOURLY else 'D'
+    start = np.datetime64(start, unit) if start is not None else None
+    end = np.datetime64(end, unit) if end is not None else None
+
+    parts = []
+    for month in list_months(store_dir):
+        month_start = np.datetime64(month, 'M')
+        if end is not None and month_start > end.astype('datetime64[M]'):
+            continue
+        # The last hour of a month's workbook rolls into the next day, so only
+        # skip partitions that end more than a month before `start`
+        if start is not None and month_start + np.timedelta64(1, 'M') < start.astype('datetime64[M]'):
+            continue
+        data = load_month(month, columns, kind=kind, store_dir=store_dir)
+        mask = np.ones(len(data[TIME_COLUMN]), dtype=bool)
+        if start is not None:
+            mask &= data[TIME_COLUMN] >= start
+        if end is not None:
+            mask &= data[TIME_COLUMN] <= end
+        parts.append({name: array[mask] for name, array in data.items()})
+
+    names = [TIME_COLUMN] + [name for name in (columns or COLUMNS) if name != TIME_COLUMN]
+    if not parts:
+        return {name: np.array([], dtype=f'datetime64[{unit}]' if name == TIME_COLUMN else np.float64)
+                for name in names}
+    merged = {name: np.concatenate([part[name] for part in parts]) for name in names}
+    order = np.argsort(merged[TIME_COLUMN], kind='stable')
+    return {name: array[order] for name, array in merged.items()}
+
+
+def store_version(store_dir=STORE_DIR):
+    """Combined version of every partition, changes whenever any month does."""
+    digest = hashlib.sha256()
+    for month in list_months(store_dir):
+        digest.update(f"{month}:{read_meta(month, store_dir)['version']};".encode('utf-8'))
+    return digest.hexdigest()[:16]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Access-token cache for delegated Graph auth.
+
+The access token is kept with its expiry and reused until shortly before it
+runs out, so repeated syncs skip the token round-trip. Refresh tokens that
+Azure rotates are written back to a store (an encrypted local file by
+default) instead of being thrown away, which keeps the 90-day inactivity
+window rolling forward on its own.
+
+The file store needs the `cryptography` package. The key comes from
+TOKEN_CACHE_KEY (a Fernet key) or from a 0600 key file next to the cache.
+On GitHub Actions the cache directory is itself cached, so a key file there
+would travel with the ciphertext: TOKEN_CACHE_KEY is required and without
+it tokens are only kept in memory.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from graph_client import get_session, token_url
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # optional dependency
+    Fernet = None
+    InvalidToken = Exception
+
+DELEGATED_SCOPE = 'Files.Read.All Sites.Read.All offline_access'
+REFRESH_MARGIN = 300  # refresh this many seconds before the access token expires
+
+TOKEN_CACHE_FILE = Path(os.getenv(
+    'TOKEN_CACHE_FILE',
+    Path.home() / '.cache' / 'boiler-sync' / 'token_cache.bin'
+))
+
+
+class TokenError(Exception):
+    """No usable token could be obtained."""
+
+
+class MemoryTokenStore:
+    """Keeps tokens for the lifetime of the process only."""
+
+    def __init__(self):
+        self._data = {}
+
+    def load(self):
+        return dict(self._data)
+
+    def save(self, data):
+        self._data = dict(data)
+
+
+class EncryptedFileTokenStore:
+    """Fernet-encrypted JSON file, written atomically with 0600 permissions."""
+
+    def __init__(self, path=TOKEN_CACHE_FILE, key=None):
+        if Fernet is None:
+            raise TokenError("Encrypted token cache needs the 'cryptography' package")
+        self.path = Path(path)
+        key = key or os.getenv('TOKEN_CACHE_KEY')
+        if not key and os.getenv('GITHUB_ACTIONS'):
+            raise TokenError("TOKEN_CACHE_KEY is not set (required on GitHub Actions)")
+        try:
+            self.fernet = Fernet(key or self._load_or_create_key())
+        except ValueError:
+            raise TokenError(f"Token cache key for {self.path} is malformed (expected a Fernet key)") from None
+
+    def _load_or_create_key(self):
+        key_path = self.path.with_suffix('.key')
+        if key_path.exists():
+            return key_path.read_bytes().strip()
+        key = Fernet.generate_key()
+        self._write_private(key_path, key)
+        return key
+
+    @staticmethod
+    def _write_private(path, payload):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def load(self):
+        try:
+            return json.loads(self.fernet.decrypt(self.path.read_bytes()))
+        except FileNotFoundError:
+            return {}
+        except (InvalidToken, ValueError):
+            print(f"⚠️  Token cache {self.path} unreadable (wrong TOKEN_CACHE_KEY?) - ignoring it")
+            return {}
+
+    def save(self, data):
+        self._write_private(self.path, self.fernet.encrypt(json.dumps(data).encode('utf-8')))
+
+
+def default_store():
+    """Encrypted file store when possible, otherwise an in-memory one."""
+    try:
+        return EncryptedFileTokenStore()
+    except TokenError as e:
+        print(f"⚠️  {e} - rotated refresh tokens will not be persisted")
+        return MemoryTokenStore()
+
+
+class TokenCache:
+    """
+    Hands out delegated access tokens for one tenant/client pair.
+
+    `seed_refresh_token` (normally AZURE_REFRESH_TOKEN) is only used when the
+    store has no refresh token of its own, or when the stored one is rejected.
+    """
+
+    def __init__(self, tenant_id, client_id, seed_refresh_token=None, store=None,
+                 session=None, scope=DELEGATED_SCOPE, refresh_margin=REFRESH_MARGIN):
+        self.tenant_id = tenant_id
+        self.client_id = client_id
+        self.seed_refresh_token = seed_refresh_token
+        self.store = store if store is not None else default_store()
+        self.session = session or get_session()
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self):
+        data = self.store.load()
+        if data.get('tenant_id') != self.tenant_id or data.get('client_id') != self.client_id:
+            return {}
+        return data
+
+    def has_refresh_token(self):
+        return bool(self._data.get('refresh_token') or self.seed_refresh_token)
+
+    def access_token_valid(self):
+        expires_at = self._data.get('expires_at', 0)
+        return bool(self._data.get('access_token')) and expires_at - self.refresh_margin > time.time()
+
+    def get_access_token(self):
+        """Return a cached access token, refreshing it if it is about to expire."""
+        with self._lock:
+            if self.access_token_valid():
+                return self._data['access_token']
+            return self._refresh()
+
+    def invalidate(self):
+        """Drop the cached access token (e.g. after a 401)."""
+        with self._lock:
+            self._data.pop('access_token', None)
+            self._data.pop('expires_at', None)
+
+    def store_tokens(self, token_json, used_refresh_token=None):
+        """Record a token endpoint response and persist it."""
+        now = time.time()
+        self._data = {
+            'tenant_id': self.tenant_id,
+            'client_id': self.client_id,
+            'access_token': token_json.get('access_token'),
+            'expires_at': now + int(token_json.get('expires_in', 0)),
+            'refresh_token': (token_json.get('refresh_token') or used_refresh_token
+                              or self._data.get('refresh_token')),
+            'updated_at': now,
+        }
+        self.store.save(self._data)
+
+    def _refresh(self):
+        candidates = []
+        for refresh_token in (self._data.get('refresh_token'), self.seed_refresh_token):
+            if refresh_token and refresh_token not in candidates:
+                candidates.append(refresh_token)
+        if not candidates:
+            raise TokenError("No refresh token available (set AZURE_REFRESH_TOKEN or run setup_delegated_auth.py)")
+
+        last_error = None
+        for refresh_token in candidates:
+            response = self.session.post(token_url(self.tenant_id), data={
+                'client_id': self.client_id,
+                'grant_type': 'refresh_token',
+                'refresh_token': refresh_token,
+                'scope': self.scope,
+            })
+            if response.status_code == 200:
+                token_json = response.json()
+                if token_json.get('refresh_token') not in (None, refresh_token):
+                    print("🔁 Rotated refresh token saved to token cache")
+                self.store_tokens(token_json, used_refresh_token=refresh_token)
+                return self._data['access_token']
+            last_error = f"{response.status_code} {response.text[:200]}"
+
+        raise TokenError(f"Refresh token auth failed: {last_error}")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Content-addressed archive of source workbooks, as an alternative to
+committing data/boiler_data.xlsx on every sync.
+
+    data/archive/objects/3f/3f9a...e2.xlsx    one file per distinct SHA-256
+    data/archive/index.json                   sha256 -> fingerprint, month, source, archivedAt
+
+Callers only archive when the extracted data's fingerprint changed, so a
+workbook re-saved without new readings is not stored twice.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from sync_state import file_sha256
+
+WORKBOOK_ARCHIVE_DIR = Path(os.getenv('WORKBOOK_ARCHIVE_DIR', 'data/archive'))
+
+
+def object_path(sha256, archive_dir=WORKBOOK_ARCHIVE_DIR):
+    return Path(archive_dir) / 'objects' / sha256[:2] / f"{sha256}.xlsx"
+
+
+def load_index(archive_dir=WORKBOOK_ARCHIVE_DIR):
+    try:
+        with open(Path(archive_dir) / 'index.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def archive_workbook(path, fingerprint=None, month=None, archive_dir=WORKBOOK_ARCHIVE_DIR):
+    """Copy `path` into the archive unless that exact content is already there. Returns its index entry."""
+    sha256 = file_sha256(path)
+    if sha256 is None:
+        raise FileNotFoundError(path)
+
+    target = object_path(sha256, archive_dir)
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + '.tmp')
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+
+    index = load_index(archive_dir)
+    entry = index.get(sha256) or {
+        'fingerprint': fingerprint,
+        'month': month,
+        'source': Path(path).name,
+        'size': target.stat().st_size,
+        'archivedAt': datetime.now().isoformat(),
+    }
+    index[sha256] = entry
+
+    index_path = Path(archive_dir) / 'index.json'
+    tmp_path = index_path.with_name('index.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, index_path)
+    return {'sha256': sha256, 'path': str(target), **entry}
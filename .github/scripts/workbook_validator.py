@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Structural check of a downloaded workbook before anything parses it.
+
+Plugs into stream_download(validate=...) and runs on the temp file:
+
+1. first bytes: xlsx zip signature, not an HTML/JSON error page or legacy .xls
+2. ZIP end-of-central-directory record present and consistent (truncation)
+3. xl/workbook.xml and its rels present; sheet names read from those two
+   small parts only, no cell data is decompressed
+4. the NGSTEAM RATIO / WATER_STEAM RATIO parts exist and lie wholly inside
+   the file
+
+Failures raise DownloadError with the reason, typically in a millisecond or two.
+"""
+
+import os
+import struct
+import zipfile
+
+from download_utils import XLS_MAGIC, XLSX_MAGIC, DownloadError, read_preview
+from excel_extract import ExtractError, find_sheets, sheet_parts
+
+EOCD_SIGNATURE = b'PK\x05\x06'
+EOCD_SIZE = 22
+MAX_COMMENT = 0xFFFF
+ZIP64_MARKER = 0xFFFFFFFF
+
+REQUIRED_PARTS = ('[Content_Types].xml', 'xl/workbook.xml', 'xl/_rels/workbook.xml.rels')
+TEXT_PREFIXES = (b'<', b'{', b'\xef\xbb\xbf<')
+
+
+def _fail(message, path, content_type):
+    raise DownloadError(message, content_type=content_type, preview=read_preview(path))
+
+
+def check_signature(path, size, content_type=''):
+    """Reject error pages and non-zip content from the first bytes."""
+    head = read_preview(path, 8)
+    if 'text/html' in content_type.lower() or head.lstrip().startswith(TEXT_PREFIXES):
+        _fail(f"Got a text/HTML response instead of a workbook ({size} bytes)", path, content_type)
+    if head.startswith(XLS_MAGIC):
+        _fail("Legacy .xls workbook - save it as .xlsx", path, content_type)
+    if not head.startswith(XLSX_MAGIC):
+        _fail(f"Not a zip/xlsx file (magic bytes {head[:4].hex()})", path, content_type)
+
+
+def check_end_of_central_directory(path, size, content_type=''):
+    """
+    Find the EOCD record in the file's tail and check the central directory
+    it points at fits before it. Returns the central directory offset.
+    """
+    tail_size = min(size, EOCD_SIZE + MAX_COMMENT)
+    with open(path, 'rb') as f:
+        f.seek(size - tail_size)
+        tail = f.read(tail_size)
+
+    position = tail.rfind(EOCD_SIGNATURE)
+    if position < 0 or len(tail) - position < EOCD_SIZE:
+        _fail(f"Truncated workbook: no zip end-of-central-directory record ({size} bytes)", path, content_type)
+
+    entries, cd_size, cd_offset = struct.unpack('<HII', tail[position + 10:position + 20])
+    eocd_offset = size - tail_size + position
+    if ZIP64_MARKER not in (cd_size, cd_offset) and cd_offset + cd_size > eocd_offset:
+        _fail(f"Truncated workbook: central directory ends at {cd_offset + cd_size}, "
+              f"past its end record at {eocd_offset}", path, content_type)
+    if entries == 0:
+        _fail("Empty zip archive", path, content_type)
+    return cd_offset
+
+
+def inspect_workbook(path, content_type=''):
+    """
+    Run every check and describe the workbook:
+    {'size', 'entries', 'sheets', 'steamSheet', 'waterSheet'}.
+    """
+    size = os.path.getsize(path)
+    check_signature(path, size, content_type)
+    cd_offset = check_end_of_central_directory(path, size, content_type)
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            infos = {info.filename: info for info in archive.infolist()}
+            missing = [name for name in REQUIRED_PARTS if name not in infos]
+            if missing:
+                _fail(f"Not an Excel workbook: missing {', '.join(missing)}", path, content_type)
+
+            parts = sheet_parts(archive)
+            try:
+                steam_name, water_name = find_sheets(list(parts))
+            except ExtractError as e:
+                _fail(str(e), path, content_type)
+
+            for name in (steam_name, water_name):
+                info = infos.get(parts[name])
+                if info is None:
+                    _fail(f"Sheet '{name}' has no part {parts[name]} in the archive", path, content_type)
+                # A sheet whose data would run past the central directory was cut short
+                if cd_offset < ZIP64_MARKER and info.header_offset + info.compress_size > cd_offset:
+                    _fail(f"Truncated workbook: sheet '{name}' data is incomplete", path, content_type)
+    except (zipfile.BadZipFile, KeyError, SyntaxError) as e:
+        # SyntaxError covers xml.etree ParseError on a corrupt workbook.xml
+        _fail(f"Corrupt workbook: {e}", path, content_type)
+
+    return {
+        'size': size,
+        'entries': len(infos),
+        'sheets': list(parts),
+        'steamSheet': steam_name,
+        'waterSheet': water_name,
+    }
+
+
+def validate_workbook(path, content_type=''):
+    """stream_download validate hook: raise DownloadError unless `path` is a usable report workbook."""
+    inspect_workbook(path, content_type)
@@ -0,0 +1,51 @@
+-- Add this to your Supabase SQL to give readings a natural key
+-- (used by .github/scripts/supabase_writer.py for idempotent upserts)
+
+-- Hourly readings per boiler, one row per (boiler, reading_time)
+CREATE TABLE IF NOT EXISTS boiler_hourly_readings (
+  boiler TEXT NOT NULL,
+  reading_time TIMESTAMP NOT NULL,
+  steam NUMERIC,
+  ng NUMERIC,
+  ratio NUMERIC,
+  output NUMERIC,
+  water NUMERIC,
+  water_steam NUMERIC,
+  electric_steam NUMERIC,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (boiler, reading_time)
+);
+
+-- Daily totals from the sheet's sum rows, one row per (boiler, reading_date)
+CREATE TABLE IF NOT EXISTS boiler_daily_readings (
+  boiler TEXT NOT NULL,
+  reading_date DATE NOT NULL,
+  steam NUMERIC,
+  ng NUMERIC,
+  ratio NUMERIC,
+  output NUMERIC,
+  water NUMERIC,
+  water_steam NUMERIC,
+  electric_steam NUMERIC,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  PRIMARY KEY (boiler, reading_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_boiler_hourly_readings_time ON boiler_hourly_readings(reading_time DESC);
+
+-- Latest-reading snapshots: key them by the hour they describe so re-syncs update instead of duplicating
+ALTER TABLE boiler_readings ADD COLUMN IF NOT EXISTS reading_time TIMESTAMP;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_boiler_readings_reading_time ON boiler_readings(reading_time);
+
+-- Enable RLS
+ALTER TABLE boiler_hourly_readings ENABLE ROW LEVEL SECURITY;
+ALTER TABLE boiler_daily_readings ENABLE ROW LEVEL SECURITY;
+
+-- Allow public read access (writes use the service role key)
+CREATE POLICY "Allow public read access to boiler_hourly_readings"
+  ON boiler_hourly_readings FOR SELECT
+  TO anon USING (true);
+
+CREATE POLICY "Allow public read access to boiler_daily_readings"
+  ON boiler_daily_readings FOR SELECT
+  TO anon USING (true);
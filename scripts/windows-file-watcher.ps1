@@ -5,18 +5,51 @@ $sourcePath = "C:\Users\CCR\Desktop\Production latest\2026\01 JANUARY 2026\REPOR
 $destPath = "C:\Users\CCR\Desktop\Production latest\boiler_data_sync.xlsx"
 $shareDestPath = "C:\Users\CCR\Desktop\Desktop PC CCR\boiler_data_sync.xlsx"  # Accessible via SMB
 
+# Optional push to .github/scripts/ingest_server.py (e.g. http://sync-host:8765)
+$ingestUrl = $env:BOILER_INGEST_URL
+$ingestToken = $env:BOILER_INGEST_TOKEN
+$lastPushedHash = ""
+
+function Push-Workbook($path) {
+    # Only upload when the content changed since the last push
+    $hash = (Get-FileHash -Path $path -Algorithm SHA256).Hash.ToLower()
+    if ($hash -eq $script:lastPushedHash) {
+        Write-Host "  ⏭️  Unchanged since last push"
+        return
+    }
+
+    $headers = @{}
+    if ($ingestToken) { $headers["Authorization"] = "Bearer $ingestToken" }
+
+    $notify = Invoke-RestMethod -Method Post -Uri "$ingestUrl/notify" -Headers $headers `
+        -ContentType "application/json" -Body (@{ sha256 = $hash } | ConvertTo-Json)
+    if ($notify.changed) {
+        $headers["X-File-Name"] = [System.IO.Path]::GetFileName($sourcePath)
+        $headers["X-Content-SHA256"] = $hash
+        $result = Invoke-RestMethod -Method Put -Uri "$ingestUrl/workbook" -Headers $headers `
+            -InFile $path -ContentType "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        Write-Host "  📤 Pushed to ingest server: $($result.outcome)"
+    }
+    else {
+        Write-Host "  ⏭️  Ingest server already has this version"
+    }
+    $script:lastPushedHash = $hash
+}
+
 Write-Host "==================================="
 Write-Host "Boiler Data File Monitor - Starting"
 Write-Host "==================================="
 Write-Host "Source: $sourcePath"
 Write-Host "Destination: $destPath"
 Write-Host "Share path: $shareDestPath"
+if ($ingestUrl) { Write-Host "Ingest server: $ingestUrl" }
 Write-Host ""
-Write-Host "This script will copy the file every 5 minutes"
+Write-Host "This script will copy the file when it changes (at least every 5 minutes)"
 Write-Host "Press Ctrl+C to stop"
 Write-Host ""
 
 $lastCopyTime = [DateTime]::MinValue
+$lastWriteTime = [DateTime]::MinValue
 
 while ($true) {
     try {
@@ -25,8 +58,9 @@ while ($true) {
         
         # Check if file was modified or if it's been more than 5 minutes
         $timeSinceLastCopy = ($currentTime - $lastCopyTime).TotalMinutes
+        $modified = $sourceFile.LastWriteTime -ne $lastWriteTime
         
-        if ($timeSinceLastCopy -ge 5) {
+        if ($modified -or $timeSinceLastCopy -ge 5) {
             Write-Host "[$($currentTime.ToString('yyyy-MM-dd HH:mm:ss'))] Copying file..."
             
             # Method 1: Try direct copy (works even if file is open in Excel with AutoSave)
@@ -37,6 +71,7 @@ while ($true) {
                 Write-Host "  File size: $([math]::Round($sourceFile.Length/1KB, 2)) KB"
                 Write-Host "  Last modified: $($sourceFile.LastWriteTime)"
                 $lastCopyTime = $currentTime
+                $lastWriteTime = $sourceFile.LastWriteTime
             }
             catch {
                 # Method 2: If direct copy fails, use COM to save a copy via Excel
@@ -55,11 +90,21 @@ while ($true) {
                     Copy-Item -Path $destPath -Destination $shareDestPath -Force
                     Write-Host "  ✅ Excel COM copy successful!"
                     $lastCopyTime = $currentTime
+                    $lastWriteTime = $sourceFile.LastWriteTime
                 }
                 catch {
                     Write-Host "  ❌ Both methods failed: $($_.Exception.Message)"
                 }
             }
+
+            if ($ingestUrl -and $lastCopyTime -eq $currentTime) {
+                try {
+                    Push-Workbook $destPath
+                }
+                catch {
+                    Write-Host "  ⚠️  Push failed: $($_.Exception.Message)"
+                }
+            }
             Write-Host ""
         }
         
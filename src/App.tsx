@@ -9,6 +9,11 @@ import BoilerDetailModal from './components/BoilerDetailModal'
 import CumulativeDailyData from './components/CumulativeDailyData'
 import { AdminPanel } from './components/AdminPanel'
 import AlertNotifications from './components/AlertNotifications'
+import { subscribeToBoilerChanges } from './services/changeFeedService'
+
+// Optional on-prem read API (.github/scripts/read_api.py) for push updates
+const READ_API_URL = import.meta.env.VITE_READ_API_URL
+const READ_API_TOKEN = import.meta.env.VITE_READ_API_TOKEN
 
 interface BoilerData {
   id: number
@@ -282,6 +287,17 @@ const Dashboard: React.FC<DashboardProps> = ({ user, logout }) => {
     return () => clearInterval(refreshInterval)
   }, [])
 
+  // Refetch as soon as a sync publishes instead of waiting for the next tick
+  useEffect(() => {
+    if (!READ_API_URL) return
+
+    const refresh = () => {
+      fetchBoilerData()
+      fetchCumulativeData()
+    }
+    return subscribeToBoilerChanges(READ_API_URL, { onChange: refresh, onReset: refresh }, READ_API_TOKEN)
+  }, [])
+
   return (
     <NotificationProvider>
       <div className="app-container">
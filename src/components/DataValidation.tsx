@@ -113,6 +113,23 @@ export const DataValidation: React.FC = () => {
         }
       }
 
+      // Hourly alerts (thresholds, ratio drift, stuck sensors, gaps) are computed during sync
+      const alertsResponse = await fetch(`/boiler-monitoring-interface/boiler_alerts.json?v=${Date.now()}`);
+      if (alertsResponse.ok) {
+        const alertData = await alertsResponse.json();
+        (alertData.alerts || []).forEach((alert: any) => {
+          foundIssues.push({
+            id: alert.id,
+            severity: alert.severity,
+            boiler: alert.boiler ? `Boiler ${alert.boiler.slice(1)}` : 'All Boilers',
+            metric: alert.metric || alert.rule,
+            value: alert.value ?? '',
+            message: alert.end ? alert.message : `${alert.message} (ongoing)`,
+            date: alert.start
+          });
+        });
+      }
+
       setIssues(foundIssues);
     } catch (error) {
       console.error('Error during validation:', error);
@@ -0,0 +1,64 @@
+/**
+ * Live row-level updates from the on-prem read API (.github/scripts/read_api.py).
+ * Each `change` event carries only the hourly rows added or corrected by a
+ * sync; a `reset` means the change was too large to patch and the dashboard
+ * should reload its data. EventSource resumes after the last event id on
+ * reconnect, so no update is missed across short outages.
+ */
+
+type BoilerValues = Record<string, number | null>;
+
+export interface ChangedRow {
+  timestamp?: string;
+  time?: string;
+  date?: string;
+  b1?: BoilerValues;
+  b2?: BoilerValues;
+  b3?: BoilerValues;
+}
+
+export interface BoilerChangeSet {
+  seq: number;
+  at?: string;
+  month?: string;
+  version?: string;
+  reset?: boolean;
+  added?: ChangedRow[];
+  corrected?: ChangedRow[];
+  removed?: string[];
+  sums?: ChangedRow[];
+}
+
+export interface ChangeFeedHandlers {
+  onChange: (change: BoilerChangeSet) => void;
+  onReset?: (change: BoilerChangeSet) => void;
+  onError?: (event: Event) => void;
+}
+
+/**
+ * Subscribe to the change feed at `apiUrl` (e.g. http://plant-pc:8780).
+ * Returns a function that closes the connection.
+ */
+export function subscribeToBoilerChanges(
+  apiUrl: string,
+  handlers: ChangeFeedHandlers,
+  token?: string
+): () => void {
+  const url = `${apiUrl.replace(/\/$/, '')}/changes${token ? `?token=${encodeURIComponent(token)}` : ''}`;
+  const source = new EventSource(url);
+
+  source.addEventListener('change', (event) => {
+    handlers.onChange(JSON.parse((event as MessageEvent).data));
+  });
+  source.addEventListener('reset', (event) => {
+    const change = JSON.parse((event as MessageEvent).data);
+    console.log(`🔄 Change feed reset at #${change.seq} - reloading data`);
+    handlers.onReset?.(change);
+  });
+  source.onerror = (event) => {
+    console.warn('⚠️ Change feed connection lost, reconnecting...');
+    handlers.onError?.(event);
+  };
+
+  return () => source.close();
+}
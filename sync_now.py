@@ -1,6 +1,13 @@
 #!/usr/bin/env python3
 import os
 import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / '.github' / 'scripts'))
+from sync_metrics import annotate, phase, start_run
+
+# The download script records its own phases; this run times the whole invocation
+metrics = start_run('sync_now')
 
 # Try Graph API first
 print("=== Testing Graph API Integration ===\n")
@@ -16,10 +23,13 @@ if TENANT_ID and CLIENT_ID and CLIENT_SECRET:
     print(f"   Secret: {'*' * 20}\n")
     print("Running Graph API sync...\n")
     import subprocess
-    result = subprocess.run(['python', '.github/scripts/download_from_graph_api.py'], capture_output=True, text=True)
+    with phase('download'):
+        result = subprocess.run(['python', '.github/scripts/download_from_graph_api.py'], capture_output=True, text=True)
     print(result.stdout)
     if result.returncode != 0:
         print("STDERR:", result.stderr)
+    annotate(returncode=result.returncode)
+    metrics.close('ok' if result.returncode == 0 else 'failed')
     sys.exit(result.returncode)
 else:
     print("❌ Azure credentials NOT found in environment")